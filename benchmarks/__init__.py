@@ -0,0 +1,5 @@
+"""Template rendering benchmarks for stacker_blueprints.
+
+Run with ``python -m benchmarks`` from the root of the repository. See
+``benchmarks/README.rst`` for details.
+"""
@@ -0,0 +1,331 @@
+"""Blueprint configurations used by the rendering benchmarks.
+
+Every blueprint is benchmarked at (at least) two sizes: ``realistic``, which
+mirrors a typical production stack, and ``scaled``, which stresses the
+blueprint with as many resources as it can hold while staying under the
+per-template resource and output limits enforced by troposphere.
+"""
+from stacker.context import Context
+from stacker.config import Config
+from stacker.variables import Variable
+
+from troposphere.awslambda import Code
+
+from stacker_blueprints.aws_lambda import Function
+from stacker_blueprints.dynamodb import DynamoDB, AutoScaling
+from stacker_blueprints.ec2 import Instances
+from stacker_blueprints.ecs import SimpleFargateService
+from stacker_blueprints.elasticache.redis import RedisReplicationGroup
+from stacker_blueprints.empire.daemon import EmpireDaemon
+from stacker_blueprints.rds.aurora.base import AuroraCluster
+from stacker_blueprints.rds.postgres import MasterInstance
+from stacker_blueprints.route53 import DNSRecords
+from stacker_blueprints.s3 import Buckets
+from stacker_blueprints.security_rules import Rules
+from stacker_blueprints.vpc import VPC
+
+# Value used for variables that are submitted as CloudFormation Parameters;
+# they have no effect on the rendered template. This matches what
+# stacker.blueprints.base.Blueprint.to_json does.
+UNUSED_PARAMETER_VALUE = "unused_value"
+
+SIZES = ("realistic", "scaled")
+
+
+class Case(object):
+    """A single blueprint configuration to benchmark.
+
+    Args:
+        blueprint_class (type): The blueprint class to render.
+        size (str): One of :data:`SIZES`.
+        variables (callable): Returns a fresh dictionary of variables each
+            time it is called, since some blueprints modify the variables
+            they are given.
+        label (str, optional): Overrides the blueprint part of the case name.
+    """
+
+    def __init__(self, blueprint_class, size, variables, label=None):
+        self.blueprint_class = blueprint_class
+        self.size = size
+        self.variables = variables
+        module = blueprint_class.__module__.replace("stacker_blueprints.", "")
+        self.label = label or "%s.%s" % (module, blueprint_class.__name__)
+
+    @property
+    def name(self):
+        return "%s[%s]" % (self.label, self.size)
+
+    def build(self):
+        """Returns a blueprint with its variables resolved."""
+        context = Context(config=Config({"namespace": "bench"}))
+        blueprint = self.blueprint_class("bench", context)
+        provided = self.variables()
+        for name in blueprint.get_parameter_definitions():
+            provided.setdefault(name, UNUSED_PARAMETER_VALUE)
+        blueprint.resolve_variables(
+            [Variable(k, v) for k, v in provided.items()]
+        )
+        return blueprint
+
+
+def vpc_variables(az_count):
+    def variables():
+        return {
+            "AZCount": az_count,
+            "CidrBlock": "10.128.0.0/16",
+            "PublicSubnets": [
+                "10.128.%d.0/24" % i for i in range(az_count)
+            ],
+            "PrivateSubnets": [
+                "10.128.%d.0/22" % (32 + i * 4) for i in range(az_count)
+            ],
+            "InternalDomain": "internal",
+            "BaseDomain": "example.com",
+        }
+    return variables
+
+
+def dns_records_variables(count, bulk=False):
+    def variables():
+        records = []
+        for i in range(count):
+            records.append({
+                "Name": "host%d.example.com." % i,
+                "Type": "A",
+                "TTL": "300",
+                "ResourceRecords": ["10.0.%d.%d" % (i // 250, i % 250)],
+            })
+        records.append({
+            "Name": "cdn.example.com.",
+            "Type": "A",
+            "AliasTarget": {"DNSName": "d123456789f.cloudfront.net."},
+        })
+        records.append({
+            "Name": "lb.example.com.",
+            "Type": "A",
+            "AliasTarget": {
+                "DNSName": "myelb-1234567890.us-east-1.elb.amazonaws.com.",
+            },
+        })
+        if bulk:
+            return {"HostedZoneId": "Z1234567890", "BulkRecordSets": records}
+        return {"HostedZoneId": "Z1234567890", "RecordSets": records}
+    return variables
+
+
+def lambda_variables(with_vpc):
+    def variables():
+        v = {
+            "Code": Code(S3Bucket="bench-bucket", S3Key="code.zip"),
+            "Description": "Benchmark function.",
+            "Environment": {"KEY%d" % i: "value%d" % i for i in range(20)},
+            "Runtime": "python2.7",
+            "AliasName": "prod",
+        }
+        if with_vpc:
+            v["VpcConfig"] = {
+                "SecurityGroupIds": ["sg-%d" % i for i in range(5)],
+                "SubnetIds": ["subnet-%d" % i for i in range(6)],
+            }
+            v["EventSourceMapping"] = {
+                "EventSourceArn": "arn:aws:kinesis:us-east-1:12345:"
+                                  "stream/bench",
+                "StartingPosition": "LATEST",
+            }
+        return v
+    return variables
+
+
+def rds_variables():
+    return {
+        "VpcId": "vpc-12345",
+        "Subnets": "subnet-1,subnet-2,subnet-3",
+        "DBFamily": "postgres9.6",
+        "DatabaseParameters": {"work_mem": "65536"},
+        "InternalZoneId": "Z1234567890",
+        "InternalZoneName": "internal.",
+        "InternalHostname": "db",
+        "MasterUser": "admin",
+        "DatabaseName": "bench",
+        "EngineMajorVersion": "9.6",
+        "EngineVersion": "9.6.6",
+        "AllocatedStorage": 100,
+        "Tags": {"team": "bench"},
+    }
+
+
+def aurora_variables():
+    return {
+        "VpcId": "vpc-12345",
+        "Subnets": "subnet-1,subnet-2,subnet-3",
+        "DBFamily": "aurora5.6",
+        "ClusterParameters": {"character_set_server": "utf8"},
+        "InternalZoneId": "Z1234567890",
+        "InternalZoneName": "internal.",
+        "InternalHostname": "aurora",
+        "MasterUser": "admin",
+    }
+
+
+def redis_variables():
+    return {
+        "VpcId": "vpc-12345",
+        "Subnets": "subnet-1,subnet-2,subnet-3",
+        "AutoMinorVersionUpgrade": True,
+        "CacheNodeType": "cache.m4.large",
+        "EngineVersion": "3.2.4",
+        "ParameterGroupFamily": "redis3.2",
+        "ClusterParameters": {"maxmemory-policy": "allkeys-lru"},
+        "InternalZoneId": "Z1234567890",
+        "InternalZoneName": "internal.",
+        "InternalHostname": "redis",
+    }
+
+
+def fargate_variables():
+    return {
+        "ServiceName": "worker",
+        "Image": "bench/worker:1",
+        "Command": ["/bin/run", "--fast"],
+        "Cluster": "bench",
+        "CPU": 1024,
+        "Memory": 2048,
+        "Count": 3,
+        "Subnets": ["subnet-1", "subnet-2"],
+        "SecurityGroup": "sg-12345",
+        "LogGroup": "bench",
+        "Environment": {"KEY%d" % i: "value%d" % i for i in range(30)},
+    }
+
+
+def dynamodb_variables(count):
+    def variables():
+        tables = {}
+        for i in range(count):
+            tables["Table%d" % i] = {
+                "TableName": "bench-table-%d" % i,
+                "KeySchema": [
+                    {"AttributeName": "id", "KeyType": "HASH"},
+                ],
+                "AttributeDefinitions": [
+                    {"AttributeName": "id", "AttributeType": "S"},
+                ],
+                "ProvisionedThroughput": {
+                    "ReadCapacityUnits": 5,
+                    "WriteCapacityUnits": 5,
+                },
+                "StreamSpecification": {"StreamViewType": "NEW_IMAGE"},
+            }
+        return {"Tables": tables}
+    return variables
+
+
+def dynamodb_autoscaling_variables(count):
+    def variables():
+        return {
+            "AutoScalingConfigs": [
+                {
+                    "table": "bench-table-%d" % i,
+                    "read": {"min": 5, "max": 100, "target": 75.0},
+                    "write": {"min": 5, "max": 50},
+                } for i in range(count)
+            ],
+        }
+    return variables
+
+
+def instances_variables(count):
+    def variables():
+        return {
+            "Instances": {
+                "Instance%d" % i: {
+                    "ImageId": "ami-12345",
+                    "InstanceType": "m4.large",
+                    "SubnetId": "subnet-%d" % (i % 3),
+                } for i in range(count)
+            },
+        }
+    return variables
+
+
+def buckets_variables(count):
+    def variables():
+        return {
+            "Buckets": {
+                "Bucket%d" % i: {
+                    "LifecycleConfiguration": {
+                        "Rules": [{
+                            "Status": "Enabled",
+                            "ExpirationInDays": 40,
+                        }],
+                    },
+                } for i in range(count)
+            },
+            "ReadRoles": ["ReadRole"],
+            "ReadWriteRoles": ["ReadWriteRole"],
+        }
+    return variables
+
+
+def rules_variables(count):
+    def variables():
+        return {
+            "IngressRules": {
+                "Ingress%d" % i: {
+                    "CidrIp": "10.%d.0.0/16" % (i % 256),
+                    "FromPort": 1000 + i,
+                    "ToPort": 1000 + i,
+                    "GroupId": "sg-12345",
+                    "IpProtocol": "tcp",
+                } for i in range(count)
+            },
+        }
+    return variables
+
+
+def empire_daemon_variables():
+    return {}
+
+
+CASES = [
+    Case(VPC, "realistic", vpc_variables(3)),
+    Case(VPC, "scaled", vpc_variables(6)),
+    Case(DNSRecords, "realistic", dns_records_variables(50)),
+    Case(DNSRecords, "scaled", dns_records_variables(190)),
+    Case(DNSRecords, "realistic", dns_records_variables(500, bulk=True),
+         label="route53.DNSRecords.bulk"),
+    Case(DNSRecords, "scaled", dns_records_variables(2000, bulk=True),
+         label="route53.DNSRecords.bulk"),
+    Case(Function, "realistic", lambda_variables(False)),
+    Case(Function, "scaled", lambda_variables(True)),
+    Case(EmpireDaemon, "realistic", empire_daemon_variables),
+    Case(MasterInstance, "realistic", rds_variables),
+    Case(AuroraCluster, "realistic", aurora_variables),
+    Case(RedisReplicationGroup, "realistic", redis_variables),
+    Case(SimpleFargateService, "realistic", fargate_variables),
+    Case(DynamoDB, "realistic", dynamodb_variables(5)),
+    Case(DynamoDB, "scaled", dynamodb_variables(30)),
+    Case(AutoScaling, "realistic", dynamodb_autoscaling_variables(5)),
+    Case(AutoScaling, "scaled", dynamodb_autoscaling_variables(45)),
+    Case(Instances, "realistic", instances_variables(5)),
+    Case(Instances, "scaled", instances_variables(10)),
+    Case(Buckets, "realistic", buckets_variables(5)),
+    Case(Buckets, "scaled", buckets_variables(20)),
+    Case(Rules, "realistic", rules_variables(20)),
+    Case(Rules, "scaled", rules_variables(190)),
+]
+
+
+def get_cases(patterns=None):
+    """Returns the cases whose name contains any of the given patterns."""
+    if not patterns:
+        return list(CASES)
+    return [c for c in CASES if any(p in c.name for p in patterns)]
+
+
+def get_case(name):
+    """Returns the case with exactly the given name."""
+    for case in CASES:
+        if case.name == name:
+            return case
+    raise KeyError("No benchmark case named %s." % name)
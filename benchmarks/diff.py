@@ -0,0 +1,118 @@
+"""Measures how long :func:`stacker_blueprints.template_diff.diff_templates`
+takes to compare two large templates.
+
+Builds a template of ``--resources`` resources shaped like the ones
+``vpc.VPC`` and ``route53.DNSRecords`` render (subnets, route table
+associations and md5 named record sets), and a copy where a tenth of the
+resources are changed, added or removed, then reports the best time of
+parsing and comparing them.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+import timeit
+
+from stacker_blueprints.route53 import get_record_set_md5
+from stacker_blueprints.template_diff import diff_templates
+
+from .runner import DEFAULT_REPEAT
+
+DEFAULT_RESOURCES = 10000
+
+
+def build_resources(count):
+    resources = {"VPC": {
+        "Type": "AWS::EC2::VPC",
+        "Properties": {"CidrBlock": "10.0.0.0/8"},
+    }}
+    for i in range(count // 10):
+        resources["PrivateSubnet%d" % i] = {
+            "Type": "AWS::EC2::Subnet",
+            "Properties": {
+                "AvailabilityZone": {"Fn::Select": [
+                    i % 3, {"Fn::GetAZs": ""}]},
+                "CidrBlock": "10.%d.%d.0/24" % (i // 256, i % 256),
+                "VpcId": {"Ref": "VPC"},
+                "Tags": [{"Key": "Name", "Value": "private-%d" % i}],
+            },
+        }
+        resources["PrivateRouteTableAssociation%d" % i] = {
+            "Type": "AWS::EC2::SubnetRouteTableAssociation",
+            "Properties": {
+                "SubnetId": {"Ref": "PrivateSubnet%d" % i},
+                "RouteTableId": "rtb-12345678",
+            },
+        }
+    while len(resources) < count:
+        name = "host%d.example.com." % len(resources)
+        resources[get_record_set_md5(name, "A")] = {
+            "Type": "AWS::Route53::RecordSet",
+            "Properties": {
+                "HostedZoneId": "Z1234567890",
+                "Name": name,
+                "Type": "A",
+                "TTL": "300",
+                "ResourceRecords": ["10.0.0.%d" % (len(resources) % 256)],
+            },
+        }
+    return resources
+
+
+def build_templates(count):
+    """Returns the JSON of two templates with about count resources, the
+    second one changing about a tenth of them."""
+    old = build_resources(count)
+    new = json.loads(json.dumps(old))
+    for index, logical_id in enumerate(sorted(new)):
+        properties = new[logical_id]["Properties"]
+        if index % 40 == 1:
+            del new[logical_id]
+        elif index % 40 == 2:
+            new[logical_id + "Copy"] = new[logical_id]
+        elif index % 40 == 3 and "TTL" in properties:
+            properties["TTL"] = "60"
+        elif index % 40 == 4 and "CidrBlock" in properties:
+            properties["CidrBlock"] = properties["CidrBlock"].replace(
+                "/24", "/25")
+    return (json.dumps({"Resources": old}), json.dumps({"Resources": new}))
+
+
+def run(count=DEFAULT_RESOURCES, repeat=DEFAULT_REPEAT):
+    """Returns the best time in seconds, and the diff."""
+    old, new = build_templates(count)
+    seconds = min(timeit.repeat(lambda: diff_templates(old, new), number=1,
+                                repeat=repeat))
+    return seconds, diff_templates(old, new)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.diff",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "-n", "--resources", type=int, default=DEFAULT_RESOURCES,
+        help="Number of resources per template. Default: %(default)s")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="Number of timed comparisons. Default: %(default)s")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    seconds, diff = run(args.resources, args.repeat)
+    counts = ", ".join(
+        "%d %s" % (len(diff.get_resources(action)), action)
+        for action in ("add", "remove", "modify", "replace")
+    )
+    print("Compared %d resources in %.3f s (%s)." % (
+        args.resources, seconds, counts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Measures how long the modules of stacker_blueprints take to import.
+
+Every module is imported in fresh interpreters, which is what
+``python -X importtime`` measures on python 3.7+, but also works on
+python 2. Reported metrics:
+
+- ``cold (ms)``: best time to import the module in a fresh interpreter,
+  dependencies included.
+- ``own (ms)``: best time to import the module once the dependencies every
+  blueprint needs (stacker, troposphere and awacs.aws) are imported.
+- ``modules``: how many modules importing it adds on top of those
+  dependencies. It doesn't depend on the machine, so the baseline committed
+  in ``benchmarks/imports_baseline.json`` only tracks this one.
+
+Exits non-zero when a module regresses compared to the baseline.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+
+import stacker_blueprints
+
+from .runner import (
+    DEFAULT_TOLERANCE,
+    compare,
+    format_results,
+    load_baseline,
+    save_results,
+)
+
+METRICS = [
+    ("cold_ms", "cold (ms)", 5.0),
+    ("own_ms", "own (ms)", 2.0),
+    ("modules", "modules", 0),
+]
+
+DEFAULT_REPEAT = 3
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__),
+                                "imports_baseline.json")
+
+# Imported before the measured module when measuring its own import time.
+PRELOADED = [
+    "stacker.blueprints.base",
+    "stacker.blueprints.variables.types",
+    "troposphere",
+    "awacs.aws",
+]
+
+# Runs in the child interpreter, prints the import time in milliseconds and
+# the number of modules the import added.
+MEASURE_SCRIPT = """
+import importlib, json, sys, timeit
+for name in sys.argv[2:]:
+    importlib.import_module(name)
+before = set(k for k, v in sys.modules.items() if v is not None)
+start = timeit.default_timer()
+importlib.import_module(sys.argv[1])
+elapsed = timeit.default_timer() - start
+after = set(k for k, v in sys.modules.items() if v is not None)
+print(json.dumps([elapsed * 1000, len(after - before)]))
+"""
+
+
+def get_modules():
+    """Returns the name of every module of stacker_blueprints."""
+    modules = [stacker_blueprints.__name__]
+    for _, name, _ in pkgutil.walk_packages(stacker_blueprints.__path__,
+                                            "stacker_blueprints."):
+        modules.append(name)
+    return sorted(modules)
+
+
+def measure_once(module, preload):
+    """Imports module in a fresh interpreter.
+
+    Returns:
+        tuple: The import time in milliseconds and the number of modules it
+            added.
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-c", MEASURE_SCRIPT, module] + preload
+    )
+    elapsed, modules = json.loads(output.decode("utf-8"))
+    return elapsed, modules
+
+
+def measure(module, repeat=DEFAULT_REPEAT):
+    cold = [measure_once(module, [])[0] for _ in range(repeat)]
+    own = [measure_once(module, PRELOADED) for _ in range(repeat)]
+    return {
+        "cold_ms": round(min(cold), 3),
+        "own_ms": round(min(elapsed for elapsed, _ in own), 3),
+        "modules": own[0][1],
+    }
+
+
+def run(modules, repeat=DEFAULT_REPEAT):
+    return dict((module, measure(module, repeat)) for module in modules)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.imports",
+        description="Benchmark the import time of stacker_blueprints.",
+    )
+    parser.add_argument(
+        "modules", nargs="*",
+        help="Only measure modules whose name contains one of these "
+             "strings.")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="Number of imports per module and metric. "
+             "Default: %(default)s")
+    parser.add_argument(
+        "-b", "--baseline", default=DEFAULT_BASELINE,
+        help="A results file to compare against. Default: %(default)s")
+    parser.add_argument(
+        "-t", "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="Allowed regression ratio. Default: %(default)s")
+    parser.add_argument(
+        "-o", "--output",
+        help="Write the results to this file, for use as a baseline.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modules = [
+        module for module in get_modules()
+        if not args.modules or any(p in module for p in args.modules)
+    ]
+    if not modules:
+        print("No modules match %s." % ", ".join(args.modules),
+              file=sys.stderr)
+        return 1
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    results = run(modules, repeat=args.repeat)
+    print(format_results(results, baseline, METRICS, title="module"))
+
+    if args.output:
+        save_results(results, args.output)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, METRICS)
+        for name, metric, old, new in regressions:
+            print(
+                "REGRESSION: %s %s went from %s to %s" % (
+                    name, metric, old, new),
+                file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
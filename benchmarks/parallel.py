@@ -0,0 +1,105 @@
+"""Measures how :func:`stacker_blueprints.render.render_blueprints` scales
+with the number of processes.
+
+Renders a config of ``--stacks`` blueprints, cycling through the benchmark
+cases, once per process count, and reports the wall time and speedup over
+a single process.
+"""
+from __future__ import print_function
+
+import argparse
+import itertools
+import multiprocessing
+import sys
+import time
+
+from stacker_blueprints.render import render_blueprints
+
+from .cases import get_cases
+
+DEFAULT_STACKS = 300
+
+
+def get_process_counts(max_processes):
+    """Returns 1, 2, 4... up to and including max_processes."""
+    counts = []
+    count = 1
+    while count < max_processes:
+        counts.append(count)
+        count *= 2
+    counts.append(max_processes)
+    return counts
+
+
+def build_blueprints(cases, stacks):
+    return [
+        case.build()
+        for case in itertools.islice(itertools.cycle(cases), stacks)
+    ]
+
+
+def run(cases, stacks=DEFAULT_STACKS, process_counts=None):
+    """Renders the same config with each process count.
+
+    Returns:
+        list: (processes, wall seconds, summed per-stack seconds) tuples.
+    """
+    process_counts = process_counts or get_process_counts(
+        multiprocessing.cpu_count()
+    )
+    results = []
+    for processes in process_counts:
+        blueprints = build_blueprints(cases, stacks)
+        start = time.time()
+        rendered = render_blueprints(blueprints, processes=processes)
+        wall = time.time() - start
+        results.append(
+            (processes, wall, sum(result.seconds for result in rendered))
+        )
+    return results
+
+
+def format_results(results):
+    lines = ["%9s  %9s  %9s  %7s  %10s" % (
+        "processes", "wall (s)", "cpu (s)", "speedup", "efficiency")]
+    base_wall = results[0][1]
+    for processes, wall, cpu in results:
+        speedup = base_wall / wall if wall else 0.0
+        lines.append("%9d  %9.3f  %9.3f  %6.2fx  %9.0f%%" % (
+            processes, wall, cpu, speedup, 100 * speedup / processes))
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.parallel",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("-s", "--stacks", type=int, default=DEFAULT_STACKS,
+                        help="Number of blueprints to render. "
+                             "Default: %(default)s")
+    parser.add_argument("-p", "--processes", type=int, action="append",
+                        help="A process count to measure, can be repeated. "
+                             "Default: powers of two up to the CPU count.")
+    parser.add_argument("patterns", nargs="*",
+                        help="Only cycle through the cases whose name "
+                             "contains one of these strings.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = get_cases(args.patterns)
+    if not cases:
+        print("No benchmark cases match %s." % ", ".join(args.patterns),
+              file=sys.stderr)
+        return 1
+    print("Rendering %d stacks on %d CPUs." % (
+        args.stacks, multiprocessing.cpu_count()))
+    print(format_results(run(cases, args.stacks, args.processes)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Measures and reports template rendering performance per blueprint.
+
+Each case is measured in its own child process so that peak memory numbers
+are not polluted by previously measured cases.
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import logging
+import multiprocessing
+import sys
+import timeit
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on windows
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+from .cases import get_case, get_cases
+
+logger = logging.getLogger(__name__)
+
+# Metrics compared against the baseline, the column headers used when
+# printing them, and the absolute change below which a difference is
+# considered noise.
+METRICS = [
+    ("create_ms", "create (ms)", 0.5),
+    ("to_json_ms", "to_json (ms)", 0.5),
+    ("total_ms", "total (ms)", 0.5),
+    ("peak_kb", "peak (KiB)", 512),
+    ("allocations", "allocs", 0),
+]
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.25
+
+
+def render(case):
+    """Builds the case's blueprint and renders it.
+
+    Returns:
+        tuple: The time spent in `create_template` and in `to_json`, in
+            seconds, and the rendered blueprint.
+    """
+    blueprint = case.build()
+    start = timeit.default_timer()
+    blueprint.create_template()
+    created = timeit.default_timer()
+    blueprint.template.to_json()
+    finished = timeit.default_timer()
+    return created - start, finished - created, blueprint
+
+
+def _max_rss_kb():
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform == "darwin":
+        usage //= 1024
+    return usage
+
+
+def measure_memory(case):
+    """Measures peak memory and allocations of rendering the case once.
+
+    Peak memory comes from tracemalloc when it is available, and falls back
+    to the growth of the process' max resident set size otherwise.
+    Allocations are the number of garbage collector tracked objects created
+    (and still alive) while rendering, with automatic collection disabled.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        rss_before = _max_rss_kb()
+        objects_before = len(gc.get_objects())
+        if tracemalloc is not None:
+            tracemalloc.start()
+        blueprint = render(case)[2]
+        if tracemalloc is not None:
+            peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+        else:
+            peak_kb = _max_rss_kb() - rss_before
+        allocations = len(gc.get_objects()) - objects_before
+        del blueprint
+    finally:
+        gc.enable()
+    return peak_kb, allocations
+
+
+def measure(case, repeat=DEFAULT_REPEAT):
+    """Measures a single case.
+
+    Wall times are the best of `repeat` renders, which is the most stable
+    number to compare between runs.
+
+    Returns:
+        dict: The metrics listed in :data:`METRICS`.
+    """
+    # Memory is measured first, so the max resident set size is not already
+    # raised by the timing runs.
+    peak_kb, allocations = measure_memory(case)
+    create_times = []
+    to_json_times = []
+    for _ in range(repeat):
+        create_time, to_json_time, _blueprint = render(case)
+        create_times.append(create_time)
+        to_json_times.append(to_json_time)
+    totals = [c + j for c, j in zip(create_times, to_json_times)]
+    return {
+        "create_ms": round(min(create_times) * 1000, 3),
+        "to_json_ms": round(min(to_json_times) * 1000, 3),
+        "total_ms": round(min(totals) * 1000, 3),
+        "peak_kb": peak_kb,
+        "allocations": allocations,
+    }
+
+
+def _measure_by_name(args):
+    name, repeat = args
+    return measure(get_case(name), repeat)
+
+
+def run(cases, repeat=DEFAULT_REPEAT, isolate=True):
+    """Measures the given cases.
+
+    Args:
+        cases (list): :class:`benchmarks.cases.Case` objects to measure.
+        repeat (int): How many timed renders to run per case.
+        isolate (bool): Measure each case in a fresh child process.
+
+    Returns:
+        dict: Case names mapped to their metrics.
+    """
+    results = {}
+    for case in cases:
+        logger.debug("Measuring %s.", case.name)
+        if isolate:
+            pool = multiprocessing.Pool(1, maxtasksperchild=1)
+            try:
+                results[case.name] = pool.map(
+                    _measure_by_name, [(case.name, repeat)]
+                )[0]
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results[case.name] = measure(case, repeat)
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, metrics=METRICS):
+    """Compares results against a baseline.
+
+    Args:
+        results (dict): Output of :func:`run`.
+        baseline (dict): A previous output of :func:`run`.
+        tolerance (float): How much worse (as a ratio) a metric may get
+            before it is reported as a regression. Changes smaller than the
+            metric's noise floor in `metrics` are never reported.
+        metrics (list): The metrics to compare, defaults to :data:`METRICS`.
+
+    Returns:
+        list: (case name, metric, baseline value, new value) tuples for every
+            regression found.
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        for metric, _header, noise in metrics:
+            old = baseline[name].get(metric)
+            new = results[name].get(metric)
+            if old is None or new is None or old <= 0:
+                continue
+            if new > old * (1 + tolerance) and new - old > noise:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def format_results(results, baseline=None, metrics=METRICS,
+                   title="blueprint"):
+    """Returns the results as a text table.
+
+    When a baseline is given, each metric is followed by its ratio to the
+    baseline value.
+    """
+    headers = [title] + [header for _metric, header, _n in metrics]
+    rows = []
+    for name in sorted(results):
+        row = [name]
+        for metric, _header, _noise in metrics:
+            value = results[name][metric]
+            cell = "%s" % value
+            old = (baseline or {}).get(name, {}).get(metric)
+            if old:
+                cell += " (x%.2f)" % (float(value) / old)
+            row.append(cell)
+        rows.append(row)
+
+    widths = [
+        max(len(r[i]) for r in [headers] + rows) for i in range(len(headers))
+    ]
+    lines = []
+    for row in [headers] + rows:
+        cells = [row[0].ljust(widths[0])]
+        cells += [c.rjust(w) for c, w in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+def load_baseline(path):
+    with open(path) as fd:
+        return json.load(fd)
+
+
+def save_results(results, path):
+    with open(path, "w") as fd:
+        json.dump(results, fd, indent=4, sort_keys=True)
+        fd.write("\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark template rendering of stacker_blueprints.",
+    )
+    parser.add_argument(
+        "cases", nargs="*",
+        help="Only run cases whose name contains one of these strings.")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="Number of timed renders per case. Default: %(default)s")
+    parser.add_argument(
+        "-b", "--baseline",
+        help="A results file to compare against. Exits non-zero if any "
+             "metric regresses by more than the tolerance.")
+    parser.add_argument(
+        "-t", "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="Allowed regression ratio. Default: %(default)s")
+    parser.add_argument(
+        "-o", "--output",
+        help="Write the results to this file, for use as a baseline.")
+    parser.add_argument(
+        "--no-isolate", dest="isolate", action="store_false",
+        help="Measure every case in this process instead of a fresh child "
+             "process per case.")
+    parser.add_argument(
+        "-l", "--list", action="store_true",
+        help="List the available cases and exit.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = get_cases(args.cases)
+
+    if args.list:
+        for case in cases:
+            print(case.name)
+        return 0
+
+    if not cases:
+        print("No cases match %s." % ", ".join(args.cases), file=sys.stderr)
+        return 1
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    results = run(cases, repeat=args.repeat, isolate=args.isolate)
+    print(format_results(results, baseline))
+
+    if args.output:
+        save_results(results, args.output)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(
+                "REGRESSION: %s %s went from %s to %s" % (
+                    name, metric, old, new),
+                file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,86 @@
+"""Compares the ways of serializing the templates of the benchmark cases.
+
+Every case builds its template once, then serializes it with:
+
+- ``pretty (ms)``: troposphere's ``Template.to_json``, which stacker uses.
+- ``minified (ms)``: :func:`stacker_blueprints.serialization.dumps_template`.
+- ``stream (ms)``: :func:`stacker_blueprints.serialization.write_template`,
+  to a temporary file.
+
+along with the size of the pretty and minified templates.
+"""
+from __future__ import print_function
+
+import argparse
+import sys
+import tempfile
+import timeit
+
+from stacker_blueprints.serialization import dumps_template, write_template
+
+from .cases import get_cases
+from .runner import DEFAULT_REPEAT, format_results
+
+METRICS = [
+    ("pretty_ms", "pretty (ms)", 0.5),
+    ("minified_ms", "minified (ms)", 0.5),
+    ("stream_ms", "stream (ms)", 0.5),
+    ("pretty_kb", "pretty (KiB)", 0),
+    ("minified_kb", "minified (KiB)", 0),
+]
+
+
+def best_time(func, repeat):
+    return round(min(timeit.repeat(func, number=1, repeat=repeat)) * 1000, 3)
+
+
+def measure(case, repeat=DEFAULT_REPEAT):
+    blueprint = case.build()
+    blueprint.create_template()
+    template = blueprint.template
+
+    def stream():
+        with tempfile.TemporaryFile("w") as fp:
+            write_template(template, fp)
+
+    return {
+        "pretty_ms": best_time(template.to_json, repeat),
+        "minified_ms": best_time(lambda: dumps_template(template), repeat),
+        "stream_ms": best_time(stream, repeat),
+        "pretty_kb": len(template.to_json()) // 1024,
+        "minified_kb": len(dumps_template(template)) // 1024,
+    }
+
+
+def run(cases, repeat=DEFAULT_REPEAT):
+    return dict((case.name, measure(case, repeat)) for case in cases)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.serialization",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "cases", nargs="*",
+        help="Only run cases whose name contains one of these strings.")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="Number of timed serializations per case and method. "
+             "Default: %(default)s")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = get_cases(args.cases)
+    if not cases:
+        print("No cases match %s." % ", ".join(args.cases), file=sys.stderr)
+        return 1
+    print(format_results(run(cases, args.repeat), metrics=METRICS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
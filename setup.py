@@ -33,7 +33,7 @@ if __name__ == "__main__":
         url="https://github.com/remind101/stacker_blueprints",
         description="Default blueprints for stacker",
         long_description=read("README.rst"),
-        packages=find_packages(),
+        packages=find_packages(exclude=["benchmarks"]),
         install_requires=install_requires,
         tests_require=tests_require,
         test_suite="nose.collector",
@@ -1,6 +1,8 @@
+import json
 import logging
+import math
 
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 
 from stacker.blueprints.variables.types import TroposphereType
 
@@ -11,16 +13,13 @@ from troposphere import (
     Output,
     Ref,
     Sub,
-    iam,
 )
 
 from troposphere import awslambda
 
 from troposphere import events
 
-import awacs.logs
-import awacs.kinesis
-import awacs.dynamodb
+from troposphere.validators import boolean, integer
 
 from awacs.aws import Statement, Allow, Policy
 from awacs.helpers.trust import get_lambda_assumerole_policy
@@ -29,10 +28,173 @@ from .policies import (
     lambda_basic_execution_statements,
     lambda_vpc_execution_statements,
 )
+from .policy_compactor import compact_policy
+from .util import (
+    extend_props,
+    get_property_type,
+    get_resource_class,
+    lazy_import,
+)
+
+aas = lazy_import("troposphere.applicationautoscaling")
+awacs_dynamodb = lazy_import("awacs.dynamodb")
+awacs_kinesis = lazy_import("awacs.kinesis")
+awacs_sqs = lazy_import("awacs.sqs")
+iam = lazy_import("troposphere.iam")
 
 
 logger = logging.getLogger(name=__name__)
 
+ProvisionedConcurrencyConfiguration = get_property_type(
+    awslambda,
+    "ProvisionedConcurrencyConfiguration",
+    {"ProvisionedConcurrentExecutions": (integer, True)},
+)
+Alias = extend_props(
+    awslambda.Alias,
+    ProvisionedConcurrencyConfig=(ProvisionedConcurrencyConfiguration, False),
+)
+Version = extend_props(
+    awslambda.Version,
+    ProvisionedConcurrencyConfig=(ProvisionedConcurrencyConfiguration, False),
+)
+EventSourceMapping = extend_props(
+    awslambda.EventSourceMapping,
+    BisectBatchOnFunctionError=(boolean, False),
+    FunctionResponseTypes=([basestring], False),
+    MaximumBatchingWindowInSeconds=(integer, False),
+    MaximumRecordAgeInSeconds=(integer, False),
+    MaximumRetryAttempts=(integer, False),
+    ParallelizationFactor=(integer, False),
+    TumblingWindowInSeconds=(integer, False),
+)
+
+EphemeralStorage = get_property_type(
+    awslambda,
+    "EphemeralStorage",
+    {"Size": (integer, True)},
+)
+Content = get_property_type(
+    awslambda,
+    "Content",
+    {
+        "S3Bucket": (basestring, True),
+        "S3Key": (basestring, True),
+        "S3ObjectVersion": (basestring, False),
+    },
+)
+LayerVersion = extend_props(
+    get_resource_class(
+        awslambda,
+        "LayerVersion",
+        "AWS::Lambda::LayerVersion",
+        {
+            "CompatibleRuntimes": ([basestring], False),
+            "Content": (Content, True),
+            "Description": (basestring, False),
+            "LayerName": (basestring, False),
+            "LicenseInfo": (basestring, False),
+        },
+    ),
+    CompatibleArchitectures=([basestring], False),
+)
+
+MIN_MEMORY_SIZE = 128
+MAX_MEMORY_SIZE = 10240
+# Lambda allocates CPU in proportion to memory, a full vCPU at 1769 MB, up
+# to 6 vCPUs at the maximum memory size.
+MEMORY_SIZE_PER_VCPU = 1769
+MAX_VCPUS = 6
+MIN_EPHEMERAL_STORAGE = 512
+MAX_EPHEMERAL_STORAGE = 10240
+MAX_LAYERS = 5
+ARCHITECTURES = ("x86_64", "arm64")
+# Runtimes that were never released for arm64.
+X86_64_ONLY_RUNTIMES = frozenset([
+    "dotnetcore2.1", "go1.x", "java8", "nodejs10.x", "python2.7",
+    "python3.6", "python3.7", "ruby2.5",
+])
+
+
+def validate_memory_size(value):
+    """Validates a lambda MemorySize, in MB. Unlike
+    :func:`troposphere.awslambda.validate_memory_size` in the releases we
+    support, allows any size up to 10240 MB."""
+    memory_size = int(value)
+    if not MIN_MEMORY_SIZE <= memory_size <= MAX_MEMORY_SIZE:
+        raise ValueError("Lambda MemorySize must be between %d and %d MB, "
+                         "not %s." % (MIN_MEMORY_SIZE, MAX_MEMORY_SIZE,
+                                      value))
+    return memory_size
+
+
+def get_vcpus(memory_size):
+    """Returns the vCPUs lambda allocates a function, which are fractional
+    under 1769 MB."""
+    if memory_size >= MAX_MEMORY_SIZE:
+        return MAX_VCPUS
+    return min(float(memory_size) / MEMORY_SIZE_PER_VCPU, MAX_VCPUS)
+
+
+def get_memory_size(vcpus):
+    """Returns the smallest MemorySize getting the vCPUs."""
+    return min(int(math.ceil(vcpus * MEMORY_SIZE_PER_VCPU)), MAX_MEMORY_SIZE)
+
+
+class LambdaFunction(awslambda.Function):
+    """:class:`troposphere.awslambda.Function` with the properties and
+    memory sizes lambda gained after the troposphere releases we
+    support."""
+
+    props = dict(
+        awslambda.Function.props,
+        Architectures=([basestring], False),
+        EphemeralStorage=(EphemeralStorage, False),
+        Layers=([basestring], False),
+        MemorySize=(validate_memory_size, False),
+    )
+
+
+STREAM_SOURCES = ("kinesis", "dynamodb")
+QUEUE_SOURCES = ("sqs",)
+# Settings only streams support.
+STREAM_SETTINGS = (
+    "BisectBatchOnFunctionError",
+    "MaximumRecordAgeInSeconds",
+    "MaximumRetryAttempts",
+    "ParallelizationFactor",
+    "StartingPosition",
+    "TumblingWindowInSeconds",
+)
+# The inclusive range of the numeric settings, per source type.
+EVENT_SOURCE_MAPPING_RANGES = {
+    "BatchSize": {"stream": (1, 10000), "queue": (1, 10000)},
+    "MaximumBatchingWindowInSeconds": {"stream": (0, 300),
+                                       "queue": (0, 300)},
+    "MaximumRecordAgeInSeconds": {"stream": (-1, 604800)},
+    "MaximumRetryAttempts": {"stream": (-1, 10000)},
+    "ParallelizationFactor": {"stream": (1, 10)},
+    "TumblingWindowInSeconds": {"stream": (0, 900)},
+}
+# SQS only waits for more than 10 messages with a batching window.
+MAX_UNBATCHED_QUEUE_BATCH_SIZE = 10
+
+LATEST = "$LATEST"
+
+# The service linked role Application Auto Scaling uses for lambda.
+CONCURRENCY_SCALING_ROLE = (
+    "arn:${AWS::Partition}:iam::${AWS::AccountId}:role/aws-service-role/"
+    "lambda.application-autoscaling.amazonaws.com/"
+    "AWSServiceRoleForApplicationAutoScaling_LambdaConcurrency"
+)
+
+CONCURRENCY_SCALING_DEFAULTS = {
+    "min": 1,
+    "target": 0.7,
+    "scale-in-cooldown": 60,
+    "scale-out-cooldown": 60,
+}
+
 
 def get_stream_action_type(stream_arn):
     """Returns the awacs Action for a stream type given an arn
@@ -49,8 +211,8 @@ def get_stream_action_type(stream_arn):
     """
 
     stream_type_map = {
-        "kinesis": awacs.kinesis.Action,
-        "dynamodb": awacs.dynamodb.Action,
+        "kinesis": awacs_kinesis.Action,
+        "dynamodb": awacs_dynamodb.Action,
     }
 
     stream_type = stream_arn.split(":")[2]
@@ -99,6 +261,178 @@ def stream_reader_statements(stream_arn):
     ]
 
 
+def queue_reader_statements(queue_arn):
+    """Returns statements to allow Lambda to consume an SQS queue.
+
+    Arg:
+        queue_arn (str): An SQS queue arn.
+
+    Returns:
+        list: A list of statements.
+    """
+    return [
+        Statement(
+            Effect=Allow,
+            Resource=[queue_arn],
+            Action=[
+                awacs_sqs.ReceiveMessage,
+                awacs_sqs.DeleteMessage,
+                awacs_sqs.GetQueueAttributes,
+            ]
+        ),
+    ]
+
+
+def get_event_source_type(event_source_arn):
+    """Returns the service of an event source arn, ie: kinesis, dynamodb or
+    sqs.
+
+    Raises:
+        ValueError: If the arn isn't one of a supported event source.
+    """
+    parts = event_source_arn.split(":") \
+        if isinstance(event_source_arn, basestring) else []
+    if len(parts) < 6 or parts[2] not in STREAM_SOURCES + QUEUE_SOURCES:
+        raise ValueError("Invalid event source arn %r, expected a kinesis "
+                         "stream, dynamodb stream or sqs queue arn." %
+                         (event_source_arn,))
+    return parts[2]
+
+
+def validate_event_source_mapping(mapping):
+    """Checks the throughput settings of an event source mapping against
+    the type of its source.
+
+    Args:
+        mapping (dict): The properties of the EventSourceMapping, without
+            FunctionName.
+
+    Raises:
+        ValueError: If a setting is unknown, out of range, or not supported
+            by the type of source.
+    """
+    unknown = set(mapping) - set(EventSourceMapping.props)
+    if unknown:
+        raise ValueError("Unknown EventSourceMapping properties: %s" %
+                         ", ".join(sorted(unknown)))
+    source_type = get_event_source_type(mapping.get("EventSourceArn"))
+    kind = "queue" if source_type in QUEUE_SOURCES else "stream"
+    if kind == "queue":
+        invalid = sorted(set(mapping) & set(STREAM_SETTINGS))
+        if invalid:
+            raise ValueError("%s only apply to stream event sources." %
+                             ", ".join(invalid))
+        batch_size = mapping.get("BatchSize", 0)
+        if batch_size > MAX_UNBATCHED_QUEUE_BATCH_SIZE and \
+                not mapping.get("MaximumBatchingWindowInSeconds"):
+            raise ValueError("SQS event sources need a "
+                             "MaximumBatchingWindowInSeconds for a BatchSize "
+                             "over %d." % MAX_UNBATCHED_QUEUE_BATCH_SIZE)
+    elif "StartingPosition" not in mapping:
+        raise ValueError("Stream event sources need a StartingPosition.")
+    for name, ranges in EVENT_SOURCE_MAPPING_RANGES.items():
+        if name not in mapping:
+            continue
+        low, high = ranges[kind]
+        if not low <= mapping[name] <= high:
+            raise ValueError("%s must be between %d and %d for %s event "
+                             "sources, not %s." % (name, low, high,
+                                                   source_type,
+                                                   mapping[name]))
+    response_types = mapping.get("FunctionResponseTypes", [])
+    if set(response_types) - set(["ReportBatchItemFailures"]):
+        raise ValueError("FunctionResponseTypes only supports "
+                         "ReportBatchItemFailures.")
+
+
+def validate_event_source_mappings(mappings):
+    for name, mapping in mappings.items():
+        if not name.isalnum():
+            raise ValueError("EventSourceMappings names must be "
+                             "alphanumeric, not %r." % name)
+        validate_event_source_mapping(mapping)
+    return mappings
+
+
+def create_invoke_permissions(template, rule, function_arns):
+    """Allows a CloudWatch event rule to invoke lambda functions.
+
+    Args:
+        template (:class:`troposphere.Template`): The template to add the
+            permissions to.
+        rule (:class:`troposphere.events.Rule`): The rule invoking the
+            functions.
+        function_arns (dict): The Arn of each function, by a CloudFormation
+            safe name used in the title of its permission.
+    """
+    for target_id, function_arn in sorted(function_arns.items()):
+        template.add_resource(
+            awslambda.Permission(
+                "PermToInvokeFunctionFor{}".format(target_id),
+                Principal="events.amazonaws.com",
+                Action="lambda:InvokeFunction",
+                FunctionName=function_arn,
+                SourceArn=rule.GetAtt("Arn")
+            )
+        )
+
+
+def validate_reserved_concurrency(value):
+    if value < -1:
+        raise ValueError("ReservedConcurrency must be -1 (unreserved) or "
+                         "more, not %d." % value)
+    return value
+
+
+def validate_concurrency_scaling(config):
+    """Validates the ProvisionedConcurrencyScaling variable, and fills in
+    its defaults."""
+    if not config:
+        return config
+    unknown = set(config) - set(CONCURRENCY_SCALING_DEFAULTS) - set(["max"])
+    if unknown:
+        raise ValueError("Unknown ProvisionedConcurrencyScaling keys: %s" %
+                         ", ".join(sorted(unknown)))
+    if "max" not in config:
+        raise ValueError("ProvisionedConcurrencyScaling needs a max.")
+    validated = dict(CONCURRENCY_SCALING_DEFAULTS)
+    validated.update(config)
+    if not 1 <= validated["min"] <= validated["max"]:
+        raise ValueError("ProvisionedConcurrencyScaling needs 1 <= min <= "
+                         "max, not %(min)s and %(max)s." % validated)
+    if not 0 < validated["target"] < 1:
+        raise ValueError("The ProvisionedConcurrencyScaling target is the "
+                         "fraction of provisioned concurrency in use, "
+                         "between 0 and 1, not %s." % validated["target"])
+    for cooldown in ("scale-in-cooldown", "scale-out-cooldown"):
+        if validated[cooldown] < 0:
+            raise ValueError("The ProvisionedConcurrencyScaling %s can't be "
+                             "negative." % cooldown)
+    return validated
+
+
+def validate_ephemeral_storage(value):
+    if not MIN_EPHEMERAL_STORAGE <= value <= MAX_EPHEMERAL_STORAGE:
+        raise ValueError("EphemeralStorage must be between %d and %d MB, "
+                         "not %d." % (MIN_EPHEMERAL_STORAGE,
+                                      MAX_EPHEMERAL_STORAGE, value))
+    return value
+
+
+def validate_vcpus(value):
+    value = float(value)
+    if not 0 <= value <= MAX_VCPUS:
+        raise ValueError("Lambda functions get at most %d vCPUs, not %s." %
+                         (MAX_VCPUS, value))
+    return value
+
+
+def validate_provisioned_concurrency(value):
+    if value < 0:
+        raise ValueError("ProvisionedConcurrency can't be negative.")
+    return value
+
+
 class Function(Blueprint):
     VARIABLES = {
         "Code": {
@@ -142,8 +476,44 @@ class Function(Blueprint):
         "MemorySize": {
             "type": int,
             "description": "The amount of memory, in MB, that is allocated "
-                           "to your Lambda function. Default: 128",
+                           "to your Lambda function, between 128 and "
+                           "10240. CPU is allocated in proportion, a full "
+                           "vCPU at 1769 MB. Default: 128",
             "default": 128,
+            "validator": validate_memory_size,
+        },
+        "Vcpus": {
+            "type": float,
+            "description": "The vCPUs the function needs, up to 6. Checks "
+                           "that MemorySize is large enough for lambda to "
+                           "allocate them. Default: 0, no check.",
+            "default": 0.0,
+            "validator": validate_vcpus,
+        },
+        "Architecture": {
+            "type": str,
+            "description": "The instruction set of the function, x86_64 "
+                           "or arm64. arm64 is usually cheaper for the "
+                           "same performance, but needs a recent runtime "
+                           "and arm64 builds of native dependencies. "
+                           "Default: x86_64",
+            "default": "x86_64",
+            "allowed_values": ARCHITECTURES,
+        },
+        "EphemeralStorage": {
+            "type": int,
+            "description": "The size of /tmp, in MB, between 512 and "
+                           "10240. Default: 512",
+            "default": MIN_EPHEMERAL_STORAGE,
+            "validator": validate_ephemeral_storage,
+        },
+        "Layers": {
+            "type": list,
+            "description": "The Arns of up to 5 layer versions to add to "
+                           "the function, ie: the LayerVersionArn output "
+                           "of a stacker_blueprints.aws_lambda.Layer stack "
+                           "sharing dependencies between functions.",
+            "default": [],
         },
         "Runtime": {
             "type": str,
@@ -190,6 +560,72 @@ class Function(Blueprint):
             "description": "An optional event source mapping config.",
             "default": {},
         },
+        "EventSourceMappings": {
+            "type": dict,
+            "description": "Event source mapping configs, by a name used "
+                           "in the logical ID of each mapping. Besides the "
+                           "EventSourceArn, kinesis and dynamodb streams "
+                           "take StartingPosition, BatchSize, "
+                           "MaximumBatchingWindowInSeconds, "
+                           "ParallelizationFactor, "
+                           "BisectBatchOnFunctionError, "
+                           "TumblingWindowInSeconds, MaximumRetryAttempts, "
+                           "MaximumRecordAgeInSeconds and "
+                           "FunctionResponseTypes, and sqs queues take "
+                           "BatchSize and MaximumBatchingWindowInSeconds. "
+                           "The function's role is allowed to read them.",
+            "default": {},
+            "validator": validate_event_source_mappings,
+        },
+        "ReservedConcurrency": {
+            "type": int,
+            "description": "The number of concurrent executions reserved "
+                           "for the function, which is also the most it "
+                           "can run at once. 0 throttles every invocation. "
+                           "Default: -1, no reservation.",
+            "default": -1,
+            "validator": validate_reserved_concurrency,
+        },
+        "ProvisionedConcurrency": {
+            "type": int,
+            "description": "The number of execution environments kept "
+                           "initialized for the alias, or the latest "
+                           "version if there is no alias, so invocations "
+                           "avoid cold starts. An alias of $LATEST is "
+                           "pointed at the latest version instead, since "
+                           "$LATEST can't have provisioned concurrency. "
+                           "Default: 0, none.",
+            "default": 0,
+            "validator": validate_provisioned_concurrency,
+        },
+        "ProvisionedConcurrencyScaling": {
+            "type": dict,
+            "description": "Scales the provisioned concurrency of the "
+                           "alias with Application Auto Scaling, tracking "
+                           "LambdaProvisionedConcurrencyUtilization. Keys "
+                           "are min (default: 1), max, target (the "
+                           "fraction of provisioned concurrency in use, "
+                           "default: 0.7), scale-in-cooldown and "
+                           "scale-out-cooldown (in seconds, default: 60). "
+                           "Needs an AliasName. The alias starts at "
+                           "ProvisionedConcurrency, or min if unset.",
+            "default": {},
+            "validator": validate_concurrency_scaling,
+        },
+        "WarmerSchedule": {
+            "type": str,
+            "description": "An optional schedule expression, ie: "
+                           "rate(5 minutes), for a CloudWatch event rule "
+                           "invoking the alias, or the function, to keep "
+                           "an execution environment warm.",
+            "default": "",
+        },
+        "WarmerInput": {
+            "type": dict,
+            "description": "The event sent by the warmer, so the function "
+                           "can tell warmup invocations apart.",
+            "default": {"warmer": True},
+        },
     }
 
     def code(self):
@@ -266,9 +702,9 @@ class Function(Blueprint):
             iam.PolicyType(
                 "Policy",
                 PolicyName=Sub("${AWS::StackName}-policy"),
-                PolicyDocument=Policy(
+                PolicyDocument=compact_policy(Policy(
                     Statement=self.generate_policy_statements()
-                ),
+                )),
                 Roles=[self.role.Ref()],
             )
         )
@@ -314,7 +750,7 @@ class Function(Blueprint):
         variables = self.get_variables()
 
         self.function = t.add_resource(
-            awslambda.Function(
+            LambdaFunction(
                 "Function",
                 Code=self.code(),
                 DeadLetterConfig=self.dead_letter_config(),
@@ -337,12 +773,51 @@ class Function(Blueprint):
             Output("FunctionArn", Value=self.function.GetAtt("Arn"))
         )
 
+        self.set_runtime_settings()
+
+        reserved = variables["ReservedConcurrency"]
+        if reserved >= 0:
+            self.function.ReservedConcurrentExecutions = reserved
+            t.add_output(
+                Output("ReservedConcurrency", Value=str(reserved))
+            )
+
+        alias_name = variables["AliasName"]
+        provisioned = variables["ProvisionedConcurrency"]
+        scaling = variables["ProvisionedConcurrencyScaling"]
+        if scaling:
+            if not alias_name:
+                raise ValueError("ProvisionedConcurrencyScaling needs an "
+                                 "AliasName.")
+            provisioned = provisioned or scaling["min"]
+            if not scaling["min"] <= provisioned <= scaling["max"]:
+                raise ValueError(
+                    "ProvisionedConcurrency (%d) must be between the "
+                    "ProvisionedConcurrencyScaling min and max." %
+                    provisioned)
+        highest = scaling["max"] if scaling else provisioned
+        if highest and 0 <= reserved < highest:
+            raise ValueError(
+                "Provisioned concurrency (%d) can't be more than "
+                "ReservedConcurrency (%d)." % (highest, reserved))
+        provisioned_config = None
+        if provisioned:
+            provisioned_config = ProvisionedConcurrencyConfiguration(
+                ProvisionedConcurrentExecutions=provisioned,
+            )
+            t.add_output(
+                Output("ProvisionedConcurrency", Value=str(provisioned))
+            )
+
         self.function_version = t.add_resource(
-            awslambda.Version(
+            Version(
                 "LatestVersion",
                 FunctionName=self.function.Ref()
             )
         )
+        if provisioned_config and not alias_name:
+            self.function_version.ProvisionedConcurrencyConfig = \
+                provisioned_config
 
         t.add_output(
             Output("LatestVersion",
@@ -353,45 +828,176 @@ class Function(Blueprint):
                    Value=self.function_version.Ref())
         )
 
-        alias_name = variables["AliasName"]
+        self.alias = None
         if alias_name:
+            alias_version = variables["AliasVersion"] or LATEST
+            if provisioned and alias_version == LATEST:
+                alias_version = self.function_version.GetAtt("Version")
             self.alias = t.add_resource(
-                awslambda.Alias(
+                Alias(
                     "Alias",
                     Name=alias_name,
                     FunctionName=self.function.Ref(),
-                    FunctionVersion=variables["AliasVersion"] or "$LATEST",
+                    FunctionVersion=alias_version,
                 )
             )
+            if provisioned_config:
+                self.alias.ProvisionedConcurrencyConfig = provisioned_config
 
             t.add_output(Output("AliasArn", Value=self.alias.Ref()))
 
-    def create_event_source_mapping(self):
-        t = self.template
+    def set_runtime_settings(self):
+        """Sets the architecture, ephemeral storage and layers of the
+        function, leaving out the ones with default values."""
         variables = self.get_variables()
-        mapping = variables["EventSourceMapping"]
-        if mapping:
-            if "FunctionName" in mapping:
-                logger.warn(
-                    Sub("FunctionName defined in EventSourceMapping in "
-                        "${AWS::StackName}. Overriding.")
-                )
-            mapping["FunctionName"] = self.function.GetAtt("Arn")
-            resource = t.add_resource(
-                awslambda.EventSourceMapping.from_dict(
-                    "EventSourceMapping", mapping
-                )
+        memory_size = variables["MemorySize"]
+        if get_vcpus(memory_size) < variables["Vcpus"]:
+            raise ValueError(
+                "A MemorySize of %d MB only gets %.2f vCPUs, %d MB are "
+                "needed for %s." % (
+                    memory_size, get_vcpus(memory_size),
+                    get_memory_size(variables["Vcpus"]),
+                    variables["Vcpus"]))
+
+        architecture = variables["Architecture"]
+        if architecture != "x86_64":
+            if variables["Runtime"] in X86_64_ONLY_RUNTIMES:
+                raise ValueError("The %s runtime isn't available on %s." % (
+                    variables["Runtime"], architecture))
+            self.function.Architectures = [architecture]
+
+        if variables["EphemeralStorage"] != MIN_EPHEMERAL_STORAGE:
+            self.function.EphemeralStorage = EphemeralStorage(
+                Size=variables["EphemeralStorage"],
             )
 
-            if not variables["Role"]:
-                self.add_policy_statements(
-                    stream_reader_statements(
-                        mapping["EventSourceArn"]
+        layers = variables["Layers"]
+        if len(layers) > MAX_LAYERS:
+            raise ValueError("Lambda functions can have at most %d layers, "
+                             "not %d." % (MAX_LAYERS, len(layers)))
+        if layers:
+            self.function.Layers = layers
+
+    def create_concurrency_scaling(self):
+        """Scales the provisioned concurrency of the alias."""
+        t = self.template
+        variables = self.get_variables()
+        scaling = variables["ProvisionedConcurrencyScaling"]
+        if not scaling:
+            return
+        target = t.add_resource(
+            aas.ScalableTarget(
+                "ProvisionedConcurrencyScalableTarget",
+                DependsOn=self.alias.title,
+                MinCapacity=scaling["min"],
+                MaxCapacity=scaling["max"],
+                ResourceId=Sub("function:${Function}:%s" %
+                               variables["AliasName"]),
+                RoleARN=Sub(CONCURRENCY_SCALING_ROLE),
+                ScalableDimension="lambda:function:ProvisionedConcurrency",
+                ServiceNamespace="lambda",
+            )
+        )
+        policy = t.add_resource(
+            aas.ScalingPolicy(
+                "ProvisionedConcurrencyScalingPolicy",
+                PolicyName=Sub("${AWS::StackName}-provisioned-concurrency"),
+                PolicyType="TargetTrackingScaling",
+                ScalingTargetId=target.Ref(),
+                TargetTrackingScalingPolicyConfiguration=(
+                    aas.TargetTrackingScalingPolicyConfiguration(
+                        TargetValue=float(scaling["target"]),
+                        ScaleInCooldown=scaling["scale-in-cooldown"],
+                        ScaleOutCooldown=scaling["scale-out-cooldown"],
+                        PredefinedMetricSpecification=(
+                            aas.PredefinedMetricSpecification(
+                                PredefinedMetricType=(
+                                    "LambdaProvisionedConcurrencyUtilization"
+                                ),
+                            )
+                        ),
                     )
-                )
+                ),
+            )
+        )
+        t.add_output(
+            Output("ProvisionedConcurrencyScalableTargetId",
+                   Value=target.Ref())
+        )
+        t.add_output(
+            Output("ProvisionedConcurrencyScalingPolicyArn",
+                   Value=policy.Ref())
+        )
+        t.add_output(
+            Output("ProvisionedConcurrencyMin", Value=str(scaling["min"]))
+        )
+        t.add_output(
+            Output("ProvisionedConcurrencyMax", Value=str(scaling["max"]))
+        )
 
-            t.add_output(
-                Output("EventSourceMappingId", Value=resource.Ref())
+    def create_warmer(self):
+        """Invokes the alias, or the function, on the WarmerSchedule."""
+        t = self.template
+        variables = self.get_variables()
+        schedule = variables["WarmerSchedule"]
+        if not schedule:
+            return
+        if self.alias:
+            function_arn = self.alias.Ref()
+        else:
+            function_arn = self.function.GetAtt("Arn")
+        rule = t.add_resource(
+            events.Rule(
+                "WarmerRule",
+                Description="Keeps the function warm.",
+                ScheduleExpression=schedule,
+                State="ENABLED",
+                Targets=[
+                    events.Target(
+                        Id="Warmer",
+                        Arn=function_arn,
+                        Input=json.dumps(variables["WarmerInput"],
+                                         sort_keys=True),
+                    ),
+                ],
+            )
+        )
+        create_invoke_permissions(t, rule, {"Warmer": function_arn})
+        t.add_output(Output("WarmerRuleArn", Value=rule.GetAtt("Arn")))
+
+    def add_event_source_mapping(self, title, mapping):
+        t = self.template
+        if "FunctionName" in mapping:
+            logger.warn(
+                Sub("FunctionName defined in EventSourceMapping in "
+                    "${AWS::StackName}. Overriding.")
+            )
+        mapping = dict(mapping, FunctionName=self.function.GetAtt("Arn"))
+        resource = t.add_resource(
+            EventSourceMapping.from_dict(title, mapping)
+        )
+
+        if not self.get_variables()["Role"]:
+            event_source_arn = mapping["EventSourceArn"]
+            if get_event_source_type(event_source_arn) in QUEUE_SOURCES:
+                statements = queue_reader_statements(event_source_arn)
+            else:
+                statements = stream_reader_statements(event_source_arn)
+            self.add_policy_statements(statements)
+
+        t.add_output(
+            Output("%sId" % title, Value=resource.Ref())
+        )
+
+    def create_event_source_mapping(self):
+        variables = self.get_variables()
+        mapping = variables["EventSourceMapping"]
+        if mapping:
+            self.add_event_source_mapping("EventSourceMapping", mapping)
+        mappings = variables["EventSourceMappings"]
+        for name in sorted(mappings):
+            self.add_event_source_mapping(
+                "%sEventSourceMapping" % name, mappings[name]
             )
 
     def create_template(self):
@@ -406,6 +1012,8 @@ class Function(Blueprint):
         if not role_arn:
             self.create_role()
         self.create_function()
+        self.create_concurrency_scaling()
+        self.create_warmer()
         self.create_event_source_mapping()
         # We don't use self.role_arn here because it is set internally if a
         # role is created
@@ -413,6 +1021,109 @@ class Function(Blueprint):
             self.create_policy()
 
 
+class Layer(Blueprint):
+    """Publishes a layer version, ie: of dependencies shared by several
+    functions.
+
+    The content is uploaded by the stacker aws_lambda hook, which zips a
+    directory. For python, the packages go in a python directory::
+
+      pre_build:
+        - path: stacker.hooks.aws_lambda.upload_lambda_functions
+          data_key: lambda
+          args:
+            bucket: my-lambda-bucket
+            functions:
+              dependencies:
+                path: ./layers/dependencies
+
+      stacks:
+        - name: dependencies-layer
+          class_path: stacker_blueprints.aws_lambda.Layer
+          variables:
+            Code: ${hook_data lambda::dependencies}
+            CompatibleRuntimes:
+              - python3.9
+            CompatibleArchitectures:
+              - arm64
+
+        - name: my-function
+          class_path: stacker_blueprints.aws_lambda.Function
+          variables:
+            Layers:
+              - ${output dependencies-layer::LayerVersionArn}
+    """
+
+    VARIABLES = {
+        "Code": {
+            "type": awslambda.Code,
+            "description": "The troposphere.awslambda.Code object "
+                           "returned by the aws lambda hook.",
+        },
+        "LayerName": {
+            "type": str,
+            "description": "The name of the layer. Default: the name of "
+                           "the stack.",
+            "default": "",
+        },
+        "Description": {
+            "type": str,
+            "description": "Description of the layer version.",
+            "default": "",
+        },
+        "CompatibleRuntimes": {
+            "type": list,
+            "description": "The runtimes the layer works with.",
+            "default": [],
+        },
+        "CompatibleArchitectures": {
+            "type": list,
+            "description": "The architectures the layer works with, "
+                           "x86_64 and/or arm64.",
+            "default": [],
+        },
+        "LicenseInfo": {
+            "type": str,
+            "description": "The license of the layer.",
+            "default": "",
+        },
+    }
+
+    def create_layer(self):
+        t = self.template
+        variables = self.get_variables()
+        code = variables["Code"]
+        if not hasattr(code, "S3Key"):
+            raise ValueError("Layers must be uploaded to S3, not inlined "
+                             "with ZipFile.")
+        architectures = variables["CompatibleArchitectures"]
+        unknown = set(architectures) - set(ARCHITECTURES)
+        if unknown:
+            raise ValueError("Unknown CompatibleArchitectures: %s" %
+                             ", ".join(sorted(unknown)))
+
+        layer = t.add_resource(
+            LayerVersion(
+                "LayerVersion",
+                Content=Content(
+                    S3Bucket=code.S3Bucket,
+                    S3Key=code.S3Key,
+                    S3ObjectVersion=getattr(code, "S3ObjectVersion", NoValue),
+                ),
+                LayerName=variables["LayerName"] or Ref("AWS::StackName"),
+                Description=variables["Description"] or NoValue,
+                CompatibleRuntimes=variables["CompatibleRuntimes"] or NoValue,
+                CompatibleArchitectures=architectures or NoValue,
+                LicenseInfo=variables["LicenseInfo"] or NoValue,
+            )
+        )
+
+        t.add_output(Output("LayerVersionArn", Value=layer.Ref()))
+
+    def create_template(self):
+        self.create_layer()
+
+
 class FunctionScheduler(Blueprint):
 
     VARIABLES = {
@@ -437,16 +1148,7 @@ class FunctionScheduler(Blueprint):
         rule = self.template.add_resource(troposphere_events_rule)
 
         # allow cloudwatch to invoke on any of the given lambda targets.
-        for event_rule_target_id, aws_lambda_arn in aws_lambda_arns.items():
-            self.template.add_resource(
-                awslambda.Permission(
-                    "PermToInvokeFunctionFor{}".format(event_rule_target_id),
-                    Principal="events.amazonaws.com",
-                    Action="lambda:InvokeFunction",
-                    FunctionName=aws_lambda_arn,
-                    SourceArn=rule.GetAtt("Arn")
-                )
-            )
+        create_invoke_permissions(self.template, rule, aws_lambda_arns)
 
     def create_template(self):
         self.create_scheduler()
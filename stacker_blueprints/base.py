@@ -0,0 +1,135 @@
+import hashlib
+import json
+
+from stacker.blueprints import base
+
+from .serialization import (
+    dumps_template,
+    minify_from_environment,
+    write_template,
+)
+from .template_budget import BudgetThresholds, get_template_budget
+from .template_cache import TemplateCache, get_cache_key
+
+
+class Blueprint(base.Blueprint):
+    """Base class for the blueprints in this package.
+
+    Stacker rebuilds the CloudFormation parameter definitions from a deep
+    copy of `VARIABLES` every time they are asked for, which happens several
+    times per stack while rendering and building. Since they only depend on
+    the variables a blueprint defines, they are computed once here and
+    reused until :meth:`resolve_variables` runs again.
+
+    The resolved variables returned by :meth:`get_variables` are already
+    stored on the blueprint by stacker, so methods can call it as often as
+    they need to.
+
+    Rendered templates can also be minified, see
+    :mod:`stacker_blueprints.serialization`, cached on disk between runs,
+    see :mod:`stacker_blueprints.template_cache`, and checked against the
+    CloudFormation limits, see :mod:`stacker_blueprints.template_budget`.
+    """
+
+    _parameter_definitions = None
+    _cached_template = None
+
+    def resolve_variables(self, provided_variables):
+        self._parameter_definitions = None
+        super(Blueprint, self).resolve_variables(provided_variables)
+
+    def get_parameter_definitions(self):
+        """Get the parameter definitions to submit to CloudFormation.
+
+        Same as the stacker implementation, except that the returned
+        dictionary is shared between calls, and must not be modified.
+        """
+        if self._parameter_definitions is None:
+            self._parameter_definitions = super(
+                Blueprint, self
+            ).get_parameter_definitions()
+        return self._parameter_definitions
+
+    def get_template_cache_data(self):
+        """Returns what the rendered template depends on, besides the code
+        of the blueprint, to key it in the template cache.
+
+        Blueprints that read files or any other outside state while
+        rendering need to add it here.
+        """
+        return {
+            "name": self.name,
+            "namespace": self.context.namespace,
+            "indent": self.context.template_indent,
+            "minify": minify_from_environment(),
+            "description": self.description,
+            "mappings": self.mappings,
+            "variables": self.get_variables(),
+        }
+
+    def render_template(self):
+        """Render the Blueprint to a CloudFormation template.
+
+        When the template cache is enabled, a template rendered from the
+        same blueprint and variables is returned without building it again.
+        When `STACKER_BLUEPRINTS_MINIFY_TEMPLATES` is set, the template is
+        rendered without whitespace.
+
+        Raises:
+            ValueError: If budget thresholds are configured, and the
+                template goes over the fail threshold.
+        """
+        self._cached_template = None
+        thresholds = BudgetThresholds.from_environment()
+        cache = TemplateCache.from_environment()
+        key = None
+        if cache:
+            key = get_cache_key(type(self), self.get_template_cache_data())
+        if key:
+            rendered = cache.get(key)
+            if rendered is not None:
+                self._cached_template = rendered
+                if thresholds:
+                    thresholds.check(get_template_budget(self.name, rendered))
+                version = hashlib.md5(rendered.encode()).hexdigest()[:8]
+                return (version, rendered)
+
+        if minify_from_environment():
+            self.build_template()
+            rendered = dumps_template(self.template)
+            version = hashlib.md5(rendered.encode()).hexdigest()[:8]
+        else:
+            version, rendered = super(Blueprint, self).render_template()
+        # Checked before caching, so a template over budget fails every run.
+        if thresholds:
+            thresholds.check(get_template_budget(self.name, rendered))
+        if key:
+            cache.set(key, rendered)
+        return (version, rendered)
+
+    def build_template(self):
+        """Builds the troposphere template, as stacker does before
+        serializing it."""
+        self.import_mappings()
+        self.create_template()
+        if self.description:
+            self.set_template_description(self.description)
+        self.setup_parameters()
+
+    def write_template(self, fp):
+        """Builds the template and streams its minified JSON to a file,
+        bypassing the template cache and budget.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        self.build_template()
+        return write_template(self.template, fp)
+
+    @property
+    def requires_change_set(self):
+        """Same as the stacker implementation, except that it also works for
+        templates read from the cache, which are never built."""
+        if self._cached_template is not None:
+            return "Transform" in json.loads(self._cached_template)
+        return super(Blueprint, self).requires_change_set
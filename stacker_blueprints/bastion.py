@@ -10,7 +10,7 @@
 from troposphere import Ref, ec2, autoscaling, FindInMap, Output
 from troposphere.autoscaling import Tag as ASTag
 
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 from stacker.blueprints.variables.types import (
     CFNCommaDelimitedList,
     CFNNumber,
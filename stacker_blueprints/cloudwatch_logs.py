@@ -1,4 +1,4 @@
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 from stacker.blueprints.variables.types import TroposphereType
 
 from troposphere import logs, Output, Ref
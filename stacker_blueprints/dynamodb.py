@@ -1,4 +1,7 @@
-from stacker.blueprints.base import Blueprint
+import hashlib
+from collections import namedtuple
+
+from .sharding import ShardedBlueprint
 from stacker.blueprints.variables.types import TroposphereType
 
 from troposphere import (
@@ -7,13 +10,16 @@ from troposphere import (
     dynamodb,
     Ref,
     GetAtt,
+    NoValue,
     Output,
     Sub,
 )
 
 from .policies import (
+    dax_dynamodb_policy,
     dynamodb_autoscaling_policy,
 )
+from .util import lazy_import
 
 
 # TODO: Factor out the below two functions, once this PR is merged:
@@ -36,6 +42,13 @@ def get_application_autoscaling_assumerole_policy(region=''):
 # end of TODO.
 
 
+dax = lazy_import("troposphere.dax")
+
+PROVISIONED = "PROVISIONED"
+PAY_PER_REQUEST = "PAY_PER_REQUEST"
+BILLING_MODES = (PROVISIONED, PAY_PER_REQUEST)
+
+
 def snake_to_camel_case(name):
     """
     Accept a snake_case string and return a CamelCase string.
@@ -47,9 +60,60 @@ def snake_to_camel_case(name):
     return "".join(word.capitalize() for word in name.split("_"))
 
 
-class DynamoDB(Blueprint):
+class GlobalSecondaryIndex(dynamodb.GlobalSecondaryIndex):
+    """:class:`troposphere.dynamodb.GlobalSecondaryIndex` without
+    provisioned throughput for on-demand tables, which the troposphere
+    releases we support require."""
+
+    props = dict(
+        dynamodb.GlobalSecondaryIndex.props,
+        ProvisionedThroughput=(dynamodb.ProvisionedThroughput, False),
+    )
+
+
+class Table(dynamodb.Table):
+    """:class:`troposphere.dynamodb.Table` with a BillingMode, which the
+    troposphere releases we support predate.
+
+    PROVISIONED tables, the default, need the ProvisionedThroughput of the
+    table and of its global secondary indexes. PAY_PER_REQUEST (on-demand)
+    tables can't have any.
+    """
+
+    props = dict(
+        dynamodb.Table.props,
+        BillingMode=(basestring, False),
+        GlobalSecondaryIndexes=([GlobalSecondaryIndex], False),
+        ProvisionedThroughput=(dynamodb.ProvisionedThroughput, False),
+    )
+
+    def validate(self):
+        billing_mode = self.properties.get("BillingMode", PROVISIONED)
+        if billing_mode not in BILLING_MODES:
+            raise ValueError("The BillingMode of table %s must be one of "
+                             "%s." % (self.title, ", ".join(BILLING_MODES)))
+        provisioned = billing_mode == PROVISIONED
+        indexes = self.properties.get("GlobalSecondaryIndexes", [])
+        for name, resource in [(self.title, self)] + [
+                ("%s index %s" % (self.title, index.IndexName), index)
+                for index in indexes]:
+            has_throughput = "ProvisionedThroughput" in resource.properties
+            if provisioned and not has_throughput:
+                raise ValueError("%s needs a ProvisionedThroughput, or a "
+                                 "BillingMode of %s." % (name,
+                                                         PAY_PER_REQUEST))
+            if not provisioned and has_throughput:
+                raise ValueError("%s can't have a ProvisionedThroughput with "
+                                 "a BillingMode of %s." % (name,
+                                                           PAY_PER_REQUEST))
+
+
+class DynamoDB(ShardedBlueprint):
     """Manages the creation of DynamoDB tables.
 
+    The tables can be split across several stacks, see
+    :mod:`stacker_blueprints.sharding`.
+
     Example::
 
       - name: users
@@ -73,20 +137,64 @@ class DynamoDB(Blueprint):
                 WriteCapacityUnits: 5
               StreamSpecification:
                 StreamViewType: ALL
+            EventTable:
+              BillingMode: PAY_PER_REQUEST
+              KeySchema:
+                - AttributeName: id
+                  KeyType: HASH
+              AttributeDefinitions:
+                - AttributeName: id
+                  AttributeType: S
+          DaxCluster:
+            NodeType: dax.r5.large
+            ReplicationFactor: 3
+            SubnetIds:
+              - subnet-12345678
+              - subnet-23456789
+            SecurityGroupIds:
+              - sg-12345678
+            Parameters:
+              record-ttl-millis: 60000
+
+    Tables are provisioned, unless their BillingMode is PAY_PER_REQUEST.
 
     """
 
     VARIABLES = {
         "Tables": {
-            "type": TroposphereType(dynamodb.Table, many=True),
+            "type": TroposphereType(Table, many=True),
             "description": "DynamoDB tables to create.",
-        }
+        },
+        "DaxCluster": {
+            "type": dict,
+            "description": "An optional DAX cluster caching the tables. "
+                           "Keys are NodeType, ReplicationFactor (the "
+                           "number of nodes, default: 3), SubnetIds, "
+                           "SecurityGroupIds, Parameters (ie: "
+                           "query-ttl-millis and record-ttl-millis), "
+                           "SSEEnabled (default: true), ClusterName and "
+                           "PreferredMaintenanceWindow.",
+            "default": {},
+        },
     }
 
+    DAX_KEYS = frozenset([
+        "NodeType", "ReplicationFactor", "SubnetIds", "SecurityGroupIds",
+        "Parameters", "SSEEnabled", "ClusterName",
+        "PreferredMaintenanceWindow",
+    ])
+
     def create_template(self):
         t = self.template
         variables = self.get_variables()
-        for table in variables["Tables"]:
+        tables = self.get_shard_items(
+            variables["Tables"], lambda table: table.title,
+            # The Name output, and the StreamArn one of streamed tables.
+            resources_per_item=1,
+            outputs_per_item=lambda table: (
+                2 if "StreamSpecification" in table.properties else 1),
+        )
+        for table in tables:
             t.add_resource(table)
             stream_enabled = table.properties.get("StreamSpecification")
             if stream_enabled:
@@ -94,9 +202,360 @@ class DynamoDB(Blueprint):
                                     Value=GetAtt(table, "StreamArn")))
             t.add_output(Output("{}Name".format(table.title),
                                 Value=Ref(table)))
+        if variables["DaxCluster"]:
+            self.create_dax_cluster(tables)
+        self.export_outputs()
+
+    def create_dax_cluster(self, tables):
+        """Creates a DAX cluster, with its subnet group, parameter group and
+        role, able to read and write the tables."""
+        t = self.template
+        variables = self.get_variables()
+        config = variables["DaxCluster"]
+        unknown = set(config) - self.DAX_KEYS
+        if unknown:
+            raise ValueError("Unknown DaxCluster keys: %s" %
+                             ", ".join(sorted(unknown)))
+        for key in ("NodeType", "SubnetIds"):
+            if not config.get(key):
+                raise ValueError("DaxCluster needs %s." % key)
+        if variables["ShardCount"] > 1:
+            raise ValueError("A DaxCluster can't be split across shards, "
+                             "create it in an unsharded stack.")
+
+        role = t.add_resource(
+            iam.Role(
+                "DaxRole",
+                AssumeRolePolicyDocument=make_simple_assume_policy(
+                    "dax.amazonaws.com"
+                ),
+                Policies=[
+                    iam.Policy(
+                        PolicyName=Sub("${AWS::StackName}-dax"),
+                        PolicyDocument=dax_dynamodb_policy(
+                            [GetAtt(table, "Arn") for table in tables]
+                        ),
+                    )
+                ],
+            )
+        )
+        subnet_group = t.add_resource(
+            dax.SubnetGroup(
+                "DaxSubnetGroup",
+                Description=Sub("${AWS::StackName} DAX subnets"),
+                SubnetIds=config["SubnetIds"],
+            )
+        )
+        parameter_group_name = NoValue
+        parameters = config.get("Parameters")
+        if parameters:
+            parameter_group = t.add_resource(
+                dax.ParameterGroup(
+                    "DaxParameterGroup",
+                    Description=Sub("${AWS::StackName} DAX parameters"),
+                    ParameterNameValues=dict(
+                        (name, str(value))
+                        for name, value in parameters.items()
+                    ),
+                )
+            )
+            parameter_group_name = Ref(parameter_group)
+
+        cluster = t.add_resource(
+            dax.Cluster(
+                "DaxCluster",
+                ClusterName=config.get("ClusterName", NoValue),
+                IAMRoleARN=GetAtt(role, "Arn"),
+                NodeType=config["NodeType"],
+                ParameterGroupName=parameter_group_name,
+                PreferredMaintenanceWindow=config.get(
+                    "PreferredMaintenanceWindow", NoValue),
+                ReplicationFactor=str(config.get("ReplicationFactor", 3)),
+                SSESpecification=dax.SSESpecification(
+                    SSEEnabled=config.get("SSEEnabled", True),
+                ),
+                SecurityGroupIds=config.get("SecurityGroupIds", NoValue),
+                SubnetGroupName=Ref(subnet_group),
+            )
+        )
+        t.add_output(Output("DaxClusterName", Value=Ref(cluster)))
+        t.add_output(Output("DaxClusterArn", Value=GetAtt(cluster, "Arn")))
+        t.add_output(
+            Output(
+                "DaxClusterDiscoveryEndpoint",
+                Value=GetAtt(cluster, "ClusterDiscoveryEndpoint"),
+            )
+        )
 
 
-class AutoScaling(Blueprint):
+CAPACITY_TYPES = ("read", "write")
+
+# The scaling of a table or index when neither its config nor its preset
+# say otherwise.
+DEFAULT_SCALING = {
+    "min": 1,
+    "max": 1000,
+    "target": 50.0,
+    "scale-in-cooldown": 60,
+    "scale-out-cooldown": 60,
+}
+
+# Built-in presets, which the Presets variable can extend or override.
+# steady tables scale tightly and slowly give back capacity, bursty ones
+# keep more headroom and scale out as soon as they can.
+SCALING_PRESETS = {
+    "steady": {
+        "min": 5,
+        "target": 70.0,
+        "scale-in-cooldown": 300,
+        "scale-out-cooldown": 60,
+    },
+    "bursty": {
+        "min": 5,
+        "target": 40.0,
+        "scale-in-cooldown": 900,
+        "scale-out-cooldown": 0,
+    },
+}
+
+# The target utilization DynamoDB accepts, in percent.
+MIN_TARGET = 20.0
+MAX_TARGET = 90.0
+
+SCALING_KEYS = frozenset(DEFAULT_SCALING) | frozenset(["scheduled"])
+SCHEDULED_ACTION_KEYS = frozenset(["name", "schedule", "min", "max",
+                                   "start-time", "end-time"])
+INDEX_CONFIG_KEYS = frozenset(["preset"] + list(CAPACITY_TYPES))
+CONFIG_KEYS = INDEX_CONFIG_KEYS | frozenset(["table", "indexes"])
+
+SCHEDULE_PREFIXES = ("at(", "rate(", "cron(")
+
+
+class ScalingTarget(namedtuple("ScalingTarget",
+                               ["table", "index", "capacity_type",
+                                "settings"])):
+    """The scaling of one capacity type of a table or index.
+
+    Attributes:
+        table (str): The name of the table.
+        index (str): The name of the global secondary index, or None for
+            the table itself.
+        capacity_type (str): read or write.
+        settings (dict): The validated scaling settings, with every key of
+            :data:`DEFAULT_SCALING`, and the scheduled actions.
+    """
+
+    __slots__ = ()
+
+
+def check_keys(config, allowed, where):
+    if not isinstance(config, dict):
+        raise ValueError("%s must be a dictionary, not %r." % (
+            where, config))
+    unknown = set(config) - allowed
+    if unknown:
+        raise ValueError("Unknown keys in %s: %s" % (
+            where, ", ".join(sorted(unknown))))
+
+
+def validate_scheduled_actions(actions, where, max_capacity):
+    """Validates the scheduled actions of a capacity type, which change its
+    min and max capacity ahead of known traffic peaks."""
+    if not isinstance(actions, list):
+        raise ValueError("The scheduled actions of %s must be a list." %
+                         where)
+    names = set()
+    for action in actions:
+        check_keys(action, SCHEDULED_ACTION_KEYS,
+                   "a scheduled action of %s" % where)
+        name = action.get("name")
+        if not name or name in names:
+            raise ValueError("The scheduled actions of %s need unique "
+                             "names." % where)
+        names.add(name)
+        schedule = action.get("schedule", "")
+        if not schedule.startswith(SCHEDULE_PREFIXES):
+            raise ValueError("The schedule of %s in %s must be an at(), "
+                             "rate() or cron() expression, not %r." % (
+                                 name, where, schedule))
+        if "min" not in action and "max" not in action:
+            raise ValueError("Scheduled action %s of %s needs a min or a "
+                             "max." % (name, where))
+        if action.get("min", 1) > action.get("max", max_capacity):
+            raise ValueError("Scheduled action %s of %s has a min over its "
+                             "max." % (name, where))
+    return actions
+
+
+def validate_scaling(settings, where):
+    """Validates resolved scaling settings.
+
+    Raises:
+        ValueError: If a value is out of range.
+    """
+    if not 1 <= settings["min"] <= settings["max"]:
+        raise ValueError("%s needs 1 <= min <= max, not %s and %s." % (
+            where, settings["min"], settings["max"]))
+    if not MIN_TARGET <= settings["target"] <= MAX_TARGET:
+        raise ValueError("The target of %s must be between %g and %g "
+                         "percent, not %s." % (where, MIN_TARGET, MAX_TARGET,
+                                               settings["target"]))
+    for cooldown in ("scale-in-cooldown", "scale-out-cooldown"):
+        if settings[cooldown] < 0:
+            raise ValueError("The %s of %s can't be negative." % (cooldown,
+                                                                  where))
+    validate_scheduled_actions(settings["scheduled"], where, settings["max"])
+    return settings
+
+
+def get_preset(name, presets, where):
+    try:
+        preset = presets[name]
+    except KeyError:
+        raise ValueError("Unknown preset %r in %s, expected one of %s." % (
+            name, where, ", ".join(sorted(presets))))
+    check_keys(preset, SCALING_KEYS, "preset %s" % name)
+    return preset
+
+
+def resolve_scaling(config, presets, where, inherited=None):
+    """Returns the settings of each capacity type a table or index config
+    scales.
+
+    Settings come from, in increasing priority: the defaults, the inherited
+    settings of the table (for indexes, without its scheduled actions), the
+    preset, and the ``read`` and ``write`` settings of the config. A
+    capacity type is only scaled if one of the last three sets it.
+
+    Returns:
+        dict: The settings, by capacity type.
+    """
+    inherited = inherited or {}
+    preset = {}
+    if "preset" in config:
+        preset = get_preset(config["preset"], presets, where)
+    resolved = {}
+    for capacity_type in CAPACITY_TYPES:
+        overrides = config.get(capacity_type)
+        if overrides is not None:
+            check_keys(overrides, SCALING_KEYS,
+                       "%s %s" % (where, capacity_type))
+        scaled = overrides is not None or preset or \
+            capacity_type in inherited
+        if not scaled:
+            continue
+        settings = dict(DEFAULT_SCALING)
+        settings.update(inherited.get(capacity_type, {}))
+        # Scheduled actions are tied to the capacity of the table.
+        settings["scheduled"] = []
+        settings.update(preset)
+        settings.update(overrides or {})
+        resolved[capacity_type] = validate_scaling(
+            settings, "%s %s" % (where, capacity_type))
+    return resolved
+
+
+def get_scaling_targets(configs, presets=None):
+    """Validates the AutoScalingConfigs variable.
+
+    Indexes inherit the scaling of their table, except for its scheduled
+    actions, which their own preset, ``read`` and ``write`` override.
+
+    Args:
+        configs (list): The autoscaling config of each table.
+        presets (dict): Presets by name, defaulting to
+            :data:`SCALING_PRESETS`.
+
+    Returns:
+        list: The :class:`ScalingTarget` of each table and index, in order.
+
+    Raises:
+        ValueError: If a config is invalid.
+    """
+    presets = SCALING_PRESETS if presets is None else presets
+    targets = []
+    tables = set()
+    for config in configs:
+        check_keys(config, CONFIG_KEYS, "an autoscaling config")
+        table = config.get("table")
+        if not table:
+            raise ValueError("Autoscaling configs need a table.")
+        if table in tables:
+            raise ValueError("Table %s has more than one autoscaling "
+                             "config." % table)
+        tables.add(table)
+        table_scaling = resolve_scaling(config, presets, "table %s" % table)
+        indexes = config.get("indexes", {})
+        if not table_scaling and not indexes:
+            raise ValueError("The autoscaling config of table %s doesn't "
+                             "scale anything, it needs read, write, a "
+                             "preset or indexes." % table)
+        for capacity_type in CAPACITY_TYPES:
+            if capacity_type in table_scaling:
+                targets.append(ScalingTarget(
+                    table, None, capacity_type,
+                    table_scaling[capacity_type]))
+        if not isinstance(indexes, dict):
+            raise ValueError("The indexes of table %s must be a dictionary "
+                             "of index configs." % table)
+        for index in sorted(indexes):
+            index_config = indexes[index] or {}
+            where = "index %s of table %s" % (index, table)
+            check_keys(index_config, INDEX_CONFIG_KEYS, where)
+            index_scaling = resolve_scaling(index_config, presets, where,
+                                            table_scaling)
+            if not index_scaling:
+                raise ValueError("%s doesn't scale anything." %
+                                 where.capitalize())
+            for capacity_type in CAPACITY_TYPES:
+                if capacity_type in index_scaling:
+                    targets.append(ScalingTarget(
+                        table, index, capacity_type,
+                        index_scaling[capacity_type]))
+    return targets
+
+
+def get_scaling_prefix(table, index=None):
+    """Returns the start of the logical IDs of the scaling resources of a
+    table or index, ie: UserTable or UserTableNameIndex."""
+    prefix = snake_to_camel_case(table)
+    if index:
+        camel_index = snake_to_camel_case(index)
+        if not camel_index.endswith("Index"):
+            camel_index += "Index"
+        prefix += camel_index
+    return prefix
+
+
+def get_scaling_prefixes(targets):
+    """Returns the prefix of the logical IDs of every table and index.
+
+    :func:`snake_to_camel_case` maps several names to the same prefix, ie:
+    user-table, user_table and User_Table. Those prefixes get an md5 of the
+    full name, so every table and index keeps the same logical IDs however
+    the configs are ordered or sharded.
+
+    Returns:
+        dict: The prefixes, by (table, index).
+    """
+    keys = sorted(set((target.table, target.index) for target in targets),
+                  key=lambda key: (key[0], key[1] or ""))
+    by_prefix = {}
+    for key in keys:
+        by_prefix.setdefault(get_scaling_prefix(*key), []).append(key)
+    prefixes = {}
+    for prefix, colliding in by_prefix.items():
+        for key in colliding:
+            if len(colliding) > 1:
+                name = key[0] if key[1] is None else "%s/index/%s" % key
+                prefixes[key] = prefix + hashlib.md5(
+                    name.encode("utf-8")).hexdigest()[:8]
+            else:
+                prefixes[key] = prefix
+    return prefixes
+
+
+class AutoScaling(ShardedBlueprint):
     """Manages the AutoScaling of DynamoDB tables.
 
     Ref: https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-dynamodb-table.html#cfn-dynamodb-table-examples-application-autoscaling # noqa
@@ -106,6 +565,11 @@ class AutoScaling(Blueprint):
       - name: dynamodb-autoscaling
         class_path: stacker_blueprints.dynamodb.AutoScaling
         variables:
+          Presets:
+            reporting:
+              min: 10
+              max: 200
+              target: 60.0
           AutoScalingConfigs:
 
             - table: test-user-table
@@ -126,13 +590,58 @@ class AutoScaling(Blueprint):
                 scale-out-cooldown: 180
               write:
                 max: 25
+              indexes:
+                group-name-index:
+                  read:
+                    min: 5
+                    max: 100
+                  write:
+                    max: 25
+
+            - table: test-event-table
+              preset: bursty
+              read:
+                scheduled:
+                  - name: morning-peak
+                    schedule: cron(45 7 ? * MON-FRI *)
+                    min: 500
+                  - name: evening
+                    schedule: cron(0 20 ? * * *)
+                    min: 5
+              indexes:
+                event-type-index:
+                  preset: reporting
+
+    Each capacity type has a ``min`` (default: 1), ``max`` (default:
+    1000), ``target`` utilization percentage (default: 50.0),
+    ``scale-in-cooldown`` and ``scale-out-cooldown`` (in seconds, default:
+    60) and ``scheduled`` actions changing the min and max on a schedule.
+
+    A ``preset``, either built-in (``steady``, ``bursty``, see
+    :data:`SCALING_PRESETS`) or from the Presets variable, provides the
+    settings of both capacity types, which ``read`` and ``write`` override.
+    Indexes inherit the settings of their table, except for its scheduled
+    actions, and can override them the same way. Only the capacity types
+    set by ``read``, ``write`` or a preset are scaled. On-demand tables and
+    indexes don't need autoscaling.
+
+    Each table and index adds two resources per capacity type, so stacks
+    scaling more than 50 tables need to be split with ShardCount, see
+    :mod:`stacker_blueprints.sharding`.
     """
     VARIABLES = {
         "AutoScalingConfigs": {
             "type": list,
             "description": "A list of dicts, each of which represent "
                            "a DynamoDB AutoScaling Configuration.",
-        }
+        },
+        "Presets": {
+            "type": dict,
+            "description": "Scaling settings by preset name, to use in "
+                           "the configs along with the built-in steady "
+                           "and bursty presets.",
+            "default": {},
+        },
     }
 
     # reference: https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-dynamodb-table.html#cfn-dynamodb-table-examples-application-autoscaling # noqa
@@ -153,31 +662,57 @@ class AutoScaling(Blueprint):
             )
         )
 
-    def create_scalable_target_and_scaling_policy(self, table, asc, capacity_type="read"): # noqa
+    def create_scalable_target_and_scaling_policy(self, table, asc,
+                                                  capacity_type="read",
+                                                  index=None, prefix=None):
         capacity_type = capacity_type.title()
         if capacity_type not in ("Read", "Write"):
             raise Exception("capacity_type must be either `read` or `write`.")
 
-        dimension = "dynamodb:table:{}CapacityUnits".format(capacity_type)
-
-        camel_table = snake_to_camel_case(table)
+        camel_table = prefix or get_scaling_prefix(table, index)
+        resource_id = "table/{}".format(table)
+        if index:
+            dimension = "dynamodb:index:{}CapacityUnits".format(
+                capacity_type
+            )
+            resource_id += "/index/{}".format(index)
+        else:
+            dimension = "dynamodb:table:{}CapacityUnits".format(
+                capacity_type
+            )
 
         scalable_target_name = "{}{}ScalableTarget".format(
             camel_table,
             capacity_type,
         )
 
+        scheduled_actions = [
+            aas.ScheduledAction(
+                ScheduledActionName=action["name"],
+                Schedule=action["schedule"],
+                StartTime=action.get("start-time", NoValue),
+                EndTime=action.get("end-time", NoValue),
+                ScalableTargetAction=aas.ScalableTargetAction(
+                    MinCapacity=action.get("min", NoValue),
+                    MaxCapacity=action.get("max", NoValue),
+                ),
+            )
+            for action in asc.get("scheduled", [])
+        ]
+
         scalable_target = self.template.add_resource(
            aas.ScalableTarget(
               scalable_target_name,
               MinCapacity=asc.get("min", 1),
               MaxCapacity=asc.get("max", 1000),
-              ResourceId="table/{}".format(table),
+              ResourceId=resource_id,
               RoleARN=self.iam_role_arn,
               ScalableDimension=dimension,
               ServiceNamespace="dynamodb"
            )
         )
+        if scheduled_actions:
+            scalable_target.ScheduledActions = scheduled_actions
 
         # https://docs.aws.amazon.com/autoscaling/application/APIReference/API_PredefinedMetricSpecification.html # noqa
         predefined_metric_spec = aas.PredefinedMetricSpecification(
@@ -212,14 +747,36 @@ class AutoScaling(Blueprint):
 
     def create_template(self):
         variables = self.get_variables()
-        self.auto_scaling_configs = variables["AutoScalingConfigs"]
+        presets = dict(SCALING_PRESETS)
+        presets.update(variables["Presets"])
+        targets = get_scaling_targets(variables["AutoScalingConfigs"],
+                                      presets)
+        prefixes = get_scaling_prefixes(targets)
+
+        # Every capacity type scaled, of the table or of one of its
+        # indexes, adds a scalable target and a scaling policy.
+        target_counts = {}
+        for target in targets:
+            target_counts[target.table] = \
+                target_counts.get(target.table, 0) + 1
+        self.auto_scaling_configs = self.get_shard_items(
+            variables["AutoScalingConfigs"], lambda config: config["table"],
+            resources_per_item=lambda config: 2 * target_counts[
+                config["table"]],
+            fixed_resources=1,
+        )
         self.tables = [config["table"] for config in self.auto_scaling_configs]
+        if not self.tables:
+            return
         self.iam_role = self.create_scaling_iam_role()
         self.iam_role_arn = GetAtt(self.iam_role, "Arn")
-        for table_asc in self.auto_scaling_configs:
-            self.create_scalable_target_and_scaling_policy(
-                table_asc["table"], table_asc["read"], "read"
-            )
-            self.create_scalable_target_and_scaling_policy(
-                table_asc["table"], table_asc["write"], "write"
-            )
+        tables = set(self.tables)
+        for target in targets:
+            if target.table in tables:
+                self.create_scalable_target_and_scaling_policy(
+                    target.table,
+                    target.settings,
+                    target.capacity_type,
+                    index=target.index,
+                    prefix=prefixes[(target.table, target.index)],
+                )
@@ -1,4 +1,5 @@
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
+from .sharding import ShardedBlueprint
 from stacker.blueprints.variables.types import TroposphereType
 
 from troposphere import (
@@ -7,8 +8,12 @@ from troposphere import (
 )
 
 
-class Instances(Blueprint):
-    """ Manages the creation of EC2 Instance resources. """
+class Instances(ShardedBlueprint):
+    """ Manages the creation of EC2 Instance resources.
+
+    The instances can be split across several stacks, see
+    :mod:`stacker_blueprints.sharding`.
+    """
 
     VARIABLES = {
         "Instances": {
@@ -21,7 +26,11 @@ class Instances(Blueprint):
         t = self.template
         variables = self.get_variables()
 
-        for instance in variables["Instances"]:
+        instances = self.get_shard_items(
+            variables["Instances"], lambda instance: instance.title,
+            resources_per_item=1, outputs_per_item=6,
+        )
+        for instance in instances:
             t.add_resource(instance)
             title = instance.title
             t.add_output(
@@ -61,6 +70,8 @@ class Instances(Blueprint):
                 )
             )
 
+        self.export_outputs()
+
 
 class SecurityGroups(Blueprint):
     VARIABLES = {
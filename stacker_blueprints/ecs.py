@@ -12,7 +12,7 @@ from troposphere import (
     Sub,
 )
 
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 
 from .policies import ecs_task_execution_policy
 
@@ -2,13 +2,23 @@ from troposphere import (
     Ref, ec2, Output, GetAtt, Join
 )
 
+import re
+
+from troposphere import elasticache
+
 from troposphere.elasticache import (
-    ReplicationGroup, ParameterGroup, SubnetGroup
+    ParameterGroup, SubnetGroup
 )
 
+from troposphere.policies import UpdatePolicy as BaseUpdatePolicy
+
 from troposphere.route53 import RecordSetType
 
-from stacker.blueprints.base import Blueprint
+from troposphere.validators import boolean
+
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.parameter_presets import get_parameters
+from stacker_blueprints.util import extend_props
 
 # Resource name constants
 SUBNET_GROUP = "SubnetGroup"
@@ -19,6 +29,133 @@ PARAMETER_GROUP = "ParameterGroup"
 
 NOVALUE = Ref("AWS::NoValue")
 
+# Redis cluster mode splits the keyspace into this many hash slots.
+CLUSTER_SLOTS = 16384
+MAX_NODE_GROUPS = 500
+MAX_REPLICAS_PER_NODE_GROUP = 5
+NODE_GROUP_ID = re.compile(r"^[0-9]{1,4}$")
+NODE_GROUP_KEYS = ("NodeGroupId", "Slots", "ReplicaCount",
+                   "PrimaryAvailabilityZone", "ReplicaAvailabilityZones")
+# Only the r6gd nodes have the SSDs data tiering moves cold data to.
+DATA_TIERING_NODE_TYPE_PREFIX = "cache.r6gd."
+
+ReplicationGroup = extend_props(
+    elasticache.ReplicationGroup,
+    DataTieringEnabled=(boolean, False),
+)
+UpdatePolicy = extend_props(
+    BaseUpdatePolicy,
+    UseOnlineResharding=(boolean, False),
+)
+
+
+class NodeGroupConfiguration(elasticache.NodeGroupConfiguration):
+    props = dict(
+        elasticache.NodeGroupConfiguration.props,
+        NodeGroupId=(basestring, False),
+        ReplicaAvailabilityZones=([basestring], False),
+    )
+
+
+def parse_slots(slots):
+    """Returns the (start, end) ranges of the slots of a node group, ie
+    ``0-5460`` or ``0-100,200-5460``.
+
+    Raises:
+        ValueError: If the ranges are invalid or outside of the keyspace.
+    """
+    ranges = []
+    for part in str(slots).split(","):
+        try:
+            start, end = [int(bound) for bound in part.split("-")]
+        except ValueError:
+            raise ValueError("Invalid slot range %r in %r." % (part, slots))
+        if not 0 <= start <= end < CLUSTER_SLOTS:
+            raise ValueError("Slot range %s must be within 0-%d." % (
+                part, CLUSTER_SLOTS - 1))
+        ranges.append((start, end))
+    return ranges
+
+
+def split_slots(count):
+    """Returns the slots of count node groups sharing the keyspace evenly,
+    the way ElastiCache splits it when no slots are given."""
+    size, extra = divmod(CLUSTER_SLOTS, count)
+    slots = []
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        slots.append("%d-%d" % (start, end - 1))
+        start = end
+    return slots
+
+
+def validate_node_groups(node_groups, replicas_per_node_group):
+    """Validates the NodeGroups of a cluster mode replication group.
+
+    Every node group gets an id, which ElastiCache needs to reshard online,
+    and slots. Either all or none of the node groups give their slots, and
+    given slots must cover the keyspace exactly once.
+
+    Returns:
+        list: The node groups, with their ids, slots and replica counts.
+    """
+    if len(node_groups) > MAX_NODE_GROUPS:
+        raise ValueError("A replication group can have at most %d node "
+                         "groups, not %d." % (MAX_NODE_GROUPS,
+                                              len(node_groups)))
+    with_slots = [group for group in node_groups if "Slots" in group]
+    if with_slots and len(with_slots) != len(node_groups):
+        raise ValueError("Either all or none of the node groups must have "
+                         "Slots.")
+    default_slots = split_slots(len(node_groups))
+
+    validated = []
+    covered = []
+    for index, group in enumerate(node_groups):
+        unknown = set(group) - set(NODE_GROUP_KEYS)
+        if unknown:
+            raise ValueError("Unknown node group keys: %s" % (
+                ", ".join(sorted(unknown))))
+        group = dict(group)
+        group.setdefault("NodeGroupId", "%04d" % (index + 1))
+        group_id = group["NodeGroupId"]
+        if not NODE_GROUP_ID.match(str(group_id)):
+            raise ValueError("Node group ids must be 1 to 4 digits, not "
+                             "%r." % (group_id,))
+        group.setdefault("Slots", default_slots[index])
+        covered.extend(parse_slots(group["Slots"]))
+        group.setdefault("ReplicaCount", replicas_per_node_group)
+        if not 0 <= group["ReplicaCount"] <= MAX_REPLICAS_PER_NODE_GROUP:
+            raise ValueError("Node group %s must have between 0 and %d "
+                             "replicas." % (group_id,
+                                            MAX_REPLICAS_PER_NODE_GROUP))
+        replica_zones = group.get("ReplicaAvailabilityZones")
+        if replica_zones and len(replica_zones) != group["ReplicaCount"]:
+            raise ValueError("Node group %s needs one ReplicaAvailability"
+                             "Zone per replica." % group_id)
+        validated.append(group)
+
+    group_ids = [str(g["NodeGroupId"]) for g in validated]
+    if len(set(group_ids)) != len(group_ids):
+        raise ValueError("Node group ids must be unique: %s" % (
+            ", ".join(group_ids)))
+    next_slot = 0
+    for start, end in sorted(covered):
+        if start != next_slot:
+            raise ValueError(
+                "The slots of the node groups must cover 0-%d without "
+                "overlapping, slot %d is %s." % (
+                    CLUSTER_SLOTS - 1, min(start, next_slot),
+                    "unassigned" if start > next_slot else "duplicated"))
+        next_slot = end + 1
+    if next_slot != CLUSTER_SLOTS:
+        raise ValueError("The slots of the node groups must cover 0-%d, "
+                         "slots %d-%d are unassigned." % (
+                             CLUSTER_SLOTS - 1, next_slot,
+                             CLUSTER_SLOTS - 1))
+    return validated
+
 
 class BaseReplicationGroup(Blueprint):
     """Base Blueprint for all Elasticache ReplicationGroup blueprints.
@@ -33,6 +170,13 @@ class BaseReplicationGroup(Blueprint):
             "type": dict,
             "default": {},
         },
+        "ParameterPreset": {
+            "type": str,
+            "description": "A tuned set of ClusterParameters for the "
+                           "parameter group family, either cache or "
+                           "store. ClusterParameters override it.",
+            "default": "",
+        },
         "VpcId": {
             "type": str,
             "description": "Vpc Id to place the Cluster in"
@@ -85,6 +229,37 @@ class BaseReplicationGroup(Blueprint):
             "description": "The port to run the cluster on.",
             "default": 0,
         },
+        "NumNodeGroups": {
+            "type": int,
+            "description": "The number of shards (node groups) of a "
+                           "cluster mode enabled replication group, "
+                           "which replaces NumCacheClusters. 0 disables "
+                           "cluster mode. Changing it reshards the group "
+                           "online.",
+            "default": 0,
+        },
+        "ReplicasPerNodeGroup": {
+            "type": int,
+            "description": "The number of replicas of each node group in "
+                           "cluster mode.",
+            "default": 1,
+        },
+        "NodeGroups": {
+            "type": list,
+            "description": "The node groups of a cluster mode enabled "
+                           "replication group, each with optional "
+                           "NodeGroupId, Slots (ie: 0-8191), "
+                           "ReplicaCount, PrimaryAvailabilityZone and "
+                           "ReplicaAvailabilityZones. Enables cluster "
+                           "mode, and sets NumNodeGroups if it isn't.",
+            "default": [],
+        },
+        "DataTieringEnabled": {
+            "type": bool,
+            "description": "Moves the least recently used data to SSD. "
+                           "Requires r6gd nodes.",
+            "default": False,
+        },
         "PreferredCacheClusterAZs": {
             "type": list,
             "description": "Must match the # of nodes in "
@@ -162,6 +337,71 @@ class BaseReplicationGroup(Blueprint):
         """
         return []
 
+    def get_cluster_mode_families(self):
+        """Used by engine specific subclasses to return the parameter group
+        families that support cluster mode.
+
+        Return:
+            list: A list of parameter group families.
+        """
+        return []
+
+    def cluster_mode_enabled(self):
+        variables = self.get_variables()
+        return bool(variables["NumNodeGroups"] or variables["NodeGroups"])
+
+    def get_node_groups(self):
+        """Returns the validated node groups of the replication group, or
+        an empty list if NodeGroups isn't set."""
+        variables = self.get_variables()
+        node_groups = variables["NodeGroups"]
+        if not node_groups:
+            return []
+        if variables["NumNodeGroups"] not in (0, len(node_groups)):
+            raise ValueError("NumNodeGroups is %d but %d NodeGroups are "
+                             "given." % (variables["NumNodeGroups"],
+                                         len(node_groups)))
+        return validate_node_groups(node_groups,
+                                    variables["ReplicasPerNodeGroup"])
+
+    def get_cluster_mode_properties(self):
+        """Returns the ReplicationGroup properties of cluster mode.
+
+        Raises:
+            ValueError: If cluster mode is misconfigured.
+        """
+        variables = self.get_variables()
+        family = variables["ParameterGroupFamily"]
+        if family not in self.get_cluster_mode_families():
+            raise ValueError("Parameter group family %s doesn't support "
+                             "cluster mode." % family)
+        if not variables["AutomaticFailoverEnabled"]:
+            raise ValueError("Cluster mode requires AutomaticFailover"
+                             "Enabled.")
+        if variables["PreferredCacheClusterAZs"]:
+            raise ValueError("Cluster mode places nodes with the "
+                             "availability zones of NodeGroups, not "
+                             "PreferredCacheClusterAZs.")
+        num_node_groups = variables["NumNodeGroups"]
+        if not 0 <= num_node_groups <= MAX_NODE_GROUPS:
+            raise ValueError("NumNodeGroups must be between 1 and %d." %
+                             MAX_NODE_GROUPS)
+        replicas = variables["ReplicasPerNodeGroup"]
+        if not 0 <= replicas <= MAX_REPLICAS_PER_NODE_GROUP:
+            raise ValueError("ReplicasPerNodeGroup must be between 0 and "
+                             "%d." % MAX_REPLICAS_PER_NODE_GROUP)
+
+        properties = {"ReplicasPerNodeGroup": replicas}
+        node_groups = self.get_node_groups()
+        if node_groups:
+            properties["NumNodeGroups"] = len(node_groups)
+            properties["NodeGroupConfiguration"] = [
+                NodeGroupConfiguration(**group) for group in node_groups
+            ]
+        else:
+            properties["NumNodeGroups"] = num_node_groups
+        return properties
+
     def defined_variables(self):
         variables = super(BaseReplicationGroup, self).defined_variables()
         variables["ParameterGroupFamily"] = {
@@ -183,7 +423,17 @@ class BaseReplicationGroup(Blueprint):
     def create_parameter_group(self):
         t = self.template
         variables = self.get_variables()
-        params = variables["ClusterParameters"]
+        params = get_parameters(
+            self.engine(),
+            variables["ParameterGroupFamily"],
+            variables["ParameterPreset"],
+            variables["ClusterParameters"],
+        )
+        if self.cluster_mode_enabled():
+            if params.get("cluster-enabled", "yes") != "yes":
+                raise ValueError("Cluster mode needs the cluster-enabled "
+                                 "parameter to be yes.")
+            params = dict(params, **{"cluster-enabled": "yes"})
         t.add_resource(
             ParameterGroup(
                 PARAMETER_GROUP,
@@ -224,7 +474,18 @@ class BaseReplicationGroup(Blueprint):
         maintenance_window = variables["PreferredMaintenanceWindow"] or \
             NOVALUE
 
-        t.add_resource(
+        if self.cluster_mode_enabled():
+            properties = self.get_cluster_mode_properties()
+        else:
+            properties = {"NumCacheClusters": variables["NumCacheClusters"]}
+        if variables["DataTieringEnabled"]:
+            node_type = variables["CacheNodeType"]
+            if not node_type.startswith(DATA_TIERING_NODE_TYPE_PREFIX):
+                raise ValueError("Data tiering requires %s* nodes, not %s." %
+                                 (DATA_TIERING_NODE_TYPE_PREFIX, node_type))
+            properties["DataTieringEnabled"] = True
+
+        replication_group = t.add_resource(
             ReplicationGroup(
                 REPLICATION_GROUP,
                 AutomaticFailoverEnabled=variables["AutomaticFailoverEnabled"],
@@ -232,7 +493,6 @@ class BaseReplicationGroup(Blueprint):
                 CacheNodeType=variables["CacheNodeType"],
                 CacheParameterGroupName=Ref(PARAMETER_GROUP),
                 CacheSubnetGroupName=Ref(SUBNET_GROUP),
-                NumCacheClusters=variables["NumCacheClusters"],
                 Engine=self.engine(),
                 EngineVersion=variables["EngineVersion"],
                 NotificationTopicArn=notification_topic_arn,
@@ -244,12 +504,21 @@ class BaseReplicationGroup(Blueprint):
                 SnapshotArns=snapshot_arns,
                 SnapshotRetentionLimit=snapshot_retention_limit,
                 SnapshotWindow=snapshot_window,
+                **properties
             )
         )
+        if self.cluster_mode_enabled():
+            # Adds and removes shards instead of replacing the group.
+            replication_group.UpdatePolicy = UpdatePolicy(
+                UseOnlineResharding=True,
+            )
 
     def get_primary_address(self):
         return GetAtt(REPLICATION_GROUP, "PrimaryEndPoint.Address")
 
+    def get_configuration_address(self):
+        return GetAtt(REPLICATION_GROUP, "ConfigurationEndPoint.Address")
+
     def get_secondary_addresses(self):
         return GetAtt(REPLICATION_GROUP, "ReadEndPoint.Addresses.List")
 
@@ -262,7 +531,10 @@ class BaseReplicationGroup(Blueprint):
     def create_dns_records(self):
         t = self.template
         variables = self.get_variables()
-        primary_endpoint = self.get_primary_address()
+        if self.cluster_mode_enabled():
+            primary_endpoint = self.get_configuration_address()
+        else:
+            primary_endpoint = self.get_primary_address()
 
         if self.should_create_internal_cname():
             t.add_resource(
@@ -278,14 +550,23 @@ class BaseReplicationGroup(Blueprint):
 
     def create_cluster_outputs(self):
         t = self.template
-        t.add_output(Output("PrimaryAddress",
-                            Value=self.get_primary_address()))
-        t.add_output(Output("ReadAddresses",
-                            Value=Join(",", self.get_secondary_addresses())))
-
-        t.add_output(Output("ClusterPort",
-                            Value=GetAtt(REPLICATION_GROUP,
-                                         "PrimaryEndPoint.Port")))
+        if self.cluster_mode_enabled():
+            # Clients discover the shards through the configuration
+            # endpoint, there is no primary or read endpoint.
+            t.add_output(Output("ConfigurationAddress",
+                                Value=self.get_configuration_address()))
+            t.add_output(Output("ClusterPort",
+                                Value=GetAtt(REPLICATION_GROUP,
+                                             "ConfigurationEndPoint.Port")))
+        else:
+            t.add_output(Output("PrimaryAddress",
+                                Value=self.get_primary_address()))
+            t.add_output(Output(
+                "ReadAddresses",
+                Value=Join(",", self.get_secondary_addresses())))
+            t.add_output(Output("ClusterPort",
+                                Value=GetAtt(REPLICATION_GROUP,
+                                             "PrimaryEndPoint.Port")))
         t.add_output(Output("ClusterId", Value=Ref(REPLICATION_GROUP)))
         if self.should_create_internal_cname():
             t.add_output(
@@ -7,7 +7,11 @@ class RedisReplicationGroup(base.BaseReplicationGroup):
 
     def get_engine_versions(self):
         return ["2.6.13", "2.8.19", "2.8.21", "2.8.22", "2.8.23", "2.8.24",
-                "2.8.6", "3.2.4"]
+                "2.8.6", "3.2.4", "4.0.10", "5.0.6", "6.2", "7.0"]
 
     def get_parameter_group_family(self):
-        return ["redis2.6", "redis2.8", "redis3.2"]
+        return ["redis2.6", "redis2.8", "redis3.2", "redis4.0", "redis5.0",
+                "redis6.x", "redis7"]
+
+    def get_cluster_mode_families(self):
+        return ["redis3.2", "redis4.0", "redis5.0", "redis6.x", "redis7"]
@@ -25,7 +25,7 @@ from awacs.aws import (
     SourceIp,
     Statement,
 )
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 from troposphere import (
     elasticsearch,
     iam,
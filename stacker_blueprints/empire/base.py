@@ -2,7 +2,7 @@ import logging
 
 from troposphere import Base64, Join
 
-from stacker.blueprints.base import Blueprint
+from stacker_blueprints.base import Blueprint
 
 logger = logging.getLogger(__name__)
 
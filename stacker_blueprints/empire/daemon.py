@@ -9,28 +9,13 @@ from troposphere import (
     If,
     Output,
 )
-from troposphere import (
-    ec2,
-    ecs,
-    logs,
-    sns,
-    sqs,
-    s3,
-)
-
-from troposphere import elasticloadbalancing as elb
-from troposphere.route53 import RecordSetType
-from troposphere.iam import (
-    PolicyType,
-    Policy,
-    Role,
-)
 
 from awacs.helpers.trust import (
     get_ecs_assumerole_policy,
 )
 
-from stacker.blueprints.base import Blueprint
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.util import lazy_import
 from stacker.blueprints.variables.types import (
     CFNCommaDelimitedList,
     CFNNumber,
@@ -49,6 +34,16 @@ from .policies import (
     logstream_policy,
 )
 
+ec2 = lazy_import("troposphere.ec2")
+ecs = lazy_import("troposphere.ecs")
+elb = lazy_import("troposphere.elasticloadbalancing")
+iam = lazy_import("troposphere.iam")
+logs = lazy_import("troposphere.logs")
+route53 = lazy_import("troposphere.route53")
+s3 = lazy_import("troposphere.s3")
+sns = lazy_import("troposphere.sns")
+sqs = lazy_import("troposphere.sqs")
+
 ELB_SG_NAME = "ELBSecurityGroup"
 EVENTS_TOPIC = "EventsTopic"
 RUN_LOGS = "RunLogs"
@@ -411,7 +406,7 @@ class EmpireDaemon(Blueprint):
 
         # Setup ELB DNS
         t.add_resource(
-            RecordSetType(
+            route53.RecordSetType(
                 "ElbDnsRecord",
                 HostedZoneName=Join("", [Ref("ExternalDomain"), "."]),
                 Comment="Router ELB DNS",
@@ -541,7 +536,7 @@ class EmpireDaemon(Blueprint):
 
         # Give the instances access that the Empire daemon needs.
         t.add_resource(
-            PolicyType(
+            iam.PolicyType(
                 "AccessPolicy",
                 PolicyName="empire",
                 PolicyDocument=empire_policy({
@@ -571,7 +566,7 @@ class EmpireDaemon(Blueprint):
 
         # Add SNS Events policy if Events are enabled
         t.add_resource(
-            PolicyType(
+            iam.PolicyType(
                 "SNSEventsPolicy",
                 PolicyName="EmpireSNSEventsPolicy",
                 Condition="EnableSNSEvents",
@@ -583,7 +578,7 @@ class EmpireDaemon(Blueprint):
 
         # Add run logs policy if run logs are enabled
         t.add_resource(
-            PolicyType(
+            iam.PolicyType(
                 "RunLogsPolicy",
                 PolicyName="EmpireRunLogsPolicy",
                 Condition="EnableCloudwatchLogs",
@@ -597,7 +592,7 @@ class EmpireDaemon(Blueprint):
         # Allow the controller to write empire events to kinesis if kinesis is
         # enabled.
         t.add_resource(
-            PolicyType(
+            iam.PolicyType(
                 "AppEventStreamPolicy",
                 PolicyName="EmpireAppEventStreamPolicy",
                 Condition="EnableAppEventStream",
@@ -650,12 +645,12 @@ class EmpireDaemon(Blueprint):
         )
 
         t.add_resource(
-            Role(
+            iam.Role(
                 "ServiceRole",
                 AssumeRolePolicyDocument=get_ecs_assumerole_policy(),
                 Path="/",
                 Policies=[
-                    Policy(
+                    iam.Policy(
                         PolicyName="ecs-service-role",
                         PolicyDocument=service_role_policy())]))
 
@@ -1,21 +1,5 @@
 import logging
 
-from awacs import (
-    awslambda,
-    ecs,
-    ec2,
-    events,
-    iam,
-    route53,
-    kinesis,
-    sns,
-    logs,
-    sqs,
-    s3,
-    cloudformation,
-    elasticloadbalancing as elb,
-    ecr,
-)
 from awacs.aws import (
     Statement,
     Allow,
@@ -31,6 +15,24 @@ from troposphere import (
     Join,
 )
 
+from stacker_blueprints.policy_compactor import compact_policy
+from stacker_blueprints.util import lazy_import
+
+awslambda = lazy_import("awacs.awslambda")
+cloudformation = lazy_import("awacs.cloudformation")
+ec2 = lazy_import("awacs.ec2")
+ecr = lazy_import("awacs.ecr")
+ecs = lazy_import("awacs.ecs")
+elb = lazy_import("awacs.elasticloadbalancing")
+events = lazy_import("awacs.events")
+iam = lazy_import("awacs.iam")
+kinesis = lazy_import("awacs.kinesis")
+logs = lazy_import("awacs.logs")
+route53 = lazy_import("awacs.route53")
+s3 = lazy_import("awacs.s3")
+sns = lazy_import("awacs.sns")
+sqs = lazy_import("awacs.sqs")
+
 logger = logging.getLogger(__name__)
 
 
@@ -227,7 +229,7 @@ def empire_policy(resources):
             ),
         ]
     )
-    return p
+    return compact_policy(p)
 
 
 def sns_events_policy(topic_arn):
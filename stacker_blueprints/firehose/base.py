@@ -13,7 +13,7 @@ import awacs.firehose
 import awacs.kms
 from awacs.helpers.trust import make_simple_assume_statement
 
-from stacker.blueprints.base import Blueprint
+from stacker_blueprints.base import Blueprint
 
 from troposphere import (
     iam,
@@ -6,7 +6,7 @@ from troposphere import (
 )
 from troposphere import ec2
 
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 
 
 class Network(Blueprint):
@@ -0,0 +1,231 @@
+"""Tuned defaults for ElastiCache and RDS parameter groups.
+
+A preset is named after a workload, ie ``cache`` for a Redis that evicts
+keys or ``oltp`` for a Postgres serving many short transactions, and only
+sets the parameters the parameter group family supports. The parameters a
+blueprint is given always override its preset.
+
+Postgres presets size their memory settings from the instance class. When
+the instance class isn't known, ie for the cluster parameter group of an
+Aurora cluster whose instances can differ in size, they use
+``{DBInstanceClassMemory}`` formulas that RDS resolves per instance.
+"""
+import re
+from collections import namedtuple
+
+KIB = 1024
+GIB = 1024 ** 3
+# Postgres counts shared_buffers and effective_cache_size in 8kB pages.
+POSTGRES_PAGE_SIZE = 8 * KIB
+MIN_WORK_MEM_KB = 4 * KIB
+MAX_MAINTENANCE_WORK_MEM_KB = 2 * KIB * KIB
+
+# The first family version supporting each parameter.
+REDIS_PARAMETER_VERSIONS = {
+    "maxmemory-policy": (2, 6),
+    "reserved-memory-percent": (2, 8),
+    "activedefrag": (4, 0),
+    "lazyfree-lazy-eviction": (4, 0),
+    "lazyfree-lazy-expire": (4, 0),
+}
+POSTGRES_PARAMETER_VERSIONS = {
+    "idle_in_transaction_session_timeout": (9, 6),
+}
+
+REDIS_PRESETS = {
+    # Evicts the least recently used keys, freeing them in the background.
+    "cache": {
+        "maxmemory-policy": "allkeys-lru",
+        "reserved-memory-percent": "25",
+        "activedefrag": "yes",
+        "lazyfree-lazy-eviction": "yes",
+        "lazyfree-lazy-expire": "yes",
+    },
+    # Never evicts, writes fail instead once memory is full.
+    "store": {
+        "maxmemory-policy": "noeviction",
+        "reserved-memory-percent": "25",
+        "activedefrag": "yes",
+    },
+}
+
+
+class PostgresPreset(namedtuple("PostgresPreset",
+                                ["work_mem_divisor", "parameters"])):
+    """The settings of a Postgres preset.
+
+    Attributes:
+        work_mem_divisor (int): The share of the instance memory each sort
+            or hash gets, ie 512 for 1/512th.
+        parameters (dict): Parameters that don't depend on the instance.
+    """
+
+    __slots__ = ()
+
+
+POSTGRES_PRESETS = {
+    # Many connections running short queries on SSD storage.
+    "oltp": PostgresPreset(512, {
+        "random_page_cost": "1.1",
+        "idle_in_transaction_session_timeout": "60000",
+    }),
+    # Few connections running large sorts and joins.
+    "analytics": PostgresPreset(64, {
+        "random_page_cost": "1.1",
+    }),
+}
+
+# GiB of memory per vCPU of the instance families.
+MEMORY_PER_VCPU = {"m": 4, "r": 8, "x": 16, "z": 8}
+BURSTABLE_MEMORY = {"micro": 1, "small": 2, "medium": 4, "large": 8,
+                    "xlarge": 16, "2xlarge": 32}
+INSTANCE_CLASS = re.compile(r"^db\.([a-z]+)\d+[a-z-]*\.(\w+)$")
+INSTANCE_SIZE = re.compile(r"^(\d*)xlarge$")
+
+
+def get_family_version(family, engine):
+    """Returns the version of a parameter group family, ie (6,) for
+    redis6.x or (9, 6) for postgres9.6.
+
+    Raises:
+        ValueError: If the family isn't one of the engine.
+    """
+    match = re.match(r"^%s(\d+)(?:\.(\d+|x))?$" % re.escape(engine),
+                     family or "")
+    if not match:
+        raise ValueError("Parameter group family %s isn't a %s family." % (
+            family, engine))
+    major, minor = match.groups()
+    if minor is None or minor == "x":
+        return (int(major),)
+    return (int(major), int(minor))
+
+
+def get_instance_memory(instance_class):
+    """Returns the approximate memory of an RDS instance class, in bytes.
+
+    Raises:
+        ValueError: If the memory of the instance class is unknown.
+    """
+    match = INSTANCE_CLASS.match(instance_class)
+    if match:
+        family, size = match.groups()
+        if family == "t" and size in BURSTABLE_MEMORY:
+            return BURSTABLE_MEMORY[size] * GIB
+        if family[0] in MEMORY_PER_VCPU:
+            if size == "large":
+                vcpus = 2
+            elif INSTANCE_SIZE.match(size):
+                vcpus = 4 * int(INSTANCE_SIZE.match(size).group(1) or 1)
+            else:
+                vcpus = None
+            if vcpus:
+                return vcpus * MEMORY_PER_VCPU[family[0]] * GIB
+    raise ValueError("Unknown memory for instance class %s, set the "
+                     "memory parameters explicitly." % instance_class)
+
+
+def check_parameters(parameters, versions, family, family_version):
+    """Raises a ValueError if a parameter is too new for the family."""
+    for name in sorted(parameters):
+        if family_version < versions.get(name, ()):
+            raise ValueError("Parameter %s isn't supported by parameter "
+                             "group family %s." % (name, family))
+
+
+def get_redis_parameters(preset, family):
+    version = get_family_version(family, "redis")
+    return dict(
+        (name, value) for name, value in REDIS_PRESETS[preset].items()
+        if version >= REDIS_PARAMETER_VERSIONS[name]
+    )
+
+
+def get_postgres_parameters(preset, family, instance_class=None):
+    aurora = family.startswith("aurora-")
+    version = get_family_version(
+        family, "aurora-postgresql" if aurora else "postgres")
+    settings = POSTGRES_PRESETS[preset]
+    parameters = dict(
+        (name, value) for name, value in settings.parameters.items()
+        if version >= POSTGRES_PARAMETER_VERSIONS.get(name, ())
+    )
+    if instance_class:
+        memory = get_instance_memory(instance_class)
+        parameters["work_mem"] = str(max(
+            MIN_WORK_MEM_KB, memory // KIB // settings.work_mem_divisor))
+        parameters["maintenance_work_mem"] = str(min(
+            MAX_MAINTENANCE_WORK_MEM_KB, memory // KIB // 16))
+        # Aurora sizes its buffers itself, since it doesn't go through the
+        # page cache.
+        if not aurora:
+            parameters["shared_buffers"] = str(
+                memory // 4 // POSTGRES_PAGE_SIZE)
+            parameters["effective_cache_size"] = str(
+                memory * 3 // 4 // POSTGRES_PAGE_SIZE)
+    else:
+        parameters["work_mem"] = "GREATEST({DBInstanceClassMemory/%d},%d)" % (
+            KIB * settings.work_mem_divisor, MIN_WORK_MEM_KB)
+        parameters["maintenance_work_mem"] = \
+            "LEAST({DBInstanceClassMemory/%d},%d)" % (
+                KIB * 16, MAX_MAINTENANCE_WORK_MEM_KB)
+        if not aurora:
+            parameters["shared_buffers"] = "{DBInstanceClassMemory/%d}" % (
+                4 * POSTGRES_PAGE_SIZE)
+            parameters["effective_cache_size"] = \
+                "{DBInstanceClassMemory/%d}" % (4 * POSTGRES_PAGE_SIZE // 3)
+    return parameters
+
+
+# The presets, parameter versions and family prefix of each engine.
+ENGINE_PRESETS = {
+    "redis": (REDIS_PRESETS, REDIS_PARAMETER_VERSIONS, "redis"),
+    "postgres": (POSTGRES_PRESETS, POSTGRES_PARAMETER_VERSIONS, "postgres"),
+    "aurora-postgresql": (POSTGRES_PRESETS, POSTGRES_PARAMETER_VERSIONS,
+                          "aurora-postgresql"),
+}
+
+
+def get_parameters(engine, family, preset="", parameters=None,
+                   instance_class=None):
+    """Returns the parameters of a parameter group.
+
+    Args:
+        engine (str): The engine, ie redis or postgres.
+        family (str): The parameter group family.
+        preset (str): The name of a preset of the engine, or an empty
+            string for none.
+        parameters (dict): Parameters overriding the preset.
+        instance_class (str): The instance class of an RDS instance the
+            Postgres memory settings are sized for. Without it they are
+            formulas of the memory of each instance.
+
+    Raises:
+        ValueError: If the engine has no such preset, the family doesn't
+            belong to the engine, or a parameter is too new for it.
+    """
+    parameters = parameters or {}
+    engine = (engine or "").lower()
+    if engine not in ENGINE_PRESETS:
+        if preset:
+            raise ValueError("There are no parameter presets for engine "
+                             "%s." % engine)
+        return parameters
+
+    presets, versions, family_engine = ENGINE_PRESETS[engine]
+    if preset and preset not in presets:
+        raise ValueError("Unknown %s parameter preset %s, use one of: %s" % (
+            engine, preset, ", ".join(sorted(presets))))
+    if not preset and not set(parameters) & set(versions):
+        return parameters
+    check_parameters(parameters, versions, family,
+                     get_family_version(family, family_engine))
+    if not preset:
+        return parameters
+
+    if engine == "redis":
+        tuned = get_redis_parameters(preset, family)
+    else:
+        tuned = get_postgres_parameters(preset, family, instance_class)
+    tuned.update(parameters)
+    return tuned
@@ -14,16 +14,17 @@ from troposphere import (
     AWSHelperFn
 )
 
-from awacs import (
-    cloudwatch,
-    dynamodb,
-    ecr,
-    kinesis,
-    ec2,
-    logs,
-    s3,
-    sts,
-)
+from .policy_compactor import compact_policy, compact_statements
+from .util import lazy_import
+
+cloudwatch = lazy_import("awacs.cloudwatch")
+dynamodb = lazy_import("awacs.dynamodb")
+ecr = lazy_import("awacs.ecr")
+kinesis = lazy_import("awacs.kinesis")
+ec2 = lazy_import("awacs.ec2")
+logs = lazy_import("awacs.logs")
+s3 = lazy_import("awacs.s3")
+sts = lazy_import("awacs.sts")
 
 
 def make_simple_assume_statement(*principals):
@@ -89,7 +90,7 @@ def read_only_s3_bucket_policy(buckets):
 def read_write_s3_bucket_policy_statements(buckets, folder="*"):
     list_buckets = [s3_arn(b) for b in buckets]
     object_buckets = [s3_objects_arn(b, folder) for b in buckets]
-    return [
+    return compact_statements([
         Statement(
             Effect="Allow",
             Action=[
@@ -118,7 +119,7 @@ def read_write_s3_bucket_policy_statements(buckets, folder="*"):
             ],
             Resource=object_buckets,
         ),
-    ]
+    ])
 
 
 def read_write_s3_bucket_policy(buckets):
@@ -278,7 +279,7 @@ def flowlogs_assumerole_policy():
 # reference: https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-dynamodb-table.html#cfn-dynamodb-table-examples-application-autoscaling # noqa
 def dynamodb_autoscaling_policy(tables):
     """Policy to allow AutoScaling a list of DynamoDB tables."""
-    return Policy(
+    return compact_policy(Policy(
         Statement=[
             Statement(
                 Effect=Allow,
@@ -300,7 +301,33 @@ def dynamodb_autoscaling_policy(tables):
                 ]
             ),
         ]
-    )
+    ))
+
+
+def dax_dynamodb_policy(table_arns):
+    """Policy to allow a DAX cluster to read and write DynamoDB tables, and
+    query their indexes."""
+    index_arns = [Join("", [arn, "/index/*"]) for arn in table_arns]
+    return compact_policy(Policy(
+        Statement=[
+            Statement(
+                Effect=Allow,
+                Resource=list(table_arns) + index_arns,
+                Action=[
+                    dynamodb.BatchGetItem,
+                    dynamodb.BatchWriteItem,
+                    Action("dynamodb", "ConditionCheckItem"),
+                    dynamodb.DeleteItem,
+                    dynamodb.DescribeTable,
+                    dynamodb.GetItem,
+                    dynamodb.PutItem,
+                    dynamodb.Query,
+                    dynamodb.Scan,
+                    dynamodb.UpdateItem,
+                ]
+            ),
+        ]
+    ))
 
 
 def ecr_repo_client_statements(ecr_repo="*"):
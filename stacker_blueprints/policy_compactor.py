@@ -0,0 +1,267 @@
+"""Compacts the IAM policies built by the blueprints.
+
+Policies are usually assembled from the statements of several helpers,
+which leads to duplicated actions and resources, and to many statements
+that only differ by their actions or their resources. IAM limits the size
+of policies, so :func:`compact_policy` rewrites them into an equivalent,
+smaller form:
+
+- actions and resources are deduplicated within each statement,
+- actions matched by a wildcard action of the same statement are dropped,
+  as are all the resources of a statement that applies to "*",
+- statements with the same effect, principal, condition and resources are
+  merged into one with all their actions,
+- statements with the same effect, principal, condition and actions are
+  merged into one with all their resources.
+
+Statements with a Sid, NotAction or NotResource are left as they are.
+"""
+import fnmatch
+import json
+import logging
+import sys
+from collections import namedtuple
+
+from awacs.aws import Action, Statement
+
+from .util import encode_value
+
+logger = logging.getLogger(__name__)
+
+# Statements can only be merged when all of these are the same.
+MERGE_PROPERTIES = ("Effect", "Principal", "NotPrincipal", "Condition")
+
+WILDCARD = "*"
+
+
+class PolicySavings(namedtuple("PolicySavings",
+                               ["statements_before", "statements_after",
+                                "bytes_before", "bytes_after"])):
+    """How much smaller compacting made a policy."""
+
+    __slots__ = ()
+
+    @property
+    def saved_bytes(self):
+        return self.bytes_before - self.bytes_after
+
+
+def to_json(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"),
+                      default=encode_value)
+
+
+def get_policy_size(policy):
+    """Returns the size of a policy in bytes, without whitespace, which is
+    what IAM counts against its limits."""
+    return len(to_json(policy))
+
+
+def get_action_name(action):
+    return to_json(action).strip('"').lower()
+
+
+def is_wildcard(name):
+    return "*" in name or "?" in name
+
+
+def dedupe(values, key):
+    seen = set()
+    unique = []
+    for value in values:
+        value_key = key(value)
+        if value_key not in seen:
+            seen.add(value_key)
+            unique.append(value)
+    return unique
+
+
+def compact_actions(actions):
+    """Dedupes actions, and drops the ones a wildcard action matches.
+
+    IAM matches actions case insensitively.
+    """
+    actions = dedupe(actions, get_action_name)
+    names = [get_action_name(action) for action in actions]
+    if WILDCARD in names:
+        return [actions[names.index(WILDCARD)]]
+    wildcards = [name for name in names if is_wildcard(name)]
+    if not wildcards:
+        return actions
+    return [
+        action for action, name in zip(actions, names)
+        if not any(fnmatch.fnmatchcase(name, wildcard)
+                   for wildcard in wildcards if wildcard != name)
+    ]
+
+
+def compact_resources(resources):
+    """Dedupes resources. A statement applying to "*" applies to all of
+    them."""
+    if WILDCARD in resources:
+        return [WILDCARD]
+    return dedupe(resources, to_json)
+
+
+def get_service_actions(action):
+    """Returns the names of every action awacs knows for the service of
+    an action from an awacs service module (ie: awacs.s3.GetObject), or
+    None for other actions."""
+    module = sys.modules.get(type(action).__module__)
+    action_class = type(action)
+    if module is None or action_class is Action:
+        return None
+    return frozenset(
+        get_action_name(value) for value in vars(module).values()
+        if isinstance(value, action_class)
+    )
+
+
+def use_service_wildcards(actions):
+    """Replaces the actions of a service with "<service>:*" when they
+    include every action awacs knows for the service."""
+    by_prefix = {}
+    for action in actions:
+        by_prefix.setdefault(action.prefix, []).append(action)
+
+    for prefix, service_actions in by_prefix.items():
+        known = None
+        for action in service_actions:
+            known = get_service_actions(action)
+            if known:
+                break
+        if not known:
+            continue
+        names = [get_action_name(action) for action in service_actions]
+        wildcards = [name for name in names if is_wildcard(name)]
+        covered = set(names)
+        for name in known - covered:
+            if not any(fnmatch.fnmatchcase(name, w) for w in wildcards):
+                break
+        else:
+            by_prefix[prefix] = [Action(prefix, WILDCARD)]
+
+    compacted = []
+    emitted = set()
+    for action in actions:
+        if action.prefix not in emitted:
+            emitted.add(action.prefix)
+            compacted.extend(by_prefix[action.prefix])
+    return compacted
+
+
+def get_merge_key(properties, merged_property):
+    """Returns what must be equal for two statements to be merged on
+    `merged_property`, or None if the statement can't be merged."""
+    if "Sid" in properties or "NotAction" in properties or \
+            "NotResource" in properties:
+        return None
+    if "Action" not in properties or "Resource" not in properties:
+        return None
+    if merged_property == "Action":
+        other = frozenset(to_json(r) for r in properties["Resource"])
+    else:
+        other = frozenset(get_action_name(a) for a in properties["Action"])
+    return tuple(
+        to_json(properties.get(name)) for name in MERGE_PROPERTIES
+    ) + (other,)
+
+
+def merge_statements(statements, merged_property):
+    """Merges the statements that only differ by `merged_property`."""
+    merged = {}
+    result = []
+    for properties in statements:
+        key = get_merge_key(properties, merged_property)
+        if key is None:
+            result.append(properties)
+        elif key in merged:
+            merged[key][merged_property].extend(properties[merged_property])
+        else:
+            merged[key] = properties
+            result.append(properties)
+    return result
+
+
+def compact_statement_properties(properties, service_wildcards=False):
+    if "Action" in properties:
+        properties["Action"] = compact_actions(properties["Action"])
+        if service_wildcards:
+            properties["Action"] = use_service_wildcards(
+                properties["Action"]
+            )
+    if "Resource" in properties:
+        properties["Resource"] = compact_resources(properties["Resource"])
+    return properties
+
+
+def compact_statements(statements, service_wildcards=False):
+    """Returns an equivalent, shorter list of statements.
+
+    Args:
+        statements (list): :class:`awacs.aws.Statement` objects.
+        service_wildcards (bool): Also replace the actions of a service with
+            "<service>:*" when they are all the actions awacs knows for the
+            service. This is only equivalent until AWS adds actions to the
+            service, so it is disabled by default.
+
+    Returns:
+        list: New :class:`awacs.aws.Statement` objects.
+    """
+    compacted = []
+    for statement in statements:
+        copied = dict(statement.properties)
+        for name in ("Action", "Resource"):
+            if name in copied:
+                copied[name] = list(copied[name])
+        compacted.append(compact_statement_properties(copied))
+
+    # Merging on one property can make other statements mergeable on the
+    # other one, so merge until nothing changes.
+    count = None
+    while count != len(compacted):
+        count = len(compacted)
+        for merged_property in ("Action", "Resource"):
+            compacted = [
+                compact_statement_properties(properties)
+                for properties in merge_statements(compacted,
+                                                   merged_property)
+            ]
+
+    if service_wildcards:
+        compacted = [
+            compact_statement_properties(properties, service_wildcards)
+            for properties in compacted
+        ]
+    return [Statement(**properties) for properties in compacted]
+
+
+def compact_policy(policy, service_wildcards=False):
+    """Returns an equivalent, smaller copy of an :class:`awacs.aws.Policy`.
+
+    See :func:`compact_statements` for the arguments. The bytes saved are
+    logged, and :func:`get_policy_savings` computes them for any two
+    policies.
+    """
+    properties = dict(policy.properties)
+    properties["Statement"] = compact_statements(
+        policy.properties["Statement"], service_wildcards
+    )
+    compacted = type(policy)(**properties)
+    savings = get_policy_savings(policy, compacted)
+    if savings.saved_bytes:
+        logger.debug(
+            "Compacted IAM policy from %d to %d statements, saving %d of "
+            "%d bytes.", savings.statements_before, savings.statements_after,
+            savings.saved_bytes, savings.bytes_before)
+    return compacted
+
+
+def get_policy_savings(before, after):
+    """Returns the :class:`PolicySavings` between two policies."""
+    return PolicySavings(
+        len(before.properties["Statement"]),
+        len(after.properties["Statement"]),
+        get_policy_size(before),
+        get_policy_size(after),
+    )
@@ -4,7 +4,7 @@ from troposphere import (
 from troposphere.rds import DBInstance, DBSubnetGroup
 from troposphere.route53 import RecordSetType
 
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 from stacker.blueprints.variables.types import (
     CFNNumber,
     CFNString,
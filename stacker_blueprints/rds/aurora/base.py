@@ -1,6 +1,8 @@
+import re
+
 from troposphere import (
-    GetAtt, NoValue, Output, Ref, Tags,
-    ec2,
+    GetAtt, NoValue, Output, Ref, Sub, Tags,
+    ec2, rds,
 )
 from troposphere.rds import (
     DBSubnetGroup,
@@ -8,12 +10,38 @@ from troposphere.rds import (
     DBCluster,
 )
 from troposphere.route53 import RecordSetType
-
-from stacker.blueprints.base import Blueprint
+from troposphere.validators import integer
+
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.parameter_presets import get_parameters
+from stacker_blueprints.util import (
+    extend_props,
+    get_resource_class,
+    lazy_import,
+)
 from stacker.blueprints.variables.types import CFNString
+from stacker.util import cf_safe_name
 
 from stacker_blueprints.rds.base import validate_backup_retention_period
 
+aas = lazy_import("troposphere.applicationautoscaling")
+
+DBInstance = extend_props(
+    rds.DBInstance,
+    PromotionTier=(integer, False),
+)
+DBClusterEndpoint = get_resource_class(
+    rds,
+    "DBClusterEndpoint",
+    "AWS::RDS::DBClusterEndpoint",
+    {
+        "DBClusterIdentifier": (basestring, True),
+        "EndpointType": (basestring, True),
+        "ExcludedMembers": ([basestring], False),
+        "StaticMembers": ([basestring], False),
+    },
+)
+
 # Resource name constants
 SUBNET_GROUP = "SubnetGroup"
 PARAMETER_GROUP = "ClusterParameterGroup"
@@ -21,6 +49,152 @@ SECURITY_GROUP = "SecurityGroup"
 DBCLUSTER = "DBCluster"
 DNS_RECORD = "DBClusterMasterDnsRecord"
 DNS_READ_RECORD = "DBClusterReadDnsRecord"
+WRITER_INSTANCE = "DBClusterWriterInstance"
+REPLICA_SCALABLE_TARGET = "ReplicaScalableTarget"
+REPLICA_SCALING_POLICY = "ReplicaScalingPolicy"
+
+REPLICA_SCALING_ROLE = (
+    "arn:${AWS::Partition}:iam::${AWS::AccountId}:role/aws-service-role/"
+    "rds.application-autoscaling.amazonaws.com/"
+    "AWSServiceRoleForApplicationAutoScaling_RDSCluster"
+)
+# Aurora clusters have at most 15 replicas.
+MAX_REPLICAS = 15
+# The predefined metric and default target of each ReplicaScaling metric.
+REPLICA_SCALING_METRICS = {
+    "cpu": ("RDSReaderAverageCPUUtilization", 70.0),
+    "connections": ("RDSReaderAverageDatabaseConnections", None),
+}
+REPLICA_SCALING_DEFAULTS = {
+    "min": 1,
+    "metric": "cpu",
+    "scale-in-cooldown": 300,
+    "scale-out-cooldown": 300,
+    "instance-class": "",
+}
+
+
+# Failover promotes the replicas of the lowest tier first.
+MAX_PROMOTION_TIER = 15
+ENDPOINT_TYPES = ("READER", "ANY")
+ENDPOINT_NAME = re.compile(r"^[a-z][a-z0-9-]*$")
+# The read.<hostname> CNAME already points at the reader endpoint.
+RESERVED_ENDPOINT_NAMES = frozenset(["read"])
+READER_GROUP_DEFAULTS = {
+    "count": 1,
+    "promotion-tier": 1,
+}
+CUSTOM_ENDPOINT_KEYS = ("groups", "exclude-groups", "type")
+
+
+def check_unique_titles(names, kind):
+    """Raises a ValueError if names only differ by their hyphens, which
+    would give them the same logical IDs."""
+    titles = {}
+    for name in sorted(names):
+        title = cf_safe_name(name)
+        if title in titles:
+            raise ValueError("%s names %s and %s are too similar." % (
+                kind, titles[title], name))
+        titles[title] = name
+
+
+def validate_reader_groups(groups):
+    """Validates the ReaderGroups variable, and fills in its defaults."""
+    validated = {}
+    for name, group in groups.items():
+        if not ENDPOINT_NAME.match(name):
+            raise ValueError("Reader group names must be lowercase letters, "
+                             "digits and hyphens, not %r." % (name,))
+        unknown = set(group) - set(READER_GROUP_DEFAULTS) - \
+            set(["instance-class"])
+        if unknown:
+            raise ValueError("Unknown keys for reader group %s: %s" % (
+                name, ", ".join(sorted(unknown))))
+        if "instance-class" not in group:
+            raise ValueError("Reader group %s needs an instance-class." %
+                             name)
+        group = dict(READER_GROUP_DEFAULTS, **group)
+        if not 1 <= group["count"] <= MAX_REPLICAS:
+            raise ValueError("Reader group %s must have between 1 and %d "
+                             "instances." % (name, MAX_REPLICAS))
+        if not 0 <= group["promotion-tier"] <= MAX_PROMOTION_TIER:
+            raise ValueError("The promotion-tier of reader group %s must be "
+                             "between 0 and %d." % (name,
+                                                    MAX_PROMOTION_TIER))
+        validated[name] = group
+    check_unique_titles(validated, "Reader group")
+    total = sum(group["count"] for group in validated.values())
+    if total > MAX_REPLICAS:
+        raise ValueError("Aurora clusters have at most %d replicas, the "
+                         "reader groups have %d." % (MAX_REPLICAS, total))
+    return validated
+
+
+def validate_custom_endpoints(endpoints):
+    """Validates the CustomEndpoints variable, and fills in its
+    defaults."""
+    validated = {}
+    for name, endpoint in endpoints.items():
+        if not ENDPOINT_NAME.match(name):
+            raise ValueError("Custom endpoint names must be lowercase "
+                             "letters, digits and hyphens, not %r." %
+                             (name,))
+        if name in RESERVED_ENDPOINT_NAMES:
+            raise ValueError("Custom endpoint name %s is reserved." % name)
+        unknown = set(endpoint) - set(CUSTOM_ENDPOINT_KEYS)
+        if unknown:
+            raise ValueError("Unknown keys for custom endpoint %s: %s" % (
+                name, ", ".join(sorted(unknown))))
+        if bool(endpoint.get("groups")) == \
+                bool(endpoint.get("exclude-groups")):
+            raise ValueError("Custom endpoint %s needs either groups or "
+                             "exclude-groups." % name)
+        endpoint = dict(endpoint)
+        endpoint.setdefault("type", "READER")
+        if endpoint["type"] not in ENDPOINT_TYPES:
+            raise ValueError("The type of custom endpoint %s must be one "
+                             "of: %s" % (name, ", ".join(ENDPOINT_TYPES)))
+        validated[name] = endpoint
+    check_unique_titles(validated, "Custom endpoint")
+    return validated
+
+
+def validate_replica_scaling(config):
+    """Validates the ReplicaScaling variable, and fills in its defaults."""
+    if not config:
+        return config
+    unknown = set(config) - set(REPLICA_SCALING_DEFAULTS) - \
+        set(["max", "target"])
+    if unknown:
+        raise ValueError("Unknown ReplicaScaling keys: %s" %
+                         ", ".join(sorted(unknown)))
+    if "max" not in config:
+        raise ValueError("ReplicaScaling needs a max.")
+    validated = dict(REPLICA_SCALING_DEFAULTS)
+    validated.update(config)
+    if not 0 <= validated["min"] <= validated["max"] <= MAX_REPLICAS:
+        raise ValueError("ReplicaScaling needs 0 <= min <= max <= %d, not "
+                         "%s and %s." % (MAX_REPLICAS, validated["min"],
+                                         validated["max"]))
+    if validated["metric"] not in REPLICA_SCALING_METRICS:
+        raise ValueError("The ReplicaScaling metric must be one of: %s" %
+                         ", ".join(sorted(REPLICA_SCALING_METRICS)))
+    default_target = REPLICA_SCALING_METRICS[validated["metric"]][1]
+    validated.setdefault("target", default_target)
+    if validated["target"] is None:
+        raise ValueError("ReplicaScaling needs a target for the %s "
+                         "metric." % validated["metric"])
+    if validated["target"] <= 0 or \
+            validated["metric"] == "cpu" and validated["target"] > 100:
+        raise ValueError("Invalid ReplicaScaling target %s for the %s "
+                         "metric." % (validated["target"],
+                                      validated["metric"]))
+    for cooldown in ("scale-in-cooldown", "scale-out-cooldown"):
+        if validated[cooldown] < 0:
+            raise ValueError("The ReplicaScaling %s can't be negative." %
+                             cooldown)
+    return validated
 
 
 class Cluster(Blueprint):
@@ -46,6 +220,14 @@ class Cluster(Blueprint):
                            "cluster.",
             "default": {},
         },
+        "ParameterPreset": {
+            "type": str,
+            "description": "A tuned set of ClusterParameters for the "
+                           "engine, ie oltp or analytics for "
+                           "aurora-postgresql, sized for each instance. "
+                           "ClusterParameters override it.",
+            "default": "",
+        },
         "VpcId": {
             "type": str,
             "description": "Vpc Id"
@@ -127,6 +309,49 @@ class Cluster(Blueprint):
             "default": "",
             "description": "Internal domain name, if you have one."
         },
+        "ReplicaScaling": {
+            "type": dict,
+            "description": "Scales the number of Aurora replicas with "
+                           "the average cpu (the default) or connections "
+                           "of the readers, with the keys min, max, "
+                           "metric, target, scale-in-cooldown, "
+                           "scale-out-cooldown and instance-class. "
+                           "Scaling needs a writer instance, which the "
+                           "blueprint creates with the instance-class if "
+                           "it is set, like WriterInstanceClass. The "
+                           "replicas copy the class of the writer.",
+            "validator": validate_replica_scaling,
+            "default": {},
+        },
+        "WriterInstanceClass": {
+            "type": str,
+            "description": "The instance class of a writer instance to "
+                           "create in the cluster. Required by "
+                           "ReaderGroups.",
+            "default": "",
+        },
+        "ReaderGroups": {
+            "type": dict,
+            "description": "Groups of Aurora replicas, by name, with the "
+                           "keys instance-class, count (1 by default) "
+                           "and promotion-tier (1 by default, 15 is "
+                           "promoted last on failover). They are created "
+                           "after the writer, so none of them becomes "
+                           "it.",
+            "validator": validate_reader_groups,
+            "default": {},
+        },
+        "CustomEndpoints": {
+            "type": dict,
+            "description": "Custom cluster endpoints, by name, ie "
+                           "analytics, with either the ReaderGroups they "
+                           "target in groups, or the ones they don't in "
+                           "exclude-groups, which also targets the "
+                           "replicas added later. The type is READER "
+                           "(the default) or ANY.",
+            "validator": validate_custom_endpoints,
+            "default": {},
+        },
         "ReplicationSourceArn": {
             "type": str,
             "description": "The Amazon Resource Name (ARN) of the source "
@@ -233,10 +458,19 @@ class Cluster(Blueprint):
         port = GetAtt(DBCLUSTER, "Endpoint.Port")
         return port
 
+    def get_cluster_parameters(self):
+        variables = self.get_variables()
+        return get_parameters(
+            self.engine() or variables["Engine"],
+            variables["DBFamily"],
+            variables["ParameterPreset"],
+            variables["ClusterParameters"],
+        )
+
     def create_parameter_group(self):
         t = self.template
         variables = self.get_variables()
-        params = variables["ClusterParameters"]
+        params = self.get_cluster_parameters()
         if params:
             t.add_resource(
                 DBClusterParameterGroup(
@@ -251,7 +485,7 @@ class Cluster(Blueprint):
         t = self.template
         variables = self.get_variables()
         parameter_group = NoValue
-        if variables["ClusterParameters"]:
+        if self.get_cluster_parameters():
             parameter_group = Ref(PARAMETER_GROUP)
 
         engine_version = variables["EngineVersion"] or NoValue
@@ -283,6 +517,158 @@ class Cluster(Blueprint):
             )
         )
 
+    def get_writer_instance_class(self):
+        variables = self.get_variables()
+        instance_class = variables["WriterInstanceClass"]
+        scaling_class = variables["ReplicaScaling"].get("instance-class")
+        if instance_class and scaling_class and \
+                instance_class != scaling_class:
+            raise ValueError("WriterInstanceClass %s and the ReplicaScaling "
+                             "instance-class %s differ." % (instance_class,
+                                                            scaling_class))
+        return instance_class or scaling_class
+
+    def create_writer_instance(self):
+        """Creates the writer instance of the cluster, if it has an
+        instance class.
+
+        Returns:
+            :class:`troposphere.rds.DBInstance`: The writer, or None.
+        """
+        t = self.template
+        variables = self.get_variables()
+        instance_class = self.get_writer_instance_class()
+        if not instance_class:
+            return None
+        writer = t.add_resource(
+            DBInstance(
+                WRITER_INSTANCE,
+                DBClusterIdentifier=Ref(DBCLUSTER),
+                DBInstanceClass=instance_class,
+                Engine=self.engine() or variables["Engine"],
+                Tags=self.get_tags(),
+            )
+        )
+        t.add_output(Output("WriterInstance", Value=Ref(writer)))
+        return writer
+
+    def create_replica_scaling(self, writer):
+        """Scales the number of Aurora replicas of the cluster."""
+        t = self.template
+        variables = self.get_variables()
+        scaling = variables["ReplicaScaling"]
+        if not scaling:
+            return
+        # Aurora only adds replicas to a cluster with a writer.
+        depends_on = {}
+        if writer:
+            depends_on["DependsOn"] = writer.title
+        target = t.add_resource(
+            aas.ScalableTarget(
+                REPLICA_SCALABLE_TARGET,
+                MinCapacity=scaling["min"],
+                MaxCapacity=scaling["max"],
+                ResourceId=Sub("cluster:${%s}" % DBCLUSTER),
+                RoleARN=Sub(REPLICA_SCALING_ROLE),
+                ScalableDimension="rds:cluster:ReadReplicaCount",
+                ServiceNamespace="rds",
+                **depends_on
+            )
+        )
+        metric_type = REPLICA_SCALING_METRICS[scaling["metric"]][0]
+        policy = t.add_resource(
+            aas.ScalingPolicy(
+                REPLICA_SCALING_POLICY,
+                PolicyName=Sub("${AWS::StackName}-replicas"),
+                PolicyType="TargetTrackingScaling",
+                ScalingTargetId=target.Ref(),
+                TargetTrackingScalingPolicyConfiguration=(
+                    aas.TargetTrackingScalingPolicyConfiguration(
+                        TargetValue=float(scaling["target"]),
+                        ScaleInCooldown=scaling["scale-in-cooldown"],
+                        ScaleOutCooldown=scaling["scale-out-cooldown"],
+                        PredefinedMetricSpecification=(
+                            aas.PredefinedMetricSpecification(
+                                PredefinedMetricType=metric_type,
+                            )
+                        ),
+                    )
+                ),
+            )
+        )
+        t.add_output(
+            Output("ReplicaScalableTargetId", Value=target.Ref())
+        )
+        t.add_output(
+            Output("ReplicaScalingPolicyArn", Value=policy.Ref())
+        )
+        t.add_output(Output("ReplicaMin", Value=str(scaling["min"])))
+        t.add_output(Output("ReplicaMax", Value=str(scaling["max"])))
+
+    def create_reader_groups(self, writer):
+        """Creates the instances of the ReaderGroups, after the writer.
+
+        Returns:
+            dict: The logical IDs of the instances of each group.
+        """
+        t = self.template
+        variables = self.get_variables()
+        instances = {}
+        if not variables["ReaderGroups"]:
+            return instances
+        # The first instance of a cluster becomes its writer.
+        if writer is None:
+            raise ValueError("ReaderGroups need a writer instance created "
+                             "before them, set WriterInstanceClass.")
+        for name, group in sorted(variables["ReaderGroups"].items()):
+            instances[name] = []
+            for index in range(group["count"]):
+                reader = t.add_resource(
+                    DBInstance(
+                        "%sReader%d" % (cf_safe_name(name), index),
+                        DBClusterIdentifier=Ref(DBCLUSTER),
+                        DBInstanceClass=group["instance-class"],
+                        Engine=self.engine() or variables["Engine"],
+                        PromotionTier=group["promotion-tier"],
+                        Tags=self.get_tags(),
+                        DependsOn=writer.title,
+                    )
+                )
+                instances[name].append(reader.title)
+        return instances
+
+    def get_custom_endpoint_title(self, name):
+        return "CustomEndpoint%s" % cf_safe_name(name)
+
+    def create_custom_endpoints(self, instances):
+        t = self.template
+        variables = self.get_variables()
+        for name, endpoint in sorted(variables["CustomEndpoints"].items()):
+            group_names = endpoint.get("groups") or endpoint["exclude-groups"]
+            unknown = set(group_names) - set(instances)
+            if unknown:
+                raise ValueError("Custom endpoint %s targets unknown reader "
+                                 "groups: %s" % (name,
+                                                 ", ".join(sorted(unknown))))
+            members = [Ref(title) for group in group_names
+                       for title in instances[group]]
+            if endpoint.get("groups"):
+                members_property = {"StaticMembers": members}
+            else:
+                members_property = {"ExcludedMembers": members}
+            title = self.get_custom_endpoint_title(name)
+            t.add_resource(
+                DBClusterEndpoint(
+                    title,
+                    DBClusterIdentifier=Ref(DBCLUSTER),
+                    EndpointType=endpoint["type"],
+                    **members_property
+                )
+            )
+            t.add_output(
+                Output(title, Value=GetAtt(title, "Endpoint"))
+            )
+
     def create_dns_records(self):
         t = self.template
         variables = self.get_variables()
@@ -318,6 +704,19 @@ class Cluster(Blueprint):
                     ResourceRecords=[self.get_read_endpoint()],
                 )
             )
+            for name in sorted(variables["CustomEndpoints"]):
+                title = self.get_custom_endpoint_title(name)
+                t.add_resource(
+                    RecordSetType(
+                        "%sDnsRecord" % title,
+                        HostedZoneId=variables["InternalZoneId"],
+                        Comment="RDS DB CNAME Record (%s endpoint)" % name,
+                        Name="%s.%s" % (name, hostname),
+                        Type="CNAME",
+                        TTL="120",
+                        ResourceRecords=[GetAtt(title, "Endpoint")],
+                    )
+                )
 
     def create_outputs(self):
         t = self.template
@@ -336,12 +735,21 @@ class Cluster(Blueprint):
             t.add_output(
                 Output("ReadDBCname", Value=Ref(DNS_READ_RECORD))
             )
+            for name in sorted(self.get_variables()["CustomEndpoints"]):
+                title = self.get_custom_endpoint_title(name)
+                t.add_output(
+                    Output("%sDBCname" % title,
+                           Value=Ref("%sDnsRecord" % title))
+                )
 
     def create_template(self):
         self.create_subnet_group()
         self.create_security_group()
         self.create_parameter_group()
         self.create_cluster()
+        writer = self.create_writer_instance()
+        self.create_replica_scaling(writer)
+        self.create_custom_endpoints(self.create_reader_groups(writer))
         self.create_dns_records()
         self.create_outputs()
 
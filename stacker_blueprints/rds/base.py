@@ -8,12 +8,13 @@ from troposphere.rds import (
 )
 from troposphere.route53 import RecordSetType
 
-from stacker.blueprints.base import Blueprint
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.parameter_presets import get_parameters
 from stacker.blueprints.variables.types import CFNString
 
 RDS_ENGINES = ["MySQL", "oracle-se1", "oracle-se", "oracle-ee", "sqlserver-ee",
                "sqlserver-se", "sqlserver-ex", "sqlserver-web", "postgres",
-               "aurora"]
+               "aurora", "aurora-postgresql"]
 
 # Resource name constants
 SUBNET_GROUP = "RDSSubnetGroup"
@@ -71,6 +72,14 @@ class BaseRDS(Blueprint):
             "type": dict,
             "default": {},
         },
+        "ParameterPreset": {
+            "type": str,
+            "description": "A tuned set of DatabaseParameters for the "
+                           "engine and InstanceType, ie oltp or analytics "
+                           "for postgres. DatabaseParameters override it. "
+                           "Requires DBFamily.",
+            "default": "",
+        },
         "VpcId": {
             "type": str,
             "description": "Vpc Id"},
@@ -243,7 +252,13 @@ class BaseRDS(Blueprint):
     def create_parameter_group(self):
         t = self.template
         variables = self.get_variables()
-        params = variables["DatabaseParameters"]
+        params = get_parameters(
+            self.engine() or variables["Engine"],
+            variables["DBFamily"],
+            variables["ParameterPreset"],
+            variables["DatabaseParameters"],
+            instance_class=variables["InstanceType"],
+        )
         t.add_resource(
             DBParameterGroup(
                 "ParameterGroup",
@@ -320,6 +335,8 @@ class BaseRDS(Blueprint):
         variables = self.get_variables()
         if variables.get("DBFamily"):
             self.create_parameter_group()
+        elif variables["ParameterPreset"]:
+            raise ValueError("ParameterPreset requires DBFamily.")
 
         if variables.get("EngineMajorVersion"):
             self.create_option_group()
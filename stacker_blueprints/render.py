@@ -0,0 +1,82 @@
+"""Renders many blueprints at once, in a pool of processes.
+
+Building troposphere objects is CPU bound, so large configs render faster
+when their blueprints are spread across processes. Blueprints are pickled
+to the workers with their variables already resolved, and only the
+rendered JSON comes back, never the troposphere objects.
+"""
+import logging
+import multiprocessing
+import time
+import traceback
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+class RenderResult(namedtuple("RenderResult",
+                              ["name", "version", "rendered", "seconds"])):
+    """The outcome of rendering one blueprint.
+
+    Attributes:
+        name (str): The name of the blueprint.
+        version (str): The short md5 stacker uses as the template version.
+        rendered (str): The template JSON.
+        seconds (float): How long rendering took, in the worker.
+    """
+
+    __slots__ = ()
+
+
+def render_blueprint(blueprint):
+    """Renders a blueprint whose variables are resolved.
+
+    Returns:
+        :class:`RenderResult`: The rendered template.
+
+    Raises:
+        RuntimeError: If rendering fails, with the name of the blueprint
+            and the original traceback, which python 2 would otherwise lose
+            on the way back from a worker.
+    """
+    start = time.time()
+    try:
+        version, rendered = blueprint.render_template()
+    except Exception:
+        raise RuntimeError("Failed to render %s:\n%s" % (
+            blueprint.name, traceback.format_exc()))
+    return RenderResult(blueprint.name, version, rendered,
+                        time.time() - start)
+
+
+def render_blueprints(blueprints, processes=None):
+    """Renders blueprints in a pool of processes.
+
+    Args:
+        blueprints (list): Blueprints whose variables are resolved.
+        processes (int, optional): The number of worker processes, defaults
+            to the number of CPUs. With a single process, or a single
+            blueprint, everything is rendered in the current process.
+
+    Returns:
+        list: A :class:`RenderResult` per blueprint, in the same order.
+    """
+    blueprints = list(blueprints)
+    processes = min(processes or multiprocessing.cpu_count(), len(blueprints))
+    if processes <= 1:
+        return [render_blueprint(blueprint) for blueprint in blueprints]
+
+    logger.debug("Rendering %d blueprints in %d processes.",
+                 len(blueprints), processes)
+    pool = multiprocessing.Pool(processes)
+    try:
+        # One blueprint at a time, since their render times vary a lot.
+        results = pool.map(render_blueprint, blueprints, 1)
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    return results
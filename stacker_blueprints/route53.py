@@ -1,6 +1,12 @@
+import csv
+import itertools
+import json
 from hashlib import md5
 
-from stacker.blueprints.base import Blueprint
+import yaml
+
+from .base import Blueprint
+from .util import batched
 
 from troposphere import (
     Ref,
@@ -18,13 +24,15 @@ logger = logging.getLogger(__name__)
 CLOUDFRONT_ZONE_ID = "Z2FDTNDATAQYW2"
 
 # reference:
-#   https://docs.aws.amazon.com/general/latest/gr/rande.html#elb_region
+#   https://docs.aws.amazon.com/general/latest/gr/elb.html
+# Classic and Application load balancers.
 ELB_ZONE_IDS = {
     'us-east-2': 'Z3AADJGX6KTTL2',
     'us-east-1': 'Z35SXDOTRQ7X7K',
     'us-west-1': 'Z368ELLRRE2KJ0',
     'us-west-2': 'Z1H1FL5HABSF5',
     'ca-central-1': 'ZQSVJUPU6J1EY',
+    'ap-east-1': 'Z3DQVH9N71FHZ0',
     'ap-south-1': 'ZP97RAFLXTNZK',
     'ap-northeast-2': 'ZWKZPGTI48KDX',
     'ap-southeast-1': 'Z1LMS91P8CMLE5',
@@ -34,9 +42,30 @@ ELB_ZONE_IDS = {
     'eu-west-1': 'Z32O12XQLNTSW2',
     'eu-west-2': 'ZHURV8PSTC4K8',
     'eu-west-3': 'Z3Q77PNBQS71R4',
+    'eu-north-1': 'Z23TAZQQSLQ46U',
     'sa-east-1': 'Z2P70J7HTTTPLU',
 }
 
+# Network load balancers.
+NLB_ZONE_IDS = {
+    'us-east-2': 'ZLMOA37VPKANP',
+    'us-east-1': 'Z26RNL4JYFTOTI',
+    'us-west-1': 'Z24FKFUX50B4VW',
+    'us-west-2': 'Z18D5FSROUN65G',
+    'ca-central-1': 'Z2EPGBW3API2WT',
+    'ap-south-1': 'ZVDDRBQ08TROA',
+    'ap-northeast-2': 'ZIBE1TIR4HY56',
+    'ap-southeast-1': 'ZKVM4W9LS7TM',
+    'ap-southeast-2': 'ZCT6FZBF4DROD',
+    'ap-northeast-1': 'Z31USIVHYNEOWT',
+    'eu-central-1': 'Z3F0SRJ5LGBH90',
+    'eu-west-1': 'Z2IFOLAFXWLO4F',
+    'eu-west-2': 'ZD4D7Y8KGAS4G',
+    'eu-west-3': 'Z1CMS0P5QUZ6D5',
+    'eu-north-1': 'Z1UDT6IFJ4EJM',
+    'sa-east-1': 'ZTK26PT1VY4CU',
+}
+
 # reference:
 #   https://docs.aws.amazon.com/general/latest/gr/rande.html#s3_region
 S3_WEBSITE_ZONE_IDS = {
@@ -57,10 +86,128 @@ S3_WEBSITE_ZONE_IDS = {
     "s3-website-sa-east-1.amazonaws.com": "Z7KQH4QJS55SO",
 }
 
+# reference:
+#   https://docs.aws.amazon.com/general/latest/gr/apigateway.html
+# Regional custom domain names. Edge optimized ones are CloudFront
+# distributions.
+API_GATEWAY_ZONE_IDS = {
+    'us-east-2': 'ZOJJZC49E0EPZ',
+    'us-east-1': 'Z1UJRXOUMOOFQ8',
+    'us-west-1': 'Z2MUQ32089INYE',
+    'us-west-2': 'Z2OJLYMUO9EFXC',
+    'ca-central-1': 'Z19DQILCV0OWEC',
+    'ap-south-1': 'Z3VO1THU9YC4UR',
+    'ap-northeast-2': 'Z20JF4UZKIW1U8',
+    'ap-southeast-1': 'ZL327KTPIQFUL',
+    'ap-southeast-2': 'Z2RPCDW04V8134',
+    'ap-northeast-1': 'Z1YSHQZHG15GKL',
+    'eu-central-1': 'Z1U9ULNL0V5AJ3',
+    'eu-west-1': 'ZLY8HYME6SFDD',
+    'eu-west-2': 'ZJ5UAJN8Y3Z2Q',
+    'eu-west-3': 'Z3KY65QIEKYHQQ',
+    'eu-north-1': 'Z3UWIKFBOOGXPP',
+    'sa-east-1': 'ZCMLWB8V5SYIT',
+}
+
+# reference:
+#   https://docs.aws.amazon.com/global-accelerator/latest/dg/about-accelerators.alias-records.html  # noqa
+GLOBAL_ACCELERATOR_ZONE_ID = "Z2BJ6XQ5FK7U4H"
+
+
+class AliasTargetResolver(object):
+    """Finds the hosted zone id of AWS endpoints used as alias targets.
+
+    The endpoint domains are compiled into a dictionary of domain suffixes
+    once, so resolving a name only takes a dictionary lookup for each of
+    its last few labels, whatever the number of endpoints known.
+
+    Names outside of the AWS endpoint domains are not resolved, since they
+    are usually other records of the zone itself. Names inside of them
+    that match no known endpoint, like a load balancer in a region missing
+    from the tables above, raise a ValueError.
+    """
+
+    def __init__(self):
+        suffixes = self.suffixes = {
+            "cloudfront.net": CLOUDFRONT_ZONE_ID,
+            "awsglobalaccelerator.com": GLOBAL_ACCELERATOR_ZONE_ID,
+        }
+        for region, zone_id in ELB_ZONE_IDS.items():
+            # Also covers the dualstack.<name> form of the DNS names.
+            suffixes["%s.elb.amazonaws.com" % region] = zone_id
+        for region, zone_id in NLB_ZONE_IDS.items():
+            suffixes["elb.%s.amazonaws.com" % region] = zone_id
+        for endpoint, zone_id in S3_WEBSITE_ZONE_IDS.items():
+            # Buckets are addressed as <bucket>.<endpoint>, and most
+            # regions answer to both the dash and dot forms of the endpoint.
+            labels = endpoint.split(".")
+            region = labels[0][len("s3-website-"):] or labels[1]
+            suffixes["s3-website-%s.amazonaws.com" % region] = zone_id
+            suffixes["s3-website.%s.amazonaws.com" % region] = zone_id
+        for region, zone_id in API_GATEWAY_ZONE_IDS.items():
+            suffixes["execute-api.%s.amazonaws.com" % region] = zone_id
+        self.max_labels = max(suffix.count(".") + 1 for suffix in suffixes)
+
+    @staticmethod
+    def is_aws_endpoint(labels):
+        """Tells if the labels of a name belong to an AWS endpoint domain
+        this resolver is supposed to know about."""
+        if labels[-2:] in (["cloudfront", "net"],
+                           ["awsglobalaccelerator", "com"]):
+            return True
+        if labels[-2:] != ["amazonaws", "com"]:
+            return False
+        service_labels = labels[-5:-2]
+        return "elb" in service_labels or "execute-api" in service_labels or \
+            any(label.startswith("s3-website") for label in service_labels)
+
+    def resolve(self, dns_name):
+        """Returns the hosted zone id of an alias target DNS name.
+
+        Args:
+            dns_name (str): The DNSName of the alias target.
+
+        Returns:
+            str: The hosted zone id of the AWS endpoint, or None if the
+                name isn't an AWS endpoint.
+
+        Raises:
+            ValueError: If the name is an AWS endpoint with an unknown
+                hosted zone id, or isn't a string (ie: a GetAtt).
+        """
+        if not isinstance(dns_name, basestring):
+            raise ValueError(
+                "Unable to find the hosted zone id of the alias target %r. "
+                "Set HostedZoneId on its AliasTarget." % (dns_name,)
+            )
+        labels = dns_name.rstrip(".").lower().split(".")
+        for i in range(max(0, len(labels) - self.max_labels), len(labels)):
+            zone_id = self.suffixes.get(".".join(labels[i:]))
+            if zone_id:
+                return zone_id
+        if self.is_aws_endpoint(labels):
+            raise ValueError(
+                "Unable to find the hosted zone id of the alias target "
+                "'%s'. Set HostedZoneId on its AliasTarget." % dns_name
+            )
+        return None
+
 
-CF_DOMAIN = ".cloudfront.net."
-ELB_DOMAIN = ".elb.amazonaws.com."
-S3_WEBSITE_PREFIX = "s3-website"
+ALIAS_TARGET_RESOLVER = AliasTargetResolver()
+
+# Bulk record sets are packed into RecordSetGroup resources, which Route 53
+# applies as a single change batch. A change batch is limited to 1000
+# ResourceRecord elements, and UPSERTs count every element twice.
+MAX_BULK_GROUP_RECORDS = 500
+# CloudFormation accepts templates of up to 460,800 bytes from S3. The size
+# of bulk record sets is estimated from their compact JSON, so leave room
+# for the indentation added when the template is rendered.
+MAX_BULK_SHARD_SIZE = 460800 // 2
+BULK_VALIDATION_BATCH_SIZE = 1000
+BULK_GROUP_NAME = "BulkRecordSetGroup%d"
+# Separates the values of the ResourceRecords column in CSV files.
+BULK_VALUE_SEPARATOR = "|"
+RECORD_SET_PROPERTIES = frozenset(route53.RecordSet.props)
 
 
 def get_record_set_md5(rs_name, rs_type):
@@ -72,6 +219,116 @@ def get_record_set_md5(rs_name, rs_type):
     return md5(rs_name + rs_type).hexdigest()
 
 
+def record_set_enabled(value):
+    """Accepts the 'Enabled' key of a record set, which may be a string when
+    read from a file."""
+    if isinstance(value, basestring):
+        return value.strip().lower() not in ("false", "no", "0")
+    return bool(value)
+
+
+def parse_csv_record_set(row):
+    """Turns a row from :class:`csv.DictReader` into a record set dict.
+
+    Empty cells are skipped, dotted column names (ie: AliasTarget.DNSName)
+    become nested dictionaries and the ResourceRecords column holds values
+    separated by `BULK_VALUE_SEPARATOR`.
+    """
+    record_set = {}
+    for column, value in row.items():
+        if not column or not value:
+            continue
+        value = value.strip()
+        if column == "ResourceRecords":
+            value = [v.strip() for v in value.split(BULK_VALUE_SEPARATOR)]
+        target = record_set
+        keys = column.strip().split(".")
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+    return record_set
+
+
+def read_record_sets_file(path):
+    """Yields record set dicts from a CSV or YAML file, one at a time.
+
+    Files ending in .csv need a header row naming the record set properties.
+    Any other file is read as YAML, where every document is either a record
+    set or a list of them. Documents are loaded one at a time, so splitting
+    a large file into several documents keeps memory usage down.
+    """
+    with open(path) as fd:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(fd):
+                yield parse_csv_record_set(row)
+        else:
+            for document in yaml.safe_load_all(fd):
+                if document is None:
+                    continue
+                if isinstance(document, dict):
+                    document = [document]
+                for record_set in document:
+                    yield record_set
+
+
+def get_bulk_record_set_error(rs_dict):
+    """Returns why a bulk record set dict is invalid, or None if it's valid.
+
+    This is a cheap, structural check run before any troposphere objects
+    are created.
+    """
+    if not isinstance(rs_dict, dict):
+        return "must be a dictionary"
+    missing = [key for key in ("Name", "Type") if not rs_dict.get(key)]
+    if missing:
+        return "missing %s" % ", ".join(missing)
+    unknown = set(rs_dict) - RECORD_SET_PROPERTIES - set(["Enabled"])
+    if unknown:
+        return "unknown properties %s" % ", ".join(sorted(unknown))
+    if "HostedZoneId" in rs_dict or "HostedZoneName" in rs_dict:
+        return "the hosted zone is set on the RecordSetGroup"
+    has_alias = "AliasTarget" in rs_dict
+    if has_alias == ("ResourceRecords" in rs_dict):
+        return "needs either ResourceRecords or AliasTarget"
+    if has_alias:
+        alias_target = rs_dict["AliasTarget"]
+        if not isinstance(alias_target, dict) or \
+                not alias_target.get("DNSName"):
+            return "AliasTarget needs a DNSName"
+        if "TTL" in rs_dict:
+            return "TTL cannot be used with an AliasTarget"
+    else:
+        resource_records = rs_dict["ResourceRecords"]
+        if not isinstance(resource_records, list) or not resource_records:
+            return "ResourceRecords must be a non-empty list"
+        if rs_dict.get("TTL") in (None, ""):
+            return "missing TTL"
+    return None
+
+
+def validate_bulk_record_sets(record_set_dicts, offset=0):
+    """Validates a batch of bulk record set dicts.
+
+    Args:
+        record_set_dicts (list): The batch of record set dicts.
+        offset (int): The position of the batch in the whole list, used to
+            number the records in the error message.
+
+    Raises:
+        ValueError: Listing every invalid record set in the batch.
+    """
+    errors = []
+    for i, rs_dict in enumerate(record_set_dicts, offset):
+        error = get_bulk_record_set_error(rs_dict)
+        if error:
+            name = rs_dict.get("Name") if isinstance(rs_dict, dict) else None
+            errors.append("record set %d (%s): %s" % (i, name, error))
+    if errors:
+        raise ValueError(
+            "Invalid bulk record sets:\n  %s" % "\n  ".join(errors)
+        )
+
+
 def add_hosted_zone_id_if_missing(record_set, hosted_zone_id):
     """Add HostedZoneId to Trophosphere record_set object if missing."""
     if not getattr(record_set, "HostedZoneId", None):
@@ -118,6 +375,47 @@ class DNSRecords(Blueprint):
                            "Also accepts an optional 'Enabled' boolean.",
             "default": {}
         },
+        "BulkRecordSets": {
+            "type": list,
+            "description": "A (potentially very large) list of record set "
+                           "dictionaries. Instead of one resource per "
+                           "record, these are validated in batches and "
+                           "packed into BulkGroupCount RecordSetGroup "
+                           "resources. Also accepts an optional 'Enabled' "
+                           "boolean.",
+            "default": [],
+        },
+        "BulkRecordSetsFile": {
+            "type": str,
+            "description": "Path to a CSV or YAML file of record sets, "
+                           "handled like BulkRecordSets. The file is read "
+                           "as a stream, and only the record sets of this "
+                           "shard are kept in memory.",
+            "default": "",
+        },
+        "BulkShardCount": {
+            "type": int,
+            "description": "The number of stacks the bulk record sets are "
+                           "split across. Create one stack per shard with "
+                           "the same bulk record sets and a different "
+                           "BulkShardIndex. Record sets are assigned to a "
+                           "shard by a hash of their Name and Type, so "
+                           "adding records never moves existing ones.",
+            "default": 1,
+        },
+        "BulkShardIndex": {
+            "type": int,
+            "description": "Which shard of the bulk record sets this stack "
+                           "manages, from 0 to BulkShardCount - 1.",
+            "default": 0,
+        },
+        "BulkGroupCount": {
+            "type": int,
+            "description": "The number of RecordSetGroup resources the "
+                           "bulk record sets of this shard are packed into. "
+                           "Changing it moves record sets between groups.",
+            "default": 10,
+        },
     }
 
     def add_hosted_zone_id_for_alias_target_if_missing(self, rs):
@@ -126,16 +424,9 @@ class DNSRecords(Blueprint):
         if alias_target:
             hosted_zone_id = getattr(alias_target, "HostedZoneId", None)
             if not hosted_zone_id:
-                dns_name = alias_target.DNSName
-                if dns_name.endswith(CF_DOMAIN):
-                    alias_target.HostedZoneId = CLOUDFRONT_ZONE_ID
-                elif dns_name.endswith(ELB_DOMAIN):
-                    region = dns_name.split('.')[-5]
-                    alias_target.HostedZoneId = ELB_ZONE_IDS[region]
-                elif dns_name in S3_WEBSITE_ZONE_IDS:
-                    alias_target.HostedZoneId = S3_WEBSITE_ZONE_IDS[dns_name]
-                else:
-                    alias_target.HostedZoneId = self.hosted_zone_id
+                alias_target.HostedZoneId = ALIAS_TARGET_RESOLVER.resolve(
+                    alias_target.DNSName
+                ) or self.hosted_zone_id
         return rs
 
     def create_record_set(self, rs_dict):
@@ -177,6 +468,115 @@ class DNSRecords(Blueprint):
                 )
         return record_set_groups
 
+    def create_bulk_record_set(self, rs_dict):
+        """Accept a bulk record_set dict. Return a Troposphere RecordSet
+        property for a RecordSetGroup."""
+        rs = route53.RecordSet.from_dict(None, rs_dict)
+        return self.add_hosted_zone_id_for_alias_target_if_missing(rs)
+
+    def iter_bulk_record_sets(self):
+        """Return an iterator over every bulk record_set dict."""
+        variables = self.get_variables()
+        record_sets = iter(variables["BulkRecordSets"])
+        if variables["BulkRecordSetsFile"]:
+            record_sets = itertools.chain(
+                record_sets,
+                read_record_sets_file(variables["BulkRecordSetsFile"])
+            )
+        return record_sets
+
+    def create_bulk_record_set_groups(self):
+        """Pack the bulk record sets of this shard into RecordSetGroups.
+        Return list of record_set_group objects."""
+        variables = self.get_variables()
+        shard_count = variables["BulkShardCount"]
+        shard_index = variables["BulkShardIndex"]
+        group_count = variables["BulkGroupCount"]
+
+        if shard_count < 1 or not (0 <= shard_index < shard_count):
+            raise ValueError("BulkShardIndex must be between 0 and "
+                             "BulkShardCount - 1.")
+        if group_count < 1:
+            raise ValueError("BulkGroupCount must be at least 1.")
+        if shard_count > 1 and variables["HostedZoneName"]:
+            raise ValueError("Bulk record sets split across several stacks "
+                             "need an existing 'HostedZoneId'.")
+
+        groups = [[] for _ in range(group_count)]
+        group_records = [0] * group_count
+        shard_size = total_size = 0
+        offset = 0
+        for batch in batched(self.iter_bulk_record_sets(),
+                             BULK_VALIDATION_BATCH_SIZE):
+            validate_bulk_record_sets(batch, offset)
+            offset += len(batch)
+            for rs_dict in batch:
+                # pop removes the 'Enabled' key and tests if True.
+                if not record_set_enabled(rs_dict.pop("Enabled", True)):
+                    continue
+                size = len(json.dumps(rs_dict, separators=(",", ":")))
+                total_size += size
+                digest = int(
+                    get_record_set_md5(rs_dict["Name"], rs_dict["Type"])[:8],
+                    16
+                )
+                if digest % shard_count != shard_index:
+                    continue
+                shard_size += size
+                group = (digest // shard_count) % group_count
+                groups[group].append(rs_dict)
+                group_records[group] += len(
+                    rs_dict.get("ResourceRecords", [None])
+                )
+
+        if shard_size > MAX_BULK_SHARD_SIZE:
+            raise ValueError(
+                "The bulk record sets of shard %d would exceed the "
+                "CloudFormation template size limit. Split them across at "
+                "least %d shards with BulkShardCount." % (
+                    shard_index, -(-total_size // MAX_BULK_SHARD_SIZE))
+            )
+
+        record_set_groups = []
+        for i, group in enumerate(groups):
+            if not group:
+                continue
+            if group_records[i] > MAX_BULK_GROUP_RECORDS:
+                raise ValueError(
+                    "%s would hold %d resource records, more than the %d "
+                    "Route 53 can change at once. Increase BulkGroupCount "
+                    "or BulkShardCount." % (
+                        BULK_GROUP_NAME % i, group_records[i],
+                        MAX_BULK_GROUP_RECORDS)
+                )
+            # Sorted so the order of the source records doesn't matter.
+            group.sort(key=lambda r: (r["Name"].lower(), r["Type"].upper(),
+                                      r.get("SetIdentifier", "")))
+            record_set_groups.append(
+                self.template.add_resource(
+                    route53.RecordSetGroup(
+                        BULK_GROUP_NAME % i,
+                        HostedZoneId=self.hosted_zone_id,
+                        RecordSets=[
+                            self.create_bulk_record_set(rs_dict)
+                            for rs_dict in group
+                        ],
+                    )
+                )
+            )
+        return record_set_groups
+
+    def get_template_cache_data(self):
+        data = super(DNSRecords, self).get_template_cache_data()
+        path = self.get_variables()["BulkRecordSetsFile"]
+        if path:
+            digest = md5()
+            with open(path, "rb") as fd:
+                for chunk in iter(lambda: fd.read(65536), b""):
+                    digest.update(chunk)
+            data["bulk_record_sets_file"] = digest.hexdigest()
+        return data
+
     def create_template(self):
         variables = self.get_variables()
         hosted_zone_name = variables["HostedZoneName"]
@@ -231,4 +631,6 @@ class DNSRecords(Blueprint):
         )
 
         self.create_record_set_groups(variables["RecordSetGroups"])
+        if variables["BulkRecordSets"] or variables["BulkRecordSetsFile"]:
+            self.create_bulk_record_set_groups()
         return self.create_record_sets(variables["RecordSets"])
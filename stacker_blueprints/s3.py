@@ -1,4 +1,4 @@
-from stacker.blueprints.base import Blueprint
+from .sharding import ShardedBlueprint
 from troposphere import (
     FindInMap,
     GetAtt,
@@ -38,7 +38,15 @@ S3_WEBSITE_ENDPOINTS = {
 }
 
 
-class Buckets(Blueprint):
+class Buckets(ShardedBlueprint):
+    """Manages the creation of S3 buckets, and of policies giving roles
+    access to them.
+
+    The buckets can be split across several stacks, see
+    :mod:`stacker_blueprints.sharding`. Each stack then gives the roles
+    access to the buckets of its shard.
+    """
+
     VARIABLES = {
         "Buckets": {
             "type": dict,
@@ -69,7 +77,18 @@ class Buckets(Blueprint):
 
         bucket_ids = []
 
-        for title, attrs in variables["Buckets"].items():
+        # Website buckets add a bucket policy and two more outputs, and the
+        # role policies are added once.
+        buckets = self.get_shard_items(
+            list(variables["Buckets"].items()), lambda bucket: bucket[0],
+            resources_per_item=lambda bucket: (
+                2 if "WebsiteConfiguration" in bucket[1] else 1),
+            outputs_per_item=lambda bucket: (
+                5 if "WebsiteConfiguration" in bucket[1] else 3),
+            fixed_resources=(bool(variables["ReadWriteRoles"]) +
+                             bool(variables["ReadRoles"])),
+        )
+        for title, attrs in buckets:
             bucket_id = Ref(title)
             t.add_resource(s3.Bucket.from_dict(title, attrs))
             t.add_output(Output(title + "BucketId", Value=bucket_id))
@@ -132,3 +151,5 @@ class Buckets(Blueprint):
                     Roles=read_only_roles,
                 )
             )
+
+        self.export_outputs()
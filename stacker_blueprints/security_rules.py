@@ -1,5 +1,5 @@
 from troposphere.ec2 import SecurityGroupIngress, SecurityGroupEgress
-from stacker.blueprints.base import Blueprint
+from .sharding import ShardedBlueprint
 
 CLASS_MAP = {
     "IngressRules": SecurityGroupIngress,
@@ -7,7 +7,7 @@ CLASS_MAP = {
 }
 
 
-class Rules(Blueprint):
+class Rules(ShardedBlueprint):
     """Used to add Ingress/Egress rules to existing security groups.
 
     This blueprint uses two variables:
@@ -32,6 +32,9 @@ class Rules(Blueprint):
           ToPort: 80
           GroupId: ${output WebserverStack::SecurityGroup}
           IpProtocol: tcp
+
+    The rules can be split across several stacks, see
+    :mod:`stacker_blueprints.sharding`.
     """
 
     VARIABLES = {
@@ -60,9 +63,15 @@ class Rules(Blueprint):
     def create_security_rules(self):
         t = self.template
         variables = self.get_variables()
-        for rule_type, rule_class in CLASS_MAP.items():
-            for rule_title, rule_attrs in variables[rule_type].items():
-                t.add_resource(rule_class.from_dict(rule_title, rule_attrs))
+        rules = [
+            (rule_type, rule_title, rule_attrs)
+            for rule_type in CLASS_MAP
+            for rule_title, rule_attrs in variables[rule_type].items()
+        ]
+        rules = self.get_shard_items(rules, lambda rule: rule[1])
+        for rule_type, rule_title, rule_attrs in rules:
+            rule_class = CLASS_MAP[rule_type]
+            t.add_resource(rule_class.from_dict(rule_title, rule_attrs))
 
     def create_template(self):
         self.create_security_rules()
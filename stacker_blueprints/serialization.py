@@ -0,0 +1,119 @@
+"""Serializes templates to minified JSON.
+
+Troposphere pretty prints templates, which makes them several times
+larger, and converts every object to a dictionary before serializing it,
+which is slow for large templates. When the
+`STACKER_BLUEPRINTS_MINIFY_TEMPLATES` environment variable is set, the
+blueprints of this package render their templates without whitespace, by
+serializing the troposphere objects directly. Keys are sorted, so the same
+template always renders to the same bytes, and two renders can be diffed.
+
+:func:`write_template` streams a template to a file as it is serialized,
+without building the whole JSON in memory.
+"""
+import json
+import os
+
+from troposphere import BaseAWSObject
+
+MINIFY_ENV = "STACKER_BLUEPRINTS_MINIFY_TEMPLATES"
+
+SEPARATORS = (",", ":")
+
+# Chunks are written to the file once they add up to this many bytes.
+BUFFER_SIZE = 64 * 1024
+
+
+def minify_from_environment(environ=None):
+    """Returns whether templates should be minified."""
+    environ = os.environ if environ is None else environ
+    return environ.get(MINIFY_ENV, "").lower() not in ("", "0", "false")
+
+
+def encode_object(obj):
+    """Returns the JSON representation of a troposphere or awacs object.
+
+    Used as the `default` of the JSON encoder, which calls it again for
+    the objects nested in what it returns. `troposphere.encode_to_dict`
+    instead walks the whole dictionary returned by every nested object
+    again, which makes it the slowest part of rendering large templates.
+    """
+    if isinstance(obj, BaseAWSObject):
+        # Same as BaseAWSObject.to_dict, without encoding the properties.
+        if obj.do_validation:
+            obj._validate_props()
+            obj.validate()
+        if obj.properties:
+            return obj.resource
+        elif hasattr(obj, "resource_type"):
+            return dict((key, value) for key, value in obj.resource.items()
+                        if key != "Properties")
+        return {}
+    elif hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    elif hasattr(obj, "JSONrepr"):
+        return obj.JSONrepr()
+    raise TypeError("%r is not JSON serializable" % (obj,))
+
+
+ENCODER = json.JSONEncoder(sort_keys=True, separators=SEPARATORS,
+                           default=encode_object)
+
+
+def get_template_sections(template):
+    """Returns the sections of a troposphere template, as
+    `Template.to_dict` does, but without encoding them."""
+    sections = {
+        "Description": template.description,
+        "Metadata": template.metadata,
+        "Conditions": template.conditions,
+        "Mappings": template.mappings,
+        "Outputs": template.outputs,
+        "Parameters": template.parameters,
+        "AWSTemplateFormatVersion": template.version,
+        "Transform": template.transform,
+    }
+    sections = dict((name, value) for name, value in sections.items()
+                    if value)
+    sections["Resources"] = template.resources
+    return sections
+
+
+def dumps_template(template):
+    """Returns the minified JSON of a troposphere template.
+
+    It is the same JSON as serializing `Template.to_dict` with sorted keys
+    and no whitespace.
+    """
+    return ENCODER.encode(get_template_sections(template))
+
+
+def write_template(template, fp, buffer_size=BUFFER_SIZE):
+    """Writes the minified JSON of a troposphere template to a file, as it
+    is encoded.
+
+    Args:
+        template (:class:`troposphere.Template`): The template.
+        fp: A file, or any object with a `write` method, like a
+            :class:`io.BytesIO` on python 2 or :class:`io.StringIO` on
+            python 3.
+        buffer_size (int): How many bytes to gather before each write.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    written = 0
+    buffered = []
+    buffered_size = 0
+    for chunk in ENCODER.iterencode(get_template_sections(template)):
+        buffered.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= buffer_size:
+            fp.write("".join(buffered))
+            written += buffered_size
+            buffered = []
+            buffered_size = 0
+    if buffered:
+        fp.write("".join(buffered))
+        written += buffered_size
+    return written
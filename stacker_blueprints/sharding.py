@@ -0,0 +1,176 @@
+"""Splits the resources of a blueprint across several sibling stacks.
+
+Some blueprints create one resource (or a few) per item of a variable, like
+the tables of :class:`stacker_blueprints.dynamodb.DynamoDB`, and quickly
+run into the CloudFormation limits on resources and outputs per template.
+Blueprints based on :class:`ShardedBlueprint` accept `ShardCount` and
+`ShardIndex` variables, and only render the items of their shard. A large
+set of items is then deployed by one stack per shard, all using the same
+variables except for `ShardIndex`, ie::
+
+    stacks:
+      - name: tables-0
+        class_path: stacker_blueprints.dynamodb.DynamoDB
+        variables:
+          ShardCount: 2
+          ShardIndex: 0
+          ShardExportPrefix: tables
+          Tables: *tables
+      - name: tables-1
+        class_path: stacker_blueprints.dynamodb.DynamoDB
+        variables:
+          ShardCount: 2
+          ShardIndex: 1
+          ShardExportPrefix: tables
+          Tables: *tables
+
+Items are assigned to shards by a hash of their title, so adding items
+doesn't move existing ones, and items referencing each other (through Ref,
+Fn::GetAtt, Fn::Sub or DependsOn) always end up in the same shard. Since
+an item's shard isn't known in advance, `ShardExportPrefix` exports every
+output as `<prefix>-<output name>`, for other stacks to import.
+"""
+import copy
+from hashlib import md5
+
+from troposphere import MAX_OUTPUTS, MAX_RESOURCES, Export
+
+from .base import Blueprint
+from .util import find_references
+
+SHARD_VARIABLES = {
+    "ShardCount": {
+        "type": int,
+        "description": "The number of stacks the items of this blueprint "
+                       "are split across.",
+        "default": 1,
+    },
+    "ShardIndex": {
+        "type": int,
+        "description": "The shard of the items this stack manages, from 0 "
+                       "to ShardCount - 1.",
+        "default": 0,
+    },
+    "ShardExportPrefix": {
+        "type": str,
+        "description": "If set, every output is exported as "
+                       "<ShardExportPrefix>-<output name>, so other stacks "
+                       "can import them without knowing which shard they "
+                       "are in.",
+        "default": "",
+    },
+}
+
+
+def get_shard(key, shard_count):
+    """Returns the shard, from 0 to shard_count - 1, of a key."""
+    return int(md5(key.encode("utf-8")).hexdigest()[:8], 16) % shard_count
+
+
+def group_dependencies(titles, references):
+    """Groups titles that reference each other, directly or not.
+
+    Args:
+        titles (list): The titles of the items.
+        references (dict): The names each title references, names that
+            aren't in `titles` are ignored.
+
+    Returns:
+        dict: Every title mapped to the smallest title of its group.
+    """
+    parents = dict((title, title) for title in titles)
+
+    def find(title):
+        while parents[title] != title:
+            parents[title] = parents[parents[title]]
+            title = parents[title]
+        return title
+
+    for title in titles:
+        for reference in references.get(title, ()):
+            if reference in parents and reference != title:
+                root, other = find(title), find(reference)
+                if root != other:
+                    parents[max(root, other)] = min(root, other)
+    return dict((title, find(title)) for title in titles)
+
+
+class ShardedBlueprint(Blueprint):
+    """A blueprint whose items can be split across several stacks.
+
+    Subclasses pick the items of their shard with :meth:`get_shard_items`
+    and call :meth:`export_outputs` once their outputs are added.
+    """
+
+    def defined_variables(self):
+        variables = super(ShardedBlueprint, self).defined_variables()
+        variables.update(copy.deepcopy(SHARD_VARIABLES))
+        return variables
+
+    def get_shard_items(self, items, get_title, resources_per_item=1,
+                        outputs_per_item=0, fixed_resources=0):
+        """Returns the items in the shard of this stack, in order.
+
+        Args:
+            items (list): The items, either troposphere objects or the
+                dictionaries they are built from.
+            get_title (callable): Returns the title of an item.
+            resources_per_item (int or callable): How many resources every
+                item adds, or a callable returning how many an item adds,
+                to check the shard against the template limits before
+                rendering it.
+            outputs_per_item (int or callable): How many outputs every item
+                adds, the same way.
+            fixed_resources (int): How many resources the template adds
+                besides the items.
+
+        Raises:
+            ValueError: If the shard variables are invalid, or the shard
+                has more items than a template can hold.
+        """
+        variables = self.get_variables()
+        shard_count = variables["ShardCount"]
+        shard_index = variables["ShardIndex"]
+        if shard_count < 1 or not (0 <= shard_index < shard_count):
+            raise ValueError("ShardIndex must be between 0 and "
+                             "ShardCount - 1.")
+
+        if shard_count > 1:
+            titles = [get_title(item) for item in items]
+            references = dict(
+                (title, find_references(item))
+                for title, item in zip(titles, items)
+            )
+            groups = group_dependencies(titles, references)
+            items = [
+                item for title, item in zip(titles, items)
+                if get_shard(groups[title], shard_count) == shard_index
+            ]
+
+        for per_item, limit, kind in (
+                (resources_per_item, MAX_RESOURCES - fixed_resources,
+                 "resources"),
+                (outputs_per_item, MAX_OUTPUTS, "outputs")):
+            if callable(per_item):
+                count = sum(per_item(item) for item in items)
+            else:
+                count = len(items) * per_item
+            if count > limit:
+                needed = -(-count * shard_count // limit)
+                raise ValueError(
+                    "Shard %d of %s has %d items, which can add more than "
+                    "the %d %s a template can hold. Split them across at "
+                    "least %d shards with ShardCount." % (
+                        shard_index, self.name, len(items), limit, kind,
+                        needed)
+                )
+        return items
+
+    def export_outputs(self):
+        """Exports every output of the template when ShardExportPrefix is
+        set."""
+        prefix = self.get_variables()["ShardExportPrefix"]
+        if not prefix:
+            return
+        for name, output in self.template.outputs.items():
+            output.Export = Export("%s-%s" % (prefix, name))
@@ -1,4 +1,4 @@
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
 
 from troposphere import (
     sns,
@@ -0,0 +1,155 @@
+"""Carves the subnets of a VPC out of its CIDR block.
+
+A layout is a list of tiers, ie public, private and data, each with a
+relative size, and a number of availability zones. Every tier gets one
+subnet per zone, and each subnet gets the largest power of two share of the
+CIDR block that doesn't exceed its tier's share, so the subnets never
+overlap and what's left at the end of the block stays free for later. In a
+10.0.0.0/16 VPC over two zones, a public tier of size 1 and a private tier
+of size 2 get::
+
+    public:  10.0.128.0/19, 10.0.160.0/19
+    private: 10.0.0.0/18, 10.0.64.0/18
+
+The subnets are allocated from the largest to the smallest, which keeps
+every one of them aligned on its size. Changing the tiers or the number of
+zones can move existing subnets, which replaces them.
+"""
+import re
+from collections import namedtuple
+
+# The subnet sizes AWS allows.
+MAX_SUBNET_PREFIX = 28
+MIN_SUBNET_PREFIX = 16
+
+TIER_NAME = re.compile(r"^[A-Za-z][A-Za-z0-9]*$")
+
+
+class SubnetTier(namedtuple("SubnetTier",
+                            ["name", "public", "cidr_blocks"])):
+    """The subnets of a tier.
+
+    Attributes:
+        name (str): The name of the tier, used in the logical IDs of its
+            resources.
+        public (bool): Whether the subnets route to the internet gateway,
+            instead of NAT.
+        cidr_blocks (list): The CIDR block of the subnet in each zone.
+    """
+
+    __slots__ = ()
+
+
+def parse_cidr(cidr):
+    """Returns the network address, as an integer, and the prefix length of
+    an IPv4 CIDR block.
+
+    Raises:
+        ValueError: If the CIDR block is invalid, or has host bits set.
+    """
+    try:
+        address, prefix = cidr.split("/")
+        octets = [int(octet) for octet in address.split(".")]
+        prefix = int(prefix)
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid CIDR block: %r" % (cidr,))
+    if len(octets) != 4 or not all(0 <= o <= 255 for o in octets) or \
+            not 0 <= prefix <= 32:
+        raise ValueError("Invalid CIDR block: %r" % (cidr,))
+    network = 0
+    for octet in octets:
+        network = network << 8 | octet
+    if network & ((1 << (32 - prefix)) - 1):
+        raise ValueError("CIDR block %s has host bits set." % cidr)
+    return network, prefix
+
+
+def format_cidr(network, prefix):
+    return "%s/%d" % (
+        ".".join(str(network >> shift & 255) for shift in (24, 16, 8, 0)),
+        prefix,
+    )
+
+
+def parse_tier(tier):
+    """Validates a tier from the SubnetTiers variable.
+
+    Returns:
+        tuple: The name, relative size and whether the tier is public.
+    """
+    name = tier.get("Name")
+    if not isinstance(name, basestring) or not TIER_NAME.match(name):
+        raise ValueError("Subnet tier names must be alphanumeric, not %r." %
+                         (name,))
+    size = tier.get("Size", 1)
+    if isinstance(size, bool) or not isinstance(size, (int, long, float)) \
+            or size <= 0:
+        raise ValueError("The size of subnet tier %s must be a positive "
+                         "number, not %r." % (name, size))
+    unknown = set(tier) - set(["Name", "Size", "Public"])
+    if unknown:
+        raise ValueError("Unknown subnet tier keys for %s: %s" % (
+            name, ", ".join(sorted(unknown))))
+    return name, size, bool(tier.get("Public", name.lower() == "public"))
+
+
+def carve_subnets(cidr_block, tiers, az_count):
+    """Splits a CIDR block between tiers of subnets.
+
+    Args:
+        cidr_block (str): The CIDR block of the VPC.
+        tiers (list): Dictionaries with the `Name` of each tier, its `Size`
+            relative to the other tiers (1 by default), and whether it is
+            `Public` (by default only for the tier named public).
+        az_count (int): The number of subnets per tier.
+
+    Returns:
+        list: A :class:`SubnetTier` per tier, in the same order.
+
+    Raises:
+        ValueError: If the tiers are invalid, or the CIDR block is too small
+            for the smallest subnet to be a /28.
+    """
+    network, prefix = parse_cidr(cidr_block)
+    if not MIN_SUBNET_PREFIX <= prefix <= MAX_SUBNET_PREFIX:
+        raise ValueError("VPC CIDR blocks must be between /%d and /%d, not "
+                         "%s." % (MIN_SUBNET_PREFIX, MAX_SUBNET_PREFIX,
+                                  cidr_block))
+    if az_count < 1:
+        raise ValueError("At least one availability zone is needed.")
+    parsed = [parse_tier(tier) for tier in tiers]
+    if not parsed:
+        raise ValueError("At least one subnet tier is needed.")
+    names = [name.lower() for name, _, _ in parsed]
+    if len(set(names)) != len(names):
+        raise ValueError("Subnet tier names must be unique: %s" % (
+            ", ".join(names)))
+
+    total = sum(size for _, size, _ in parsed) * az_count
+    subnet_prefixes = []
+    for name, size, _ in parsed:
+        # The largest block that is at most size / total of the VPC.
+        bits = 0
+        while size * (1 << bits) < total:
+            bits += 1
+        if prefix + bits > MAX_SUBNET_PREFIX:
+            raise ValueError(
+                "%s is too small for the subnets of tier %s to be at least "
+                "/%d." % (cidr_block, name, MAX_SUBNET_PREFIX))
+        subnet_prefixes.append(prefix + bits)
+
+    allocations = sorted(
+        (subnet_prefix, index, zone)
+        for index, subnet_prefix in enumerate(subnet_prefixes)
+        for zone in range(az_count)
+    )
+    cidr_blocks = [[None] * az_count for _ in parsed]
+    offset = network
+    for subnet_prefix, index, zone in allocations:
+        cidr_blocks[index][zone] = format_cidr(offset, subnet_prefix)
+        offset += 1 << (32 - subnet_prefix)
+
+    return [
+        SubnetTier(name, public, blocks)
+        for (name, _, public), blocks in zip(parsed, cidr_blocks)
+    ]
@@ -0,0 +1,198 @@
+"""Reports how close rendered templates are to the CloudFormation limits.
+
+CloudFormation only rejects a template that is too large, or that has too
+many resources, outputs, parameters or mappings, once it is uploaded. When
+the `STACKER_BLUEPRINTS_TEMPLATE_BUDGET_WARN` or
+`STACKER_BLUEPRINTS_TEMPLATE_BUDGET_FAIL` environment variable is set to a
+percentage of those limits, the blueprints of this package measure their
+template after rendering it, log a report, and respectively log a warning
+or raise an error when any limit is used beyond that percentage::
+
+    STACKER_BLUEPRINTS_TEMPLATE_BUDGET_WARN=80 \\
+    STACKER_BLUEPRINTS_TEMPLATE_BUDGET_FAIL=100 stacker build ...
+
+The size limit defaults to the one of templates uploaded to S3, and can be
+changed with `STACKER_BLUEPRINTS_TEMPLATE_BUDGET_MAX_BYTES`, ie to 51200
+for stacks created without an S3 bucket.
+"""
+import json
+import logging
+import os
+from collections import namedtuple
+
+from troposphere import (
+    MAX_MAPPINGS,
+    MAX_OUTPUTS,
+    MAX_PARAMETERS,
+    MAX_RESOURCES,
+)
+
+logger = logging.getLogger(__name__)
+
+WARN_ENV = "STACKER_BLUEPRINTS_TEMPLATE_BUDGET_WARN"
+FAIL_ENV = "STACKER_BLUEPRINTS_TEMPLATE_BUDGET_FAIL"
+MAX_BYTES_ENV = "STACKER_BLUEPRINTS_TEMPLATE_BUDGET_MAX_BYTES"
+
+# The maximum size of a template uploaded to S3, templates passed in the
+# request body are limited to 51200 bytes.
+DEFAULT_MAX_BYTES = 460800
+
+# How many of the largest resources the report lists.
+DEFAULT_LARGEST_RESOURCES = 5
+
+# The template sections counted against a limit, and the limit.
+SECTION_LIMITS = [
+    ("Resources", MAX_RESOURCES),
+    ("Outputs", MAX_OUTPUTS),
+    ("Parameters", MAX_PARAMETERS),
+    ("Mappings", MAX_MAPPINGS),
+]
+
+
+def get_minified_size(value):
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+class TemplateBudget(namedtuple("TemplateBudget",
+                                ["name", "minified_bytes", "pretty_bytes",
+                                 "resources", "outputs", "parameters",
+                                 "mappings", "largest_resources"])):
+    """The measurements of a rendered template.
+
+    Attributes:
+        name (str): The name of the blueprint.
+        minified_bytes (int): The size of the template without whitespace.
+        pretty_bytes (int): The size of the template as rendered, which is
+            what is uploaded.
+        resources (int): The number of resources.
+        outputs (int): The number of outputs.
+        parameters (int): The number of parameters.
+        mappings (int): The number of mappings.
+        largest_resources (list): (logical id, minified bytes) tuples of the
+            largest resources, largest first.
+    """
+
+    __slots__ = ()
+
+    def get_usage(self, max_bytes=DEFAULT_MAX_BYTES):
+        """Returns (what, used, limit) tuples, for every limit."""
+        usage = [("template bytes", self.pretty_bytes, max_bytes)]
+        for section, limit in SECTION_LIMITS:
+            usage.append((section.lower(), getattr(self, section.lower()),
+                          limit))
+        return usage
+
+    def format(self, max_bytes=DEFAULT_MAX_BYTES):
+        lines = ["Template budget of %s (%d bytes minified):" % (
+            self.name, self.minified_bytes)]
+        for what, used, limit in self.get_usage(max_bytes):
+            lines.append("  %-15s %7d / %-7d %5.1f%%" % (
+                what, used, limit, 100.0 * used / limit))
+        if self.largest_resources:
+            lines.append("  largest resources:")
+            for title, size in self.largest_resources:
+                lines.append("    %-40s %7d bytes" % (title, size))
+        return "\n".join(lines)
+
+
+def get_template_budget(name, rendered, largest=DEFAULT_LARGEST_RESOURCES):
+    """Measures a rendered template.
+
+    Args:
+        name (str): The name of the blueprint.
+        rendered (str): The template JSON.
+        largest (int): How many of the largest resources to list.
+
+    Returns:
+        :class:`TemplateBudget`: The measurements.
+    """
+    template = json.loads(rendered)
+    resource_sizes = sorted(
+        ((get_minified_size(resource), title)
+         for title, resource in template.get("Resources", {}).items()),
+        reverse=True,
+    )
+    counts = dict(
+        (section.lower(), len(template.get(section, {})))
+        for section, _ in SECTION_LIMITS
+    )
+    return TemplateBudget(
+        name=name,
+        minified_bytes=get_minified_size(template),
+        pretty_bytes=len(rendered),
+        largest_resources=[
+            (title, size) for size, title in resource_sizes[:largest]
+        ],
+        **counts
+    )
+
+
+def parse_percent(environ, name):
+    value = environ.get(name)
+    if not value:
+        return None
+    try:
+        return float(value) / 100
+    except ValueError:
+        raise ValueError("%s must be a percentage, not %r." % (name, value))
+
+
+class BudgetThresholds(object):
+    """The share of the CloudFormation limits templates may use.
+
+    Args:
+        warn (float, optional): Logs a warning when a template uses more
+            than this ratio of a limit.
+        fail (float, optional): Raises an error when a template uses more
+            than this ratio of a limit.
+        max_bytes (int): The maximum size of a template.
+    """
+
+    def __init__(self, warn=None, fail=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.warn = warn
+        self.fail = fail
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        """Returns the thresholds configured through the environment, or
+        None if neither is set."""
+        environ = os.environ if environ is None else environ
+        warn = parse_percent(environ, WARN_ENV)
+        fail = parse_percent(environ, FAIL_ENV)
+        if warn is None and fail is None:
+            return None
+        return cls(
+            warn=warn,
+            fail=fail,
+            max_bytes=int(environ.get(MAX_BYTES_ENV, DEFAULT_MAX_BYTES)),
+        )
+
+    def get_exceeded(self, budget, ratio):
+        return [
+            (what, used, limit)
+            for what, used, limit in budget.get_usage(self.max_bytes)
+            if used > limit * ratio
+        ]
+
+    def check(self, budget):
+        """Logs the report of a template, and checks it against the
+        thresholds.
+
+        Raises:
+            ValueError: If the template goes over the fail threshold.
+        """
+        logger.info(budget.format(self.max_bytes))
+        if self.fail is not None:
+            exceeded = self.get_exceeded(budget, self.fail)
+            if exceeded:
+                raise ValueError(
+                    "The template of %s is over %g%% of its budget: %s." % (
+                        budget.name, self.fail * 100,
+                        ", ".join("%d of %d %s" % (used, limit, what)
+                                  for what, used, limit in exceeded)))
+        if self.warn is not None:
+            for what, used, limit in self.get_exceeded(budget, self.warn):
+                logger.warning(
+                    "The template of %s uses %d of %d %s (%.1f%%).",
+                    budget.name, used, limit, what, 100.0 * used / limit)
@@ -0,0 +1,163 @@
+"""An on-disk cache of rendered templates.
+
+Most stacks don't change between two runs of stacker, yet each run builds
+the troposphere objects of every blueprint and serializes them again. When
+the `STACKER_BLUEPRINTS_TEMPLATE_CACHE` environment variable points to a
+directory, the blueprints of this package store their rendered templates
+there, and reuse them as long as the blueprint class, the version of this
+package and the resolved variables are the same.
+
+The cache only knows about what a blueprint declares in
+:meth:`stacker_blueprints.base.Blueprint.get_template_cache_data`, so it
+should stay disabled while working on the blueprints themselves, since
+their code changes without the package version changing.
+"""
+import errno
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from . import __version__
+from .util import encode_value
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "STACKER_BLUEPRINTS_TEMPLATE_CACHE"
+MAX_ENTRIES_ENV = "STACKER_BLUEPRINTS_TEMPLATE_CACHE_MAX_ENTRIES"
+MAX_BYTES_ENV = "STACKER_BLUEPRINTS_TEMPLATE_CACHE_MAX_BYTES"
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+ENTRY_SUFFIX = ".json"
+
+
+def get_cache_key(blueprint_class, data):
+    """Returns a stable hash of a blueprint class and the data it renders
+    its template from.
+
+    Args:
+        blueprint_class (type): The class of the blueprint.
+        data (dict): What the rendered template depends on, usually the
+            resolved variables.
+
+    Returns:
+        str: The key of the template in the cache, or None if the data can't
+            be serialized, in which case the template can't be cached.
+    """
+    try:
+        serialized = json.dumps(
+            [
+                "%s.%s" % (blueprint_class.__module__,
+                           blueprint_class.__name__),
+                __version__,
+                data,
+            ],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=encode_value,
+        )
+    except (TypeError, ValueError) as e:
+        logger.debug("Not caching the template of %s: %s",
+                     blueprint_class.__name__, e)
+        return None
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class TemplateCache(object):
+    """A directory of rendered templates, one file per key.
+
+    Reading an entry updates its modification time, and the least recently
+    used entries are removed whenever a new one is stored and the cache
+    holds more than `max_entries` entries or `max_bytes` bytes.
+
+    Args:
+        path (str): The directory of the cache, created if missing.
+        max_entries (int): The maximum number of templates to keep.
+        max_bytes (int): The maximum total size of the templates to keep.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        """Returns the cache configured through the environment, or None if
+        it isn't enabled."""
+        environ = os.environ if environ is None else environ
+        path = environ.get(CACHE_DIR_ENV)
+        if not path:
+            return None
+        return cls(
+            path,
+            max_entries=int(environ.get(MAX_ENTRIES_ENV,
+                                        DEFAULT_MAX_ENTRIES)),
+            max_bytes=int(environ.get(MAX_BYTES_ENV, DEFAULT_MAX_BYTES)),
+        )
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Returns the template stored under key, or None."""
+        path = self.entry_path(key)
+        try:
+            with open(path) as fd:
+                rendered = fd.read()
+            os.utime(path, None)
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                logger.warning("Unable to read cached template %s: %s",
+                               path, e)
+            return None
+        return rendered
+
+    def set(self, key, rendered):
+        """Stores a template under key, then evicts old entries."""
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            # Written to a temporary file first, so concurrent runs never
+            # read a partial template.
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(rendered)
+            os.rename(tmp_path, self.entry_path(key))
+        except (IOError, OSError) as e:
+            logger.warning("Unable to cache template in %s: %s",
+                           self.path, e)
+            return
+        self.evict()
+
+    def entries(self):
+        """Returns (mtime, size, path) tuples of the entries, most recently
+        used first."""
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(reverse=True)
+        return entries
+
+    def evict(self):
+        """Removes the least recently used entries over the limits."""
+        count = total = 0
+        for _, size, path in self.entries():
+            count += 1
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,339 @@
+"""Compares two rendered templates, resource by resource.
+
+Resources are matched by logical ID. The blueprints keep logical IDs stable
+between renders: `vpc.VPC` names subnets after their tier and zone index,
+and `route53.DNSRecords` names record sets after
+:func:`stacker_blueprints.route53.get_record_set_md5`. Each change is
+classified as:
+
+- `add` and `remove`: the logical ID is only in the new, or the old,
+  template.
+- `modify`: properties or attributes changed, and CloudFormation updates
+  the resource in place.
+- `replace`: a property that CloudFormation can't update changed, or the
+  type changed, so the resource is recreated with a new physical ID.
+
+Replacement cascades: a property referencing a replaced resource changes
+too, and replaces its own resource if that property can't be updated.
+
+The properties that require a replacement are listed in
+:data:`REPLACEMENT_PROPERTIES` for the resource types of this package.
+Properties of other types are assumed to be updatable, so check the
+CloudFormation documentation, or a change set, for those.
+"""
+import json
+from collections import namedtuple
+
+from .util import find_references
+
+ADD = "add"
+REMOVE = "remove"
+MODIFY = "modify"
+REPLACE = "replace"
+
+# Means that changing any property replaces the resource.
+ANY_PROPERTY = "*"
+
+# Resource attributes compared along with the properties.
+RESOURCE_ATTRIBUTES = ("Condition", "CreationPolicy", "DeletionPolicy",
+                       "DependsOn", "Metadata", "UpdatePolicy",
+                       "UpdateReplacePolicy")
+
+SECURITY_GROUP_RULE = ("CidrIp", "CidrIpv6", "FromPort", "GroupId",
+                       "GroupName", "IpProtocol", "SourcePrefixListId",
+                       "SourceSecurityGroupId", "SourceSecurityGroupName",
+                       "SourceSecurityGroupOwnerId", "ToPort",
+                       "DestinationPrefixListId",
+                       "DestinationSecurityGroupId")
+
+REPLACEMENT_PROPERTIES = {
+    "AWS::ApplicationAutoScaling::ScalableTarget": (
+        "ResourceId", "ScalableDimension", "ServiceNamespace"),
+    "AWS::ApplicationAutoScaling::ScalingPolicy": (
+        "PolicyName", "ResourceId", "ScalableDimension", "ScalingTargetId",
+        "ServiceNamespace"),
+    "AWS::AutoScaling::AutoScalingGroup": ("AutoScalingGroupName",),
+    "AWS::AutoScaling::LaunchConfiguration": (ANY_PROPERTY,),
+    "AWS::DynamoDB::Table": ("KeySchema", "LocalSecondaryIndexes",
+                             "TableName"),
+    "AWS::EC2::EIP": ("Domain",),
+    "AWS::EC2::Instance": ("AvailabilityZone", "ImageId", "KeyName",
+                           "NetworkInterfaces", "PrivateIpAddress",
+                           "SecurityGroups", "SubnetId"),
+    "AWS::EC2::NatGateway": ("AllocationId", "SubnetId"),
+    "AWS::EC2::Route": ("DestinationCidrBlock", "DestinationIpv6CidrBlock",
+                        "RouteTableId"),
+    "AWS::EC2::RouteTable": ("VpcId",),
+    "AWS::EC2::SecurityGroup": ("GroupDescription", "GroupName", "VpcId"),
+    "AWS::EC2::SecurityGroupEgress": SECURITY_GROUP_RULE,
+    "AWS::EC2::SecurityGroupIngress": SECURITY_GROUP_RULE,
+    "AWS::EC2::Subnet": ("AvailabilityZone", "CidrBlock", "VpcId"),
+    "AWS::EC2::SubnetRouteTableAssociation": ("SubnetId",),
+    "AWS::EC2::VPC": ("CidrBlock",),
+    "AWS::EC2::VPCEndpoint": ("ServiceName", "VpcEndpointType", "VpcId"),
+    "AWS::ECS::Service": ("Cluster", "LaunchType", "LoadBalancers", "Role",
+                          "ServiceName"),
+    "AWS::ElastiCache::ReplicationGroup": (
+        "AtRestEncryptionEnabled", "CacheSubnetGroupName", "Engine", "Port",
+        "ReplicationGroupId", "TransitEncryptionEnabled"),
+    "AWS::IAM::Role": ("Path", "RoleName"),
+    "AWS::Kinesis::Stream": ("Name",),
+    "AWS::KMS::Alias": ("AliasName",),
+    "AWS::Lambda::Function": ("FunctionName",),
+    "AWS::Logs::LogGroup": ("LogGroupName",),
+    "AWS::RDS::DBCluster": ("AvailabilityZones", "DBClusterIdentifier",
+                            "DBSubnetGroupName", "DatabaseName", "Engine",
+                            "EngineMode", "KmsKeyId", "StorageEncrypted"),
+    "AWS::RDS::DBInstance": ("AvailabilityZone", "CharacterSetName",
+                             "DBClusterIdentifier", "DBInstanceIdentifier",
+                             "DBName", "DBSubnetGroupName", "KmsKeyId",
+                             "StorageEncrypted"),
+    "AWS::Route53::RecordSet": ("HostedZoneId", "HostedZoneName", "Name"),
+    "AWS::Route53::RecordSetGroup": ("HostedZoneId", "HostedZoneName"),
+    "AWS::S3::Bucket": ("BucketName",),
+    "AWS::SNS::Topic": ("TopicName",),
+    "AWS::SQS::Queue": ("FifoQueue", "QueueName"),
+}
+
+CHANGE_SYMBOLS = {ADD: "+", REMOVE: "-", MODIFY: "~", REPLACE: "!"}
+
+
+class ResourceChange(namedtuple("ResourceChange",
+                                ["logical_id", "action", "resource_type",
+                                 "properties", "replacement_properties"])):
+    """A change to a resource.
+
+    Attributes:
+        logical_id (str): The logical ID of the resource.
+        action (str): One of `add`, `remove`, `modify` or `replace`.
+        resource_type (str): The type of the resource, in the new template
+            unless it was removed.
+        properties (list): The names of the properties and attributes that
+            changed, sorted. The record sets of a RecordSetGroup are named
+            `RecordSets.<name> <type>`.
+        replacement_properties (list): The ones that cause a replacement.
+    """
+
+    __slots__ = ()
+
+    def format(self):
+        line = "%s %s (%s)" % (CHANGE_SYMBOLS[self.action], self.logical_id,
+                               self.resource_type)
+        if self.replacement_properties:
+            line += " replaced by: %s" % ", ".join(
+                self.replacement_properties)
+        elif self.properties:
+            line += ": %s" % ", ".join(self.properties)
+        return line
+
+
+class TemplateDiff(namedtuple("TemplateDiff",
+                              ["resources", "outputs", "parameters"])):
+    """The changes between two templates.
+
+    Attributes:
+        resources (list): :class:`ResourceChange` objects, sorted by
+            logical ID.
+        outputs (list): (name, action) tuples of the outputs that were
+            added, removed or modified.
+        parameters (list): (name, action) tuples of the parameters.
+    """
+
+    __slots__ = ()
+
+    def __nonzero__(self):
+        return bool(self.resources or self.outputs or self.parameters)
+
+    __bool__ = __nonzero__
+
+    def get_resources(self, action):
+        return [change for change in self.resources
+                if change.action == action]
+
+    def format(self):
+        lines = [change.format() for change in self.resources]
+        for section, changes in (("Output", self.outputs),
+                                 ("Parameter", self.parameters)):
+            lines.extend("%s %s %s" % (CHANGE_SYMBOLS[action], section, name)
+                         for name, action in changes)
+        return "\n".join(lines)
+
+
+def load_template(template):
+    """Returns a template as a dictionary, parsing it if it's JSON."""
+    if isinstance(template, basestring):
+        return json.loads(template)
+    return template
+
+
+# The properties telling apart the record sets of a routing policy that
+# share a name and type.
+ROUTING_KEYS = ("SetIdentifier", "Region", "Failover")
+
+
+def get_record_set_key(record_set):
+    """Returns what identifies a record set of a RecordSetGroup: its name
+    and type, and for weighted, latency, failover and geolocation records
+    its set identifier and routing values."""
+    parts = [record_set.get("Name"), record_set.get("Type")]
+    parts.extend(record_set[key] for key in ROUTING_KEYS
+                 if key in record_set)
+    geo_location = record_set.get("GeoLocation")
+    if geo_location:
+        parts.append(",".join("%s=%s" % item
+                              for item in sorted(geo_location.items())))
+    return " ".join("%s" % part for part in parts)
+
+
+def get_record_set_changes(old_record_sets, new_record_sets):
+    """Returns which record sets of a RecordSetGroup changed, as
+    `RecordSets.<name> <type>` strings."""
+    old_by_key = dict((get_record_set_key(r), r) for r in old_record_sets)
+    new_by_key = dict((get_record_set_key(r), r) for r in new_record_sets)
+    return [
+        "RecordSets.%s" % key
+        for key in set(old_by_key) | set(new_by_key)
+        if old_by_key.get(key) != new_by_key.get(key)
+    ]
+
+
+def get_changed_properties(old, new):
+    """Returns the names of the properties and attributes that differ
+    between two resource definitions."""
+    changed = [
+        name for name in RESOURCE_ATTRIBUTES
+        if old.get(name) != new.get(name)
+    ]
+    old_properties = old.get("Properties", {})
+    new_properties = new.get("Properties", {})
+    for name in set(old_properties) | set(new_properties):
+        old_value = old_properties.get(name)
+        new_value = new_properties.get(name)
+        if old_value == new_value:
+            continue
+        if name == "RecordSets" and isinstance(old_value, list) and \
+                isinstance(new_value, list):
+            changed.extend(get_record_set_changes(old_value, new_value))
+        else:
+            changed.append(name)
+    return changed
+
+
+def requires_replacement(resource_type, name):
+    replacement = REPLACEMENT_PROPERTIES.get(resource_type, ())
+    return name in replacement or (
+        ANY_PROPERTY in replacement and name not in RESOURCE_ATTRIBUTES
+    )
+
+
+def get_property_references(resource):
+    """Returns the logical IDs each property of a resource references."""
+    return dict(
+        (name, find_references(value))
+        for name, value in resource.get("Properties", {}).items()
+    )
+
+
+def cascade_replacements(changes, new_resources):
+    """Marks the properties referencing replaced resources as changed, and
+    replaces their resources when those properties can't be updated."""
+    replaced = set(logical_id for logical_id, change in changes.items()
+                   if change.action == REPLACE)
+    if not replaced:
+        return
+    references = dict(
+        (logical_id, get_property_references(resource))
+        for logical_id, resource in new_resources.items()
+        if logical_id not in changes or changes[logical_id].action == MODIFY
+    )
+    while replaced:
+        newly_replaced = set()
+        for logical_id, by_property in references.items():
+            change = changes.get(logical_id)
+            resource_type = new_resources[logical_id].get("Type")
+            properties = set(change.properties if change else ())
+            replacement = set(change.replacement_properties if change
+                              else ())
+            for name, referenced in by_property.items():
+                if referenced & replaced:
+                    properties.add(name)
+                    if requires_replacement(resource_type, name):
+                        replacement.add(name)
+            if not properties or (change and
+                                  len(properties) == len(change.properties)):
+                continue
+            action = REPLACE if replacement else MODIFY
+            changes[logical_id] = ResourceChange(
+                logical_id, action, resource_type, sorted(properties),
+                sorted(replacement))
+            if action == REPLACE:
+                newly_replaced.add(logical_id)
+        for logical_id in newly_replaced:
+            del references[logical_id]
+        replaced = newly_replaced
+
+
+def diff_resources(old_resources, new_resources):
+    """Returns the :class:`ResourceChange` objects between two Resources
+    sections, sorted by logical ID."""
+    changes = {}
+    for logical_id, old in old_resources.items():
+        new = new_resources.get(logical_id)
+        if new is None:
+            changes[logical_id] = ResourceChange(
+                logical_id, REMOVE, old.get("Type"), [], [])
+        elif new != old:
+            resource_type = new.get("Type")
+            properties = sorted(get_changed_properties(old, new))
+            if old.get("Type") != resource_type:
+                replacement = ["Type"]
+            else:
+                replacement = [
+                    name for name in properties
+                    if requires_replacement(resource_type,
+                                            name.split(".", 1)[0])
+                ]
+            changes[logical_id] = ResourceChange(
+                logical_id, REPLACE if replacement else MODIFY,
+                resource_type, properties, replacement)
+    for logical_id, new in new_resources.items():
+        if logical_id not in old_resources:
+            changes[logical_id] = ResourceChange(
+                logical_id, ADD, new.get("Type"), [], [])
+    cascade_replacements(changes, new_resources)
+    return [changes[logical_id] for logical_id in sorted(changes)]
+
+
+def diff_section(old, new):
+    """Returns (name, action) tuples for the entries of a template section
+    that differ."""
+    changes = []
+    for name in sorted(set(old) | set(new)):
+        if name not in new:
+            changes.append((name, REMOVE))
+        elif name not in old:
+            changes.append((name, ADD))
+        elif old[name] != new[name]:
+            changes.append((name, MODIFY))
+    return changes
+
+
+def diff_templates(old, new):
+    """Compares two templates.
+
+    Args:
+        old: The deployed template, as JSON or a dictionary.
+        new: The template to deploy, as JSON or a dictionary.
+
+    Returns:
+        :class:`TemplateDiff`: The changes.
+    """
+    old = load_template(old)
+    new = load_template(new)
+    return TemplateDiff(
+        resources=diff_resources(old.get("Resources", {}),
+                                 new.get("Resources", {})),
+        outputs=diff_section(old.get("Outputs", {}), new.get("Outputs", {})),
+        parameters=diff_section(old.get("Parameters", {}),
+                                new.get("Parameters", {})),
+    )
@@ -1,6 +1,12 @@
+import importlib
+import re
+import types
 from collections import Mapping
 
-from troposphere import Tags
+from troposphere import AWSObject, AWSProperty, Tags
+
+# The names Fn::Sub references, without literals (${!Name}) and attributes.
+SUB_REFERENCE = re.compile(r"\$\{([^!}][^}.]*)")
 
 
 def check_properties(properties, allowed_properties, resource):
@@ -54,3 +60,138 @@ def merge_tags(left, right, factory=Tags):
         tags.update(_tags_to_dict(right))
 
     return factory(**tags)
+
+
+def batched(iterable, size):
+    """Yields lists of up to `size` items from the iterable, in order.
+
+    Only one batch is held in memory at a time, so this can be used to work
+    through very large (or streamed) iterables.
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class LazyModule(types.ModuleType):
+    """A stand-in for a module that imports it on first attribute access.
+
+    Once imported, the attributes of the module are copied over, so later
+    lookups cost the same as on the module itself.
+    """
+
+    def __getattr__(self, name):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, name)
+
+
+def lazy_import(name):
+    """Returns a :class:`LazyModule` for the named module, ie:
+
+        s3 = lazy_import("awacs.s3")
+
+    Meant for the troposphere and awacs service modules, most of which are
+    only needed by some of the blueprints importing them.
+    """
+    return LazyModule(name)
+
+
+def extend_props(cls, **props):
+    """Returns the troposphere class, or a subclass of it accepting the
+    given properties if the installed troposphere doesn't know them yet.
+
+    Lets blueprints use properties CloudFormation added after the oldest
+    troposphere release we support, ie:
+
+        Alias = extend_props(
+            awslambda.Alias,
+            ProvisionedConcurrencyConfig=(
+                ProvisionedConcurrencyConfiguration, False),
+        )
+    """
+    missing = dict((name, prop) for name, prop in props.items()
+                   if name not in cls.props)
+    if not missing:
+        return cls
+    extended_props = dict(cls.props)
+    extended_props.update(missing)
+    return type(cls.__name__, (cls,), {"props": extended_props})
+
+
+def get_property_type(module, name, props):
+    """Returns the named property class of a troposphere module, or an
+    :class:`AWSProperty` with the given properties if it doesn't have it."""
+    try:
+        return getattr(module, name)
+    except AttributeError:
+        return type(name, (AWSProperty,), {"props": props})
+
+
+def get_resource_class(module, name, resource_type, props):
+    """Returns the named resource class of a troposphere module, or an
+    :class:`AWSObject` of the given type and properties if it doesn't have
+    it."""
+    try:
+        return getattr(module, name)
+    except AttributeError:
+        return type(name, (AWSObject,), {"resource_type": resource_type,
+                                         "props": props})
+
+
+def encode_value(value):
+    """Encodes the troposphere and awacs objects found in variables, for
+    :func:`json.dumps`."""
+    if hasattr(value, "to_parameter_value"):
+        # A stacker CFNParameter. Templates only reference parameters, so
+        # their value doesn't matter.
+        return {"CFNParameter": value.name}
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "JSONrepr"):
+        return value.JSONrepr()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError("%r is not JSON serializable" % (value,))
+
+
+def find_references(value, references=None):
+    """Returns the logical names referenced in a template snippet.
+
+    Args:
+        value: A troposphere object, or the dictionaries and lists of a
+            resource definition.
+
+    Returns:
+        set: The names used in Ref, Fn::GetAtt, Fn::Sub and DependsOn.
+    """
+    references = set() if references is None else references
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "Ref" and isinstance(item, basestring):
+                references.add(item)
+            elif key == "Fn::GetAtt" and isinstance(item, list) and item:
+                references.add(item[0])
+            elif key == "Fn::Sub":
+                template = item[0] if isinstance(item, list) else item
+                if isinstance(template, basestring):
+                    references.update(SUB_REFERENCE.findall(template))
+                find_references(item, references)
+            elif key == "DependsOn":
+                if isinstance(item, basestring):
+                    references.add(item)
+                else:
+                    references.update(item)
+            else:
+                find_references(item, references)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            find_references(item, references)
+    return references
@@ -2,14 +2,16 @@
 
 This includes the VPC, it's subnets, availability zones, etc.
 """
+import re
 
 from troposphere import (
     Ref, Output, Join, FindInMap, Select, GetAZs, Tags,
-    GetAtt, NoValue, Region
+    GetAtt, NoValue, Region, Sub, Cidr
 )
 from troposphere import ec2, route53
 
-from stacker.blueprints.base import Blueprint
+from .base import Blueprint
+from .subnet_layout import SubnetTier, carve_subnets
 from stacker.blueprints.variables.types import TroposphereType
 
 NAT_INSTANCE_NAME = 'NatInstance%s'
@@ -20,11 +22,156 @@ VPC_NAME = "VPC"
 VPC_ID = Ref(VPC_NAME)
 DEFAULT_SG = "DefaultSG"
 NAT_SG = "NATSG"
+IPV6_CIDR_BLOCK = "VPCIpv6CidrBlock"
+EGRESS_ONLY_GATEWAY = "EgressOnlyInternetGateway"
+
+# How many /64 subnets fit in the /56 block AWS gives VPCs.
+MAX_IPV6_SUBNETS = 256
+
+# NAT modes of vpc.VPC: a NAT gateway or instance in every AZ, or a single
+# one in the first AZ shared by all the private subnets.
+NAT_MODES = ("per-az", "single", "instances", "single-instance")
+SINGLE_NAT_MODES = ("single", "single-instance")
+NAT_INSTANCE_MODES = ("instances", "single-instance")
+
+# Instance families with the Elastic Network Adapter.
+ENHANCED_NETWORKING_FAMILIES = frozenset([
+    "a1", "c5", "c5a", "c5d", "c5n", "c6g", "c6gn", "c6i", "c6in", "c7g",
+    "c7gn", "c7i", "d3", "g4dn", "h1", "i3", "i3en", "i4i", "inf1", "m5",
+    "m5a", "m5ad", "m5d", "m5n", "m5zn", "m6a", "m6g", "m6i", "m6in", "m7a",
+    "m7g", "m7i", "p3", "r5", "r5a", "r5ad", "r5b", "r5d", "r5n", "r6g",
+    "r6i", "r6in", "r7g", "r7i", "t3", "t3a", "t4g", "x1", "x1e", "x2idn",
+    "z1d",
+])
 
 NOVALUE = Ref("AWS::NoValue")
 
+# Services that are reached through gateway endpoints, added to the route
+# tables, every other service uses interface endpoints.
+GATEWAY_ENDPOINT_SERVICES = ("s3", "dynamodb")
+INTERFACE_ENDPOINT_SG = "InterfaceEndpointSecurityGroup"
+
+ENDPOINT_VARIABLES = {
+    "GatewayEndpoints": {
+        "type": list,
+        "description": "Services to create gateway endpoints for, among "
+                       "%s, so private subnets reach them without going "
+                       "through NAT." % ", ".join(GATEWAY_ENDPOINT_SERVICES),
+        "default": [],
+    },
+    "InterfaceEndpoints": {
+        "type": list,
+        "description": "Services to create interface endpoints for in the "
+                       "private subnets, ie: ecr.api, ecr.dkr, logs, sqs, "
+                       "kms or sts. They share a security group allowing "
+                       "HTTPS from the VPC.",
+        "default": [],
+    },
+    "InterfaceEndpointPrivateDns": {
+        "type": bool,
+        "description": "Whether the default DNS names of the services "
+                       "resolve to the interface endpoints.",
+        "default": True,
+    },
+}
+
+
+def get_endpoint_title(service, endpoint_type):
+    """Returns the logical ID of an endpoint, ie: EcrApiInterfaceEndpoint
+    for the ecr.api interface endpoint."""
+    name = "".join(
+        part.capitalize() for part in re.split(r"[^a-zA-Z0-9]+", service)
+    )
+    return "%s%sEndpoint" % (name, endpoint_type)
+
+
+class VPCEndpointsMixin(object):
+    """Creates the VPC endpoints requested by `ENDPOINT_VARIABLES`."""
+
+    def create_endpoints(self, vpc_id, vpc_cidr, route_table_ids,
+                         subnet_ids):
+        """Creates the gateway and interface endpoints.
+
+        Args:
+            vpc_id: The VPC of the endpoints.
+            vpc_cidr: The CIDR block allowed to reach the interface
+                endpoints.
+            route_table_ids (list): The route tables of the gateway
+                endpoints.
+            subnet_ids (list): The subnets of the interface endpoints.
+        """
+        t = self.template
+        variables = self.get_variables()
+        gateway_services = variables["GatewayEndpoints"]
+        interface_services = variables["InterfaceEndpoints"]
+
+        for services in (gateway_services, interface_services):
+            if len(set(services)) != len(services):
+                raise ValueError("Duplicate VPC endpoint services: %s" % (
+                    ", ".join(services)))
+        for service in gateway_services:
+            if service not in GATEWAY_ENDPOINT_SERVICES:
+                raise ValueError(
+                    "Gateway endpoints are only available for %s, not %s." % (
+                        ", ".join(GATEWAY_ENDPOINT_SERVICES), service))
+        if gateway_services and not route_table_ids:
+            raise ValueError("Gateway endpoints need route tables.")
+        if interface_services and not subnet_ids:
+            raise ValueError("Interface endpoints need subnets.")
+
+        for service in gateway_services:
+            title = get_endpoint_title(service, "Gateway")
+            t.add_resource(
+                ec2.VPCEndpoint(
+                    title,
+                    VpcId=vpc_id,
+                    ServiceName=Sub("com.amazonaws.${AWS::Region}.%s" %
+                                    service),
+                    VpcEndpointType="Gateway",
+                    RouteTableIds=route_table_ids,
+                )
+            )
+            t.add_output(Output(title + "Id", Value=Ref(title)))
+
+        if not interface_services:
+            return
+
+        t.add_resource(
+            ec2.SecurityGroup(
+                INTERFACE_ENDPOINT_SG,
+                VpcId=vpc_id,
+                GroupDescription="VPC Interface Endpoints",
+                SecurityGroupIngress=[
+                    ec2.SecurityGroupRule(
+                        IpProtocol="tcp", FromPort=443, ToPort=443,
+                        CidrIp=vpc_cidr,
+                    ),
+                ],
+            )
+        )
+        t.add_output(
+            Output(INTERFACE_ENDPOINT_SG + "Id",
+                   Value=Ref(INTERFACE_ENDPOINT_SG))
+        )
+        for service in interface_services:
+            title = get_endpoint_title(service, "Interface")
+            t.add_resource(
+                ec2.VPCEndpoint(
+                    title,
+                    VpcId=vpc_id,
+                    ServiceName=Sub("com.amazonaws.${AWS::Region}.%s" %
+                                    service),
+                    VpcEndpointType="Interface",
+                    PrivateDnsEnabled=variables[
+                        "InterfaceEndpointPrivateDns"],
+                    SecurityGroupIds=[Ref(INTERFACE_ENDPOINT_SG)],
+                    SubnetIds=subnet_ids,
+                )
+            )
+            t.add_output(Output(title + "Id", Value=Ref(title)))
 
-class VPC(Blueprint):
+
+class VPC(VPCEndpointsMixin, Blueprint):
     VARIABLES = {
         "AZCount": {
             "type": int,
@@ -33,11 +180,35 @@ class VPC(Blueprint):
         "PrivateSubnets": {
             "type": list,
             "description": "List of subnets to use for non-public hosts. "
-                           "NOTE: Must have as many subnets as AZCount"},
+                           "NOTE: Must have as many subnets as AZCount. "
+                           "Ignored when SubnetTiers is set.",
+            "default": []},
         "PublicSubnets": {
             "type": list,
             "description": "List of subnets to use for public hosts. NOTE: "
-                           "Must have as many subnets as AZCount"},
+                           "Must have as many subnets as AZCount. Ignored "
+                           "when SubnetTiers is set.",
+            "default": []},
+        "SubnetTiers": {
+            "type": list,
+            "description": "Tiers of subnets to carve out of CidrBlock, "
+                           "with one subnet per tier and AZ, instead of "
+                           "listing them in PublicSubnets and "
+                           "PrivateSubnets. Each tier is a dictionary with "
+                           "a Name, a Size relative to the other tiers "
+                           "(default: 1), and whether it is Public "
+                           "(default: only for the tier named public), ie: "
+                           "[{Name: public}, {Name: private, Size: 4}, "
+                           "{Name: data, Size: 2}]. See "
+                           "stacker_blueprints.subnet_layout.",
+            "default": []},
+        "EnableIpv6": {
+            "type": bool,
+            "description": "Requests an IPv6 block for the VPC and gives "
+                           "every subnet a /64 of it. Public subnets route "
+                           "IPv6 to the internet gateway, the others to an "
+                           "egress only internet gateway.",
+            "default": False},
         "BaseDomain": {
             "type": str,
             "default": "",
@@ -53,8 +224,31 @@ class VPC(Blueprint):
         "UseNatGateway": {
             "type": bool,
             "description": "If set to false, will configure NAT Instances"
-                           "instead of NAT gateways.",
+                           "instead of NAT gateways. Ignored when NatMode "
+                           "is set.",
             "default": True},
+        "NatMode": {
+            "type": str,
+            "description": "How the private subnets reach the internet: "
+                           "per-az (a NAT gateway per AZ), single (one NAT "
+                           "gateway shared by every AZ), instances (a NAT "
+                           "instance per AZ) or single-instance. A single "
+                           "NAT is cheaper, but sends cross AZ traffic "
+                           "through the first AZ, and loses internet access "
+                           "for all of them if it goes down. Defaults to "
+                           "per-az, or instances if UseNatGateway is false.",
+            "default": ""},
+        "NatInstanceTypes": {
+            "type": list,
+            "description": "If using NAT Instances, the instance type of "
+                           "each AZ, overriding InstanceType.",
+            "default": []},
+        "NatEnhancedNetworking": {
+            "type": bool,
+            "description": "If using NAT Instances, requires instance types "
+                           "with enhanced networking (ENA) and makes them "
+                           "EBS optimized. The NAT image must support ENA.",
+            "default": False},
         "ImageName": {
             "type": str,
             "description": "The image name to use from the AMIMap (usually "
@@ -70,6 +264,7 @@ class VPC(Blueprint):
                            "on those instances.",
             "default": ""},
     }
+    VARIABLES.update(ENDPOINT_VARIABLES)
 
     def create_vpc(self):
         t = self.template
@@ -182,6 +377,45 @@ class VPC(Blueprint):
             )
         )
 
+    def get_subnet_tiers(self):
+        """Returns the :class:`SubnetTier` objects of the VPC, carved from
+        `SubnetTiers` if set, or made of the public and private subnets
+        listed in `PublicSubnets` and `PrivateSubnets`."""
+        variables = self.get_variables()
+        az_count = variables["AZCount"]
+        if variables["SubnetTiers"]:
+            return carve_subnets(variables["CidrBlock"],
+                                 variables["SubnetTiers"], az_count)
+        tiers = []
+        for name in ("public", "private"):
+            cidr_blocks = variables["%sSubnets" % name.capitalize()]
+            if len(cidr_blocks) != az_count:
+                raise ValueError(
+                    "%sSubnets must have as many subnets as AZCount (%d), "
+                    "or SubnetTiers must be set." % (name.capitalize(),
+                                                     az_count))
+            tiers.append(SubnetTier(name, name == "public", cidr_blocks))
+        return tiers
+
+    def create_ipv6_cidr_block(self):
+        t = self.template
+        t.add_resource(
+            ec2.VPCCidrBlock(
+                IPV6_CIDR_BLOCK,
+                VpcId=VPC_ID,
+                AmazonProvidedIpv6CidrBlock=True,
+            )
+        )
+        t.add_resource(
+            ec2.EgressOnlyInternetGateway(EGRESS_ONLY_GATEWAY, VpcId=VPC_ID)
+        )
+        t.add_output(
+            Output(
+                "Ipv6CidrBlock",
+                Value=Select(0, GetAtt(VPC_NAME, "Ipv6CidrBlocks")),
+            )
+        )
+
     def create_network(self):
         t = self.template
         variables = self.get_variables()
@@ -190,27 +424,51 @@ class VPC(Blueprint):
                                       VpcId=VPC_ID))
 
         self.create_nat_security_groups()
-        subnets = {'public': [], 'private': []}
-        net_types = subnets.keys()
+        tiers = self.get_subnet_tiers()
+        if not any(tier.public for tier in tiers):
+            raise ValueError("A public subnet tier is needed for the NAT of "
+                             "the private subnets.")
+        nat_tier = [tier for tier in tiers if tier.public][0]
+        nat_mode = self.get_nat_mode()
+
+        enable_ipv6 = variables["EnableIpv6"]
+        subnet_count = len(tiers) * variables["AZCount"]
+        if enable_ipv6:
+            if subnet_count > MAX_IPV6_SUBNETS:
+                raise ValueError(
+                    "The /56 IPv6 block of a VPC only holds %d /64 subnets, "
+                    "not %d." % (MAX_IPV6_SUBNETS, subnet_count))
+            self.create_ipv6_cidr_block()
+
+        subnets = dict((tier.name, []) for tier in tiers)
+        private_route_tables = []
         zones = []
         for i in range(variables["AZCount"]):
             az = Select(i, GetAZs(""))
             zones.append(az)
             name_suffix = i
-            for net_type in net_types:
-                name_prefix = net_type.capitalize()
+            for tier_index, tier in enumerate(tiers):
+                net_type = tier.name
+                name_prefix = net_type[0].upper() + net_type[1:]
                 subnet_name = "%sSubnet%s" % (name_prefix, name_suffix)
                 subnets[net_type].append(subnet_name)
-                t.add_resource(
-                    ec2.Subnet(
-                        subnet_name,
-                        AvailabilityZone=az,
-                        VpcId=VPC_ID,
-                        DependsOn=GW_ATTACH,
-                        CidrBlock=variables.get("%sSubnets" % name_prefix)[i],
-                        Tags=Tags(type=net_type)
-                    )
+                subnet = ec2.Subnet(
+                    subnet_name,
+                    AvailabilityZone=az,
+                    VpcId=VPC_ID,
+                    DependsOn=GW_ATTACH,
+                    CidrBlock=tier.cidr_blocks[i],
+                    Tags=Tags(type=net_type)
                 )
+                if enable_ipv6:
+                    subnet.DependsOn = [GW_ATTACH, IPV6_CIDR_BLOCK]
+                    subnet.AssignIpv6AddressOnCreation = True
+                    subnet.Ipv6CidrBlock = Select(
+                        tier_index * variables["AZCount"] + i,
+                        Cidr(Select(0, GetAtt(VPC_NAME, "Ipv6CidrBlocks")),
+                             subnet_count, 64)
+                    )
+                t.add_resource(subnet)
 
                 route_table_name = "%sRouteTable%s" % (name_prefix,
                                                        name_suffix)
@@ -231,7 +489,12 @@ class VPC(Blueprint):
                 )
 
                 route_name = '%sRoute%s' % (name_prefix, name_suffix)
-                if net_type == 'public':
+                ipv6_route = ec2.Route(
+                    '%sIpv6Route%s' % (name_prefix, name_suffix),
+                    RouteTableId=Ref(route_table_name),
+                    DestinationIpv6CidrBlock="::/0",
+                )
+                if tier.public:
                     # the public subnets are where the NAT instances live,
                     # so their default route needs to go to the AWS
                     # Internet Gateway
@@ -243,7 +506,10 @@ class VPC(Blueprint):
                             GatewayId=Ref(GATEWAY)
                         )
                     )
-                    self.create_nat_instance(i, subnet_name)
+                    ipv6_route.GatewayId = Ref(GATEWAY)
+                    if tier is nat_tier and \
+                            (i == 0 or nat_mode not in SINGLE_NAT_MODES):
+                        self.create_nat_instance(i, subnet_name)
                 else:
                     # Private subnets are where actual instances will live
                     # so their gateway needs to be through the nat instances
@@ -252,18 +518,27 @@ class VPC(Blueprint):
                         RouteTableId=Ref(route_table_name),
                         DestinationCidrBlock='0.0.0.0/0',
                     )
-                    if variables["UseNatGateway"]:
-                        route.NatGatewayId = Ref(
-                                NAT_GATEWAY_NAME % name_suffix)
-                    else:
+                    nat_suffix = 0 if nat_mode in SINGLE_NAT_MODES \
+                        else name_suffix
+                    if nat_mode in NAT_INSTANCE_MODES:
                         route.InstanceId = Ref(
-                                NAT_INSTANCE_NAME % name_suffix)
+                                NAT_INSTANCE_NAME % nat_suffix)
+                    else:
+                        route.NatGatewayId = Ref(
+                                NAT_GATEWAY_NAME % nat_suffix)
                     t.add_resource(route)
-
-        for net_type in net_types:
+                    ipv6_route.EgressOnlyInternetGatewayId = Ref(
+                        EGRESS_ONLY_GATEWAY)
+                    private_route_tables.append(Ref(route_table_name))
+                if enable_ipv6:
+                    t.add_resource(ipv6_route)
+
+        for tier in tiers:
+            net_type = tier.name
+            name_prefix = net_type[0].upper() + net_type[1:]
             t.add_output(
                 Output(
-                    "%sSubnets" % net_type.capitalize(),
+                    "%sSubnets" % name_prefix,
                     Value=Join(
                         ",",
                         [Ref(sn) for sn in subnets[net_type]]
@@ -274,11 +549,22 @@ class VPC(Blueprint):
             for i, sn in enumerate(subnets[net_type]):
                 t.add_output(
                     Output(
-                        "%sSubnet%d" % (net_type.capitalize(), i),
+                        "%sSubnet%d" % (name_prefix, i),
                         Value=Ref(sn)
                     )
                 )
 
+        nat_count = 1 if nat_mode in SINGLE_NAT_MODES \
+            else variables["AZCount"]
+        t.add_output(Output("NatMode", Value=nat_mode))
+        t.add_output(
+            Output(
+                "NatExternalIps",
+                Value=Join(",", [Ref("NATExternalIp%d" % i)
+                                 for i in range(nat_count)])
+            )
+        )
+
         self.template.add_output(Output(
             "AvailabilityZones",
             Value=Join(",", zones)))
@@ -291,12 +577,46 @@ class VPC(Blueprint):
                 )
             )
 
+        self.create_endpoints(
+            VPC_ID,
+            variables["CidrBlock"],
+            private_route_tables,
+            [Ref(sn) for tier in tiers if not tier.public
+             for sn in subnets[tier.name]],
+        )
+
+    def get_nat_mode(self):
+        """Returns one of :data:`NAT_MODES`, from `NatMode` or else
+        `UseNatGateway`."""
+        variables = self.get_variables()
+        nat_mode = variables["NatMode"]
+        if not nat_mode:
+            return "per-az" if variables["UseNatGateway"] else "instances"
+        if nat_mode not in NAT_MODES:
+            raise ValueError("NatMode must be one of %s, not %r." % (
+                ", ".join(NAT_MODES), nat_mode))
+        return nat_mode
+
+    def get_nat_instance_type(self, zone_id):
+        variables = self.get_variables()
+        instance_types = variables["NatInstanceTypes"]
+        if instance_types and len(instance_types) != variables["AZCount"]:
+            raise ValueError("NatInstanceTypes must have an instance type "
+                             "per AZ (%d)." % variables["AZCount"])
+        instance_type = instance_types[zone_id] if instance_types \
+            else variables["InstanceType"]
+        if variables["NatEnhancedNetworking"] and \
+                instance_type.split(".")[0] not in \
+                ENHANCED_NETWORKING_FAMILIES:
+            raise ValueError("NAT instance type %s doesn't support enhanced "
+                             "networking." % instance_type)
+        return instance_type
+
     def create_nat_security_groups(self):
         t = self.template
-        variables = self.get_variables()
 
         # Only create security group if NAT Instances are being used.
-        if not variables["UseNatGateway"]:
+        if self.get_nat_mode() in NAT_INSTANCE_MODES:
             nat_private_in_all_rule = ec2.SecurityGroupRule(
                 IpProtocol='-1', FromPort='-1', ToPort='-1',
                 SourceSecurityGroupId=Ref(DEFAULT_SG)
@@ -322,7 +642,7 @@ class VPC(Blueprint):
         suffix = zone_id
         eip_name = "NATExternalIp%s" % suffix
 
-        if variables["UseNatGateway"]:
+        if self.get_nat_mode() not in NAT_INSTANCE_MODES:
             gateway_name = NAT_GATEWAY_NAME % suffix
             t.add_resource(
                 ec2.NatGateway(
@@ -349,19 +669,20 @@ class VPC(Blueprint):
                 Ref("ImageName")
             )
             instance_name = NAT_INSTANCE_NAME % suffix
-            t.add_resource(
-                ec2.Instance(
-                    instance_name,
-                    ImageId=image_id,
-                    SecurityGroupIds=[Ref(DEFAULT_SG), Ref(NAT_SG)],
-                    SubnetId=Ref(subnet_name),
-                    InstanceType=variables["InstanceType"],
-                    SourceDestCheck=False,
-                    KeyName=variables["SshKeyName"],
-                    Tags=[ec2.Tag('Name', 'nat-gw%s' % suffix)],
-                    DependsOn=GW_ATTACH
-                )
+            instance = ec2.Instance(
+                instance_name,
+                ImageId=image_id,
+                SecurityGroupIds=[Ref(DEFAULT_SG), Ref(NAT_SG)],
+                SubnetId=Ref(subnet_name),
+                InstanceType=self.get_nat_instance_type(zone_id),
+                SourceDestCheck=False,
+                KeyName=variables["SshKeyName"],
+                Tags=[ec2.Tag('Name', 'nat-gw%s' % suffix)],
+                DependsOn=GW_ATTACH
             )
+            if variables["NatEnhancedNetworking"]:
+                instance.EbsOptimized = True
+            t.add_resource(instance)
             t.add_output(
                 Output(
                     instance_name + "PublicHostname",
@@ -396,8 +717,13 @@ class VPC(Blueprint):
         self.create_network()
 
 
-class VPC2(Blueprint):
-    """This is a stripped down version of the VPC Blueprint."""
+class VPC2(VPCEndpointsMixin, Blueprint):
+    """This is a stripped down version of the VPC Blueprint.
+
+    Its subnets are created by other stacks, so VPC endpoints need the
+    route tables and subnets to use in `EndpointRouteTableIds` and
+    `EndpointSubnetIds`.
+    """
 
     VARIABLES = {
         "VPC": {
@@ -410,7 +736,18 @@ class VPC2(Blueprint):
                            "set to this VPC.",
             "default": None,
         },
+        "EndpointRouteTableIds": {
+            "type": list,
+            "description": "The route tables of the gateway endpoints.",
+            "default": [],
+        },
+        "EndpointSubnetIds": {
+            "type": list,
+            "description": "The subnets of the interface endpoints.",
+            "default": [],
+        },
     }
+    VARIABLES.update(ENDPOINT_VARIABLES)
 
     def create_vpc(self):
         t = self.template
@@ -528,7 +865,14 @@ class VPC2(Blueprint):
         )
 
     def create_template(self):
+        variables = self.get_variables()
         self.create_vpc()
         self.create_internet_gateway()
         self.create_internal_zone()
         self.create_dhcp_options()
+        self.create_endpoints(
+            self.vpc.Ref(),
+            self.vpc.GetAtt("CidrBlock"),
+            variables["EndpointRouteTableIds"],
+            variables["EndpointSubnetIds"],
+        )
@@ -0,0 +1,178 @@
+import unittest
+
+from stacker.blueprints.testutil import BlueprintTestCase
+from stacker.config import Config
+from stacker.context import Context
+from stacker.variables import Variable
+
+from stacker_blueprints.rds.aurora.base import (
+    AuroraCluster,
+    AuroraPGCluster,
+    validate_custom_endpoints,
+    validate_reader_groups,
+    validate_replica_scaling,
+)
+
+CLUSTER_VARIABLES = {
+    "VpcId": "vpc-11111111",
+    "Subnets": "subnet-11111111,subnet-22222222",
+    "DBFamily": "aurora-postgresql11",
+    "MasterUser": "root",
+    "MasterUserPassword": "password",
+}
+
+
+class TestReplicaScaling(unittest.TestCase):
+    def test_defaults(self):
+        self.assertEqual(validate_replica_scaling({}), {})
+        self.assertEqual(
+            validate_replica_scaling({"max": 4}),
+            {"min": 1, "max": 4, "metric": "cpu", "target": 70.0,
+             "scale-in-cooldown": 300, "scale-out-cooldown": 300,
+             "instance-class": ""})
+
+    def test_invalid(self):
+        invalid = [
+            {"min": 1},
+            {"min": 3, "max": 2},
+            {"max": 16},
+            {"max": 2, "metric": "memory"},
+            {"max": 2, "metric": "connections"},
+            {"max": 2, "target": 120},
+            {"max": 2, "scale-in-cooldown": -1},
+            {"max": 2, "instance_class": "db.r5.large"},
+        ]
+        for config in invalid:
+            with self.assertRaises(ValueError):
+                validate_replica_scaling(config)
+
+
+class TestReaderGroups(unittest.TestCase):
+    def test_defaults(self):
+        self.assertEqual(
+            validate_reader_groups({"oltp": {"instance-class": "db.r5.large"}}),
+            {"oltp": {"instance-class": "db.r5.large", "count": 1,
+                      "promotion-tier": 1}})
+        self.assertEqual(
+            validate_custom_endpoints({"analytics": {"groups": ["a"]}}),
+            {"analytics": {"groups": ["a"], "type": "READER"}})
+
+    def test_invalid_reader_groups(self):
+        invalid = [
+            {"Analytics": {"instance-class": "db.r5.large"}},
+            {"analytics": {}},
+            {"analytics": {"instance-class": "db.r5.large", "count": 0}},
+            {"analytics": {"instance-class": "db.r5.large",
+                           "promotion-tier": 16}},
+            {"analytics": {"instance-class": "db.r5.large", "tier": 1}},
+            {"a": {"instance-class": "db.r5.large", "count": 8},
+             "b": {"instance-class": "db.r5.large", "count": 8}},
+            {"a-b": {"instance-class": "db.r5.large"},
+             "a--b": {"instance-class": "db.r5.large"}},
+        ]
+        for groups in invalid:
+            with self.assertRaises(ValueError):
+                validate_reader_groups(groups)
+
+    def test_invalid_custom_endpoints(self):
+        invalid = [
+            {"oltp_read": {"groups": ["a"]}},
+            {"analytics": {}},
+            {"analytics": {"groups": ["a"], "exclude-groups": ["b"]}},
+            {"analytics": {"groups": ["a"], "type": "WRITER"}},
+            {"analytics": {"groups": ["a"], "members": ["b"]}},
+            {"read": {"groups": ["a"]}},
+            {"oltp-read": {"groups": ["a"]}, "oltp--read": {"groups": ["a"]}},
+        ]
+        for endpoints in invalid:
+            with self.assertRaises(ValueError):
+                validate_custom_endpoints(endpoints)
+
+
+class TestAuroraCluster(BlueprintTestCase):
+    def setUp(self):
+        self.ctx = Context(config=Config({"namespace": "test"}))
+
+    def build(self, blueprint_class, name, **variables):
+        blueprint = blueprint_class(name, self.ctx)
+        blueprint.resolve_variables(
+            [Variable(k, v)
+             for k, v in dict(CLUSTER_VARIABLES, **variables).items()])
+        blueprint.create_template()
+        return blueprint
+
+    def test_replica_scaling(self):
+        blueprint = self.build(
+            AuroraPGCluster,
+            "test_aurora_AuroraPGCluster_replica_scaling",
+            ReplicaScaling={"min": 1, "max": 4, "metric": "connections",
+                            "target": 500,
+                            "instance-class": "db.r5.large"},
+        )
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_replica_scaling_without_writer(self):
+        template = self.build(
+            AuroraCluster, "test", DBFamily="aurora5.6",
+            ReplicaScaling={"max": 2},
+        ).template.to_dict()
+        resources = template["Resources"]
+        self.assertNotIn("DBClusterWriterInstance", resources)
+        self.assertEqual(
+            resources["ReplicaScalingPolicy"]["Properties"][
+                "TargetTrackingScalingPolicyConfiguration"][
+                "PredefinedMetricSpecification"]["PredefinedMetricType"],
+            "RDSReaderAverageCPUUtilization")
+
+    def test_reader_groups_and_custom_endpoints(self):
+        blueprint = self.build(
+            AuroraCluster,
+            "test_aurora_AuroraCluster_custom_endpoints",
+            DBFamily="aurora5.6",
+            InternalZoneId="Z1234567890",
+            InternalZoneName="internal.",
+            InternalHostname="db",
+            WriterInstanceClass="db.r5.xlarge",
+            ReplicaScaling={"max": 4},
+            ReaderGroups={
+                "analytics": {"instance-class": "db.r5.4xlarge",
+                              "promotion-tier": 15},
+                "oltp": {"instance-class": "db.r5.xlarge", "count": 2},
+            },
+            CustomEndpoints={
+                "analytics": {"groups": ["analytics"]},
+                "oltp-read": {"exclude-groups": ["analytics"]},
+            },
+        )
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_custom_endpoint_unknown_group(self):
+        with self.assertRaises(ValueError):
+            self.build(
+                AuroraCluster, "test", DBFamily="aurora5.6",
+                CustomEndpoints={"analytics": {"groups": ["analytics"]}},
+            )
+
+    def test_custom_endpoint_named_master(self):
+        template = self.build(
+            AuroraCluster, "test", DBFamily="aurora5.6",
+            WriterInstanceClass="db.r5.large",
+            ReaderGroups={"a": {"instance-class": "db.r5.large"}},
+            CustomEndpoints={"master": {"groups": ["a"]}},
+        ).template.to_dict()
+        self.assertIn("CustomEndpointMaster", template["Resources"])
+        self.assertEqual(template["Outputs"]["MasterEndpoint"]["Value"],
+                         {"Fn::GetAtt": ["DBCluster", "Endpoint.Address"]})
+
+    def test_reader_groups_need_a_writer(self):
+        with self.assertRaisesRegexp(ValueError, "WriterInstanceClass"):
+            self.build(
+                AuroraCluster, "test", DBFamily="aurora5.6",
+                ReaderGroups={"a": {"instance-class": "db.r5.large"}},
+            )
+        with self.assertRaises(ValueError):
+            self.build(
+                AuroraCluster, "test", DBFamily="aurora5.6",
+                WriterInstanceClass="db.r5.large",
+                ReplicaScaling={"max": 2, "instance-class": "db.r5.xlarge"},
+            )
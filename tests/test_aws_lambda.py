@@ -1,9 +1,15 @@
 from types import MethodType
 
 from stacker.context import Context
+from stacker.exceptions import ValidatorError
 from stacker.config import Config
 from stacker.variables import Variable
-from stacker_blueprints.aws_lambda import Function, FunctionScheduler
+from stacker_blueprints.aws_lambda import (
+    Function,
+    FunctionScheduler,
+    Layer,
+    validate_event_source_mapping,
+)
 from stacker.blueprints.testutil import BlueprintTestCase
 
 from troposphere.awslambda import Code
@@ -136,6 +142,211 @@ class TestBlueprint(BlueprintTestCase):
         blueprint.create_template()
         self.assertRenderedBlueprint(blueprint)
 
+    def test_create_template_with_concurrency(self):
+        blueprint = self.create_blueprint(
+            'test_aws_lambda_Function_with_concurrency'
+        )
+        self.common_variables["AliasName"] = "prod"
+        self.common_variables["ReservedConcurrency"] = 20
+        self.common_variables["ProvisionedConcurrency"] = 5
+        self.common_variables["WarmerSchedule"] = "rate(5 minutes)"
+
+        blueprint.resolve_variables(self.generate_variables())
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+        alias = blueprint.template.resources["Alias"]
+        self.assertEqual(alias.FunctionVersion.data,
+                         {"Fn::GetAtt": ["LatestVersion", "Version"]})
+        self.assertEqual(
+            alias.ProvisionedConcurrencyConfig.ProvisionedConcurrentExecutions,
+            5)
+
+    def test_provisioned_concurrency_without_alias(self):
+        blueprint = self.create_blueprint(
+            'test_provisioned_concurrency_without_alias'
+        )
+        self.common_variables["ProvisionedConcurrency"] = 2
+
+        blueprint.resolve_variables(self.generate_variables())
+        blueprint.create_template()
+        version = blueprint.template.resources["LatestVersion"]
+        self.assertEqual(
+            version.to_dict()["Properties"]["ProvisionedConcurrencyConfig"],
+            {"ProvisionedConcurrentExecutions": 2})
+        self.assertNotIn("ReservedConcurrency", blueprint.template.outputs)
+
+    def test_provisioned_over_reserved_concurrency(self):
+        blueprint = self.create_blueprint(
+            'test_provisioned_over_reserved_concurrency'
+        )
+        self.common_variables["ReservedConcurrency"] = 2
+        self.common_variables["ProvisionedConcurrency"] = 3
+
+        blueprint.resolve_variables(self.generate_variables())
+        with self.assertRaises(ValueError):
+            blueprint.create_template()
+
+    def test_create_template_with_concurrency_scaling(self):
+        blueprint = self.create_blueprint(
+            'test_aws_lambda_Function_with_concurrency_scaling'
+        )
+        self.common_variables["AliasName"] = "prod"
+        self.common_variables["ProvisionedConcurrencyScaling"] = {
+            "min": 2,
+            "max": 50,
+            "target": 0.6,
+            "scale-in-cooldown": 300,
+        }
+
+        blueprint.resolve_variables(self.generate_variables())
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+        alias = blueprint.template.resources["Alias"]
+        self.assertEqual(
+            alias.ProvisionedConcurrencyConfig.ProvisionedConcurrentExecutions,
+            2)
+
+    def test_invalid_concurrency_scaling(self):
+        for variables in [
+                {"ProvisionedConcurrencyScaling": {"max": 10}},
+                {"AliasName": "prod",
+                 "ProvisionedConcurrencyScaling": {"max": 10, "target": 70}},
+                {"AliasName": "prod",
+                 "ProvisionedConcurrencyScaling": {"min": 5, "max": 4}},
+                {"AliasName": "prod", "ReservedConcurrency": 5,
+                 "ProvisionedConcurrencyScaling": {"max": 10}},
+                {"AliasName": "prod", "ProvisionedConcurrency": 20,
+                 "ProvisionedConcurrencyScaling": {"max": 10}},
+        ]:
+            blueprint = self.create_blueprint(
+                'test_invalid_concurrency_scaling'
+            )
+            self.common_variables.update(variables)
+            with self.assertRaises((ValueError, ValidatorError)):
+                blueprint.resolve_variables(self.generate_variables())
+                blueprint.create_template()
+            for name in variables:
+                del self.common_variables[name]
+
+    def test_create_template_event_source_mappings(self):
+        blueprint = self.create_blueprint(
+            'test_aws_lambda_Function_event_source_mappings'
+        )
+        self.common_variables["EventSourceMappings"] = {
+            "Clicks": {
+                "EventSourceArn": "arn:aws:kinesis:us-east-1:12345:stream/"
+                                  "clicks",
+                "StartingPosition": "LATEST",
+                "BatchSize": 500,
+                "MaximumBatchingWindowInSeconds": 5,
+                "ParallelizationFactor": 4,
+                "BisectBatchOnFunctionError": True,
+                "TumblingWindowInSeconds": 60,
+            },
+            "Jobs": {
+                "EventSourceArn": "arn:aws:sqs:us-east-1:12345:jobs",
+                "BatchSize": 100,
+                "MaximumBatchingWindowInSeconds": 2,
+            },
+        }
+
+        blueprint.resolve_variables(self.generate_variables())
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+        self.assertIn("JobsEventSourceMappingId", blueprint.template.outputs)
+
+    def test_invalid_event_source_mappings(self):
+        stream = "arn:aws:kinesis:us-east-1:12345:stream/clicks"
+        queue = "arn:aws:sqs:us-east-1:12345:jobs"
+        for mapping in [
+                {"EventSourceArn": "arn:aws:sns:us-east-1:12345:topic"},
+                {"EventSourceArn": stream},
+                {"EventSourceArn": stream, "StartingPosition": "LATEST",
+                 "ParallelizationFactor": 11},
+                {"EventSourceArn": stream, "StartingPosition": "LATEST",
+                 "BatchSize": 0},
+                {"EventSourceArn": stream, "StartingPosition": "LATEST",
+                 "Parallelism": 2},
+                {"EventSourceArn": queue, "ParallelizationFactor": 2},
+                {"EventSourceArn": queue, "BatchSize": 100},
+                {"EventSourceArn": queue,
+                 "FunctionResponseTypes": ["Unknown"]},
+        ]:
+            with self.assertRaises(ValueError):
+                validate_event_source_mapping(mapping)
+
+    def test_create_template_with_runtime_settings(self):
+        blueprint = self.create_blueprint(
+            'test_aws_lambda_Function_with_runtime_settings'
+        )
+        self.common_variables["Runtime"] = "python3.9"
+        self.common_variables["Architecture"] = "arm64"
+        self.common_variables["MemorySize"] = 3538
+        self.common_variables["Vcpus"] = 2
+        self.common_variables["EphemeralStorage"] = 2048
+        self.common_variables["Layers"] = [
+            "arn:aws:lambda:us-east-1:12345:layer:dependencies:3",
+        ]
+
+        blueprint.resolve_variables(self.generate_variables())
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_maximum_vcpus(self):
+        blueprint = self.create_blueprint('test_maximum_vcpus')
+        self.common_variables["Runtime"] = "python3.9"
+        self.common_variables["MemorySize"] = 10240
+        self.common_variables["Vcpus"] = 6
+        blueprint.resolve_variables(self.generate_variables())
+        blueprint.create_template()
+        self.assertEqual(blueprint.function.MemorySize, 10240)
+
+        blueprint = self.create_blueprint('test_maximum_vcpus')
+        self.common_variables["MemorySize"] = 10239
+        blueprint.resolve_variables(self.generate_variables())
+        with self.assertRaisesRegexp(ValueError, "10240 MB are needed"):
+            blueprint.create_template()
+
+    def test_invalid_runtime_settings(self):
+        for variables in [
+                {"MemorySize": 10241},
+                {"MemorySize": 1769, "Vcpus": 2},
+                {"Architecture": "arm64"},
+                {"Architecture": "sparc", "Runtime": "python3.9"},
+                {"EphemeralStorage": 256},
+                {"Layers": ["arn:aws:lambda:us-east-1:12345:layer:l:1"] * 6},
+        ]:
+            blueprint = self.create_blueprint('test_invalid_runtime_settings')
+            self.common_variables.update(variables)
+            with self.assertRaises((ValueError, ValidatorError)):
+                blueprint.resolve_variables(self.generate_variables())
+                blueprint.create_template()
+            self.setUp()
+
+
+class TestLayer(BlueprintTestCase):
+    def setUp(self):
+        self.ctx = Context({'namespace': 'test'})
+
+    def test_create_template(self):
+        blueprint = Layer('test_aws_lambda_Layer', self.ctx)
+        blueprint.resolve_variables([
+            Variable("Code", Code(S3Bucket="test_bucket",
+                                  S3Key="dependencies.zip")),
+            Variable("CompatibleRuntimes", ["python3.9"]),
+            Variable("CompatibleArchitectures", ["x86_64", "arm64"]),
+        ])
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_inline_code(self):
+        blueprint = Layer('test_aws_lambda_Layer_inline', self.ctx)
+        blueprint.resolve_variables([
+            Variable("Code", Code(ZipFile="def handler(): pass")),
+        ])
+        with self.assertRaises(ValueError):
+            blueprint.create_template()
+
 
 class TestFunctionScheduler(BlueprintTestCase):
     def setUp(self):
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from stacker.blueprints.variables.types import CFNString
+from stacker.context import Context
+from stacker.variables import Variable
+
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.template_cache import CACHE_DIR_ENV
+
+
+class Sample(Blueprint):
+    VARIABLES = {
+        "Param": {
+            "type": CFNString,
+            "description": "A CloudFormation parameter.",
+        },
+        "Name": {
+            "type": str,
+            "default": "",
+        },
+    }
+
+    renders = 0
+
+    def create_template(self):
+        Sample.renders += 1
+        self.add_output("Name", self.get_variables()["Name"] or "none")
+
+
+class TestBlueprint(unittest.TestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+
+    def test_parameter_definitions_are_cached(self):
+        bp = Sample("test_base", self.ctx)
+        definitions = bp.get_parameter_definitions()
+        self.assertEqual(list(definitions), ["Param"])
+        self.assertEqual(definitions["Param"]["type"], "String")
+        self.assertIs(bp.get_parameter_definitions(), definitions)
+        self.assertEqual(bp.get_required_parameter_definitions(), definitions)
+
+    def test_resolve_variables_invalidates_cache(self):
+        bp = Sample("test_base", self.ctx)
+        definitions = bp.get_parameter_definitions()
+        bp.resolve_variables([Variable("Param", "value")])
+        self.assertIsNot(bp.get_parameter_definitions(), definitions)
+        self.assertEqual(bp.get_parameter_definitions(), definitions)
+
+    def test_to_json(self):
+        bp = Sample("test_base", self.ctx)
+        rendered = bp.to_json({"Name": "sample"})
+        self.assertIn('"Param"', rendered)
+        self.assertIn('"sample"', rendered)
+
+
+class TestBlueprintTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        os.environ[CACHE_DIR_ENV] = self.cache_dir
+        self.addCleanup(os.environ.pop, CACHE_DIR_ENV)
+        Sample.renders = 0
+
+    def test_cached_template_is_reused(self):
+        rendered = Sample("test_base", self.ctx).to_json({"Name": "a"})
+        self.assertEqual(Sample.renders, 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        bp = Sample("test_base", self.ctx)
+        self.assertEqual(bp.to_json({"Name": "a"}), rendered)
+        self.assertEqual(Sample.renders, 1)
+        self.assertFalse(bp.requires_change_set)
+
+    def test_different_variables_are_rendered(self):
+        Sample("test_base", self.ctx).to_json({"Name": "a"})
+        rendered = Sample("test_base", self.ctx).to_json({"Name": "b"})
+        self.assertEqual(Sample.renders, 2)
+        self.assertIn('"b"', rendered)
+
+    def test_disabled_by_default(self):
+        del os.environ[CACHE_DIR_ENV]
+        Sample("test_base", self.ctx).to_json({"Name": "a"})
+        Sample("test_base", self.ctx).to_json({"Name": "a"})
+        self.assertEqual(Sample.renders, 2)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        os.environ[CACHE_DIR_ENV] = self.cache_dir
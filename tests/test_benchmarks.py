@@ -0,0 +1,133 @@
+import unittest
+
+from benchmarks import diff, imports, parallel, serialization
+from benchmarks.cases import CASES, get_case, get_cases
+from benchmarks import runner
+from benchmarks.runner import compare, format_results, measure
+
+
+class TestBenchmarkCases(unittest.TestCase):
+    def test_all_cases_render(self):
+        for case in CASES:
+            blueprint = case.build()
+            blueprint.create_template()
+            self.assertTrue(blueprint.template.to_json(), case.name)
+
+    def test_case_names_are_unique(self):
+        names = [case.name for case in CASES]
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_get_cases(self):
+        cases = get_cases(["DNSRecords.bulk"])
+        self.assertEqual(
+            [c.name for c in cases],
+            ["route53.DNSRecords.bulk[realistic]",
+             "route53.DNSRecords.bulk[scaled]"]
+        )
+        self.assertEqual(len(get_cases()), len(CASES))
+
+    def test_get_case(self):
+        case = get_case("vpc.VPC[realistic]")
+        self.assertEqual(case.size, "realistic")
+        with self.assertRaises(KeyError):
+            get_case("vpc.VPC")
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {
+            "a[realistic]": {
+                "create_ms": 10.0,
+                "to_json_ms": 10.0,
+                "total_ms": 20.0,
+                "peak_kb": 4096,
+                "allocations": 1000,
+            },
+        }
+
+    def test_measure(self):
+        results = measure(get_case("ecs.SimpleFargateService[realistic]"), 1)
+        self.assertEqual(
+            sorted(results),
+            ["allocations", "create_ms", "peak_kb", "to_json_ms", "total_ms"]
+        )
+        self.assertGreater(results["allocations"], 0)
+
+    def test_compare_no_regression(self):
+        results = {"a[realistic]": dict(self.baseline["a[realistic]"])}
+        results["a[realistic]"]["create_ms"] = 12.0
+        self.assertEqual(compare(results, self.baseline), [])
+
+    def test_compare_regression(self):
+        results = {"a[realistic]": dict(self.baseline["a[realistic]"])}
+        results["a[realistic]"]["allocations"] = 2000
+        self.assertEqual(
+            compare(results, self.baseline),
+            [("a[realistic]", "allocations", 1000, 2000)]
+        )
+
+    def test_compare_ignores_noise(self):
+        results = {"a[realistic]": dict(self.baseline["a[realistic]"])}
+        self.baseline["a[realistic]"]["peak_kb"] = 100
+        results["a[realistic]"]["peak_kb"] = 200
+        self.assertEqual(compare(results, self.baseline), [])
+
+    def test_compare_ignores_new_cases(self):
+        results = {"b[realistic]": dict(self.baseline["a[realistic]"])}
+        self.assertEqual(compare(results, self.baseline), [])
+
+    def test_format_results(self):
+        output = format_results(self.baseline, self.baseline)
+        self.assertIn("a[realistic]", output)
+        self.assertIn("(x1.00)", output)
+
+
+class TestParallelBenchmark(unittest.TestCase):
+    def test_get_process_counts(self):
+        self.assertEqual(parallel.get_process_counts(1), [1])
+        self.assertEqual(parallel.get_process_counts(4), [1, 2, 4])
+        self.assertEqual(parallel.get_process_counts(6), [1, 2, 4, 6])
+
+    def test_run(self):
+        results = parallel.run(get_cases(["vpc"]), stacks=3,
+                               process_counts=[1, 2])
+        self.assertEqual([r[0] for r in results], [1, 2])
+        output = parallel.format_results(results)
+        self.assertIn("1.00x", output)
+
+
+class TestSerializationBenchmark(unittest.TestCase):
+    def test_run(self):
+        results = serialization.run(get_cases(["DynamoDB[realistic]"]), 1)
+        metrics = results["dynamodb.DynamoDB[realistic]"]
+        self.assertEqual(sorted(metrics),
+                         sorted(m for m, _, _ in serialization.METRICS))
+        self.assertLess(metrics["minified_kb"], metrics["pretty_kb"])
+
+
+class TestDiffBenchmark(unittest.TestCase):
+    def test_run(self):
+        seconds, result = diff.run(400, repeat=1)
+        self.assertTrue(result.get_resources("add"))
+        self.assertTrue(result.get_resources("remove"))
+        self.assertTrue(result.get_resources("modify"))
+        self.assertTrue(result.get_resources("replace"))
+
+
+class TestImportsBenchmark(unittest.TestCase):
+    def test_get_modules(self):
+        modules = imports.get_modules()
+        self.assertIn("stacker_blueprints", modules)
+        self.assertIn("stacker_blueprints.empire.daemon", modules)
+
+    def test_no_import_regressions(self):
+        modules = [
+            "stacker_blueprints.aws_lambda",
+            "stacker_blueprints.empire.daemon",
+            "stacker_blueprints.policies",
+        ]
+        results = imports.run(modules, repeat=1)
+        baseline = runner.load_baseline(imports.DEFAULT_BASELINE)
+        self.assertEqual(
+            runner.compare(results, baseline, metrics=imports.METRICS), []
+        )
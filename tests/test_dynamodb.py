@@ -69,9 +69,249 @@ class TestDynamoDB(BlueprintTestCase):
         blueprint.create_template()
         self.assertRenderedBlueprint(blueprint)
 
+    def test_dynamodb_table_output_limit(self):
+        table = self.dynamodb_variables[0].value["UserTable"]
+        tables = dict(
+            ("Table%d" % i, dict(table, TableName="table-%d" % i))
+            for i in range(40)
+        )
+        ctx = Context({'namespace': 'test', 'environment': 'test'})
+        blueprint = stacker_blueprints.dynamodb.DynamoDB('dynamodb_table', ctx)
+        blueprint.resolve_variables([Variable('Tables', tables)])
+        with self.assertRaisesRegexp(ValueError, "ShardCount"):
+            blueprint.create_template()
+
+        # Tables without a stream only add their Name output.
+        for title in tables:
+            del tables[title]["StreamSpecification"]
+        blueprint = stacker_blueprints.dynamodb.DynamoDB('dynamodb_table', ctx)
+        blueprint.resolve_variables([Variable('Tables', tables)])
+        blueprint.create_template()
+        self.assertEqual(len(blueprint.template.outputs), 40)
+
     def test_dynamodb_autoscaling(self):
         ctx = Context({'namespace': 'test', 'environment': 'test'})
         blueprint = stacker_blueprints.dynamodb.AutoScaling('dynamodb_autoscaling', ctx)
         blueprint.resolve_variables(self.dynamodb_autoscaling_variables)
         blueprint.create_template()
         self.assertRenderedBlueprint(blueprint)
+
+    def create_table_blueprint(self, name, tables, **variables):
+        ctx = Context({'namespace': 'test', 'environment': 'test'})
+        blueprint = stacker_blueprints.dynamodb.DynamoDB(name, ctx)
+        blueprint.resolve_variables(
+            [Variable("Tables", tables)] +
+            [Variable(k, v) for k, v in variables.items()]
+        )
+        return blueprint
+
+    def get_event_table(self, **properties):
+        table = {
+            "BillingMode": "PAY_PER_REQUEST",
+            "KeySchema": [{"AttributeName": "id", "KeyType": "HASH"}],
+            "AttributeDefinitions": [
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "kind", "AttributeType": "S"},
+            ],
+            "GlobalSecondaryIndexes": [
+                {
+                    "IndexName": "kind-index",
+                    "KeySchema": [{"AttributeName": "kind",
+                                   "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "KEYS_ONLY"},
+                },
+            ],
+        }
+        table.update(properties)
+        return table
+
+    def test_dynamodb_table_on_demand_with_dax(self):
+        tables = dict(self.dynamodb_variables[0].value)
+        tables["EventTable"] = self.get_event_table()
+        blueprint = self.create_table_blueprint(
+            'dynamodb_table_on_demand_with_dax', tables,
+            DaxCluster={
+                "NodeType": "dax.r5.large",
+                "SubnetIds": ["subnet-12345678", "subnet-23456789"],
+                "SecurityGroupIds": ["sg-12345678"],
+                "Parameters": {"record-ttl-millis": 60000},
+            },
+        )
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_dynamodb_table_billing_mode_validation(self):
+        for table in [
+                self.get_event_table(
+                    ProvisionedThroughput={"ReadCapacityUnits": 5,
+                                           "WriteCapacityUnits": 5}),
+                self.get_event_table(BillingMode="PROVISIONED"),
+                self.get_event_table(BillingMode="ON_DEMAND"),
+        ]:
+            blueprint = self.create_table_blueprint(
+                'dynamodb_table_billing_mode', {"EventTable": table})
+            blueprint.create_template()
+            with self.assertRaises(ValueError):
+                blueprint.render_template()
+
+    def test_dynamodb_dax_validation(self):
+        for config in [
+                {"NodeType": "dax.r5.large"},
+                {"NodeType": "dax.r5.large", "SubnetIds": ["subnet-1"],
+                 "Nodes": 3},
+        ]:
+            blueprint = self.create_table_blueprint(
+                'dynamodb_dax', self.dynamodb_variables[0].value,
+                DaxCluster=config)
+            with self.assertRaises(ValueError):
+                blueprint.create_template()
+
+    def test_dynamodb_index_autoscaling(self):
+        ctx = Context({'namespace': 'test', 'environment': 'test'})
+        blueprint = stacker_blueprints.dynamodb.AutoScaling(
+            'dynamodb_index_autoscaling', ctx)
+        blueprint.resolve_variables([
+            Variable("AutoScalingConfigs", [
+                {
+                    "table": "test-user-table",
+                    "read": {"min": 5, "max": 100},
+                    "write": {"max": 50},
+                    "indexes": {
+                        "name-index": {
+                            "read": {"min": 5, "max": 200, "target": 70.0},
+                            "write": {"max": 25},
+                        },
+                    },
+                },
+            ])
+        ])
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+        target = blueprint.template.resources[
+            "TestUserTableNameIndexReadScalableTarget"]
+        self.assertEqual(target.ResourceId,
+                         "table/test-user-table/index/name-index")
+        self.assertEqual(target.ScalableDimension,
+                         "dynamodb:index:ReadCapacityUnits")
+
+
+class TestAutoScalingSchema(BlueprintTestCase):
+    def create_blueprint(self, name, configs, **variables):
+        ctx = Context({'namespace': 'test', 'environment': 'test'})
+        blueprint = stacker_blueprints.dynamodb.AutoScaling(name, ctx)
+        blueprint.resolve_variables(
+            [Variable("AutoScalingConfigs", configs)] +
+            [Variable(k, v) for k, v in variables.items()]
+        )
+        return blueprint
+
+    def test_presets_and_scheduled_actions(self):
+        blueprint = self.create_blueprint(
+            'dynamodb_autoscaling_presets',
+            [
+                {
+                    "table": "test-event-table",
+                    "preset": "bursty",
+                    "read": {
+                        "scheduled": [
+                            {"name": "morning-peak",
+                             "schedule": "cron(45 7 ? * MON-FRI *)",
+                             "min": 500},
+                            {"name": "evening",
+                             "schedule": "cron(0 20 ? * * *)",
+                             "min": 5},
+                        ],
+                    },
+                    "indexes": {
+                        "event-type-index": {"preset": "reporting"},
+                        "kind-index": {"write": {"max": 10}},
+                    },
+                },
+            ],
+            Presets={"reporting": {"min": 10, "max": 200, "target": 60.0}},
+        )
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+        resources = blueprint.template.resources
+        kind_write = resources["TestEventTableKindIndexWriteScalablePolicy"]
+        config = kind_write.TargetTrackingScalingPolicyConfiguration
+        self.assertEqual(config.TargetValue, 40.0)
+        self.assertEqual(
+            resources["TestEventTableKindIndexWriteScalableTarget"]
+            .MaxCapacity, 10)
+
+    def test_missing_capacity_type(self):
+        blueprint = self.create_blueprint(
+            'dynamodb_autoscaling_write_only',
+            [{"table": "test-user-table", "write": {"max": 25}}],
+        )
+        blueprint.create_template()
+        resources = blueprint.template.resources
+        self.assertIn("TestUserTableWriteScalableTarget", resources)
+        self.assertNotIn("TestUserTableReadScalableTarget", resources)
+
+    def test_colliding_logical_ids(self):
+        targets = stacker_blueprints.dynamodb.get_scaling_targets([
+            {"table": "user-table", "read": {}},
+            {"table": "user_table", "read": {}},
+            {"table": "group-table", "read": {}},
+        ])
+        prefixes = stacker_blueprints.dynamodb.get_scaling_prefixes(targets)
+        self.assertEqual(prefixes[("group-table", None)], "GroupTable")
+        self.assertNotEqual(prefixes[("user-table", None)],
+                            prefixes[("user_table", None)])
+        self.assertTrue(prefixes[("user_table", None)].startswith(
+            "UserTable"))
+
+    def test_invalid_configs(self):
+        for configs in [
+                [{"read": {}}],
+                [{"table": "t"}],
+                [{"table": "t", "read": {}}, {"table": "t", "write": {}}],
+                [{"table": "t", "reads": {}}],
+                [{"table": "t", "read": {"minimum": 1}}],
+                [{"table": "t", "read": {"min": 10, "max": 5}}],
+                [{"table": "t", "read": {"target": 95.0}}],
+                [{"table": "t", "preset": "unknown"}],
+                [{"table": "t", "read": {"scheduled": [
+                    {"name": "peak", "schedule": "daily", "min": 5}]}}],
+                [{"table": "t", "read": {"scheduled": [
+                    {"name": "peak", "schedule": "rate(1 day)"}]}}],
+                [{"table": "t", "read": {"max": 100, "scheduled": [
+                    {"name": "peak", "schedule": "rate(1 day)",
+                     "min": 500}]}}],
+                [{"table": "t", "indexes": {"i": {}}}],
+        ]:
+            with self.assertRaises(ValueError):
+                stacker_blueprints.dynamodb.get_scaling_targets(configs)
+
+    def test_sharded_tables(self):
+        configs = [{"table": "table-%d" % i, "preset": "steady"}
+                   for i in range(120)]
+        blueprint = self.create_blueprint(
+            'dynamodb_autoscaling_unsharded', configs)
+        with self.assertRaises(ValueError):
+            blueprint.create_template()
+
+        tables = set()
+        for shard_index in range(3):
+            blueprint = self.create_blueprint(
+                'dynamodb_autoscaling_sharded', configs,
+                ShardCount=3, ShardIndex=shard_index)
+            blueprint.create_template()
+            tables.update(blueprint.tables)
+        self.assertEqual(len(tables), 120)
+
+    def test_shard_check_counts_indexes(self):
+        configs = [{"table": "table-%d" % i, "preset": "steady",
+                    "indexes": {"name-index": {}}}
+                   for i in range(60)]
+        blueprint = self.create_blueprint(
+            'dynamodb_autoscaling_unsharded', configs)
+        with self.assertRaisesRegexp(ValueError, "least 3 shards"):
+            blueprint.create_template()
+        for shard_index in range(5):
+            blueprint = self.create_blueprint(
+                'dynamodb_autoscaling_sharded', configs,
+                ShardCount=5, ShardIndex=shard_index)
+            blueprint.create_template()
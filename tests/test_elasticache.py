@@ -0,0 +1,129 @@
+import unittest
+
+from stacker.blueprints.testutil import BlueprintTestCase
+from stacker.context import Context
+from stacker.variables import Variable
+
+from stacker_blueprints.elasticache.base import (
+    CLUSTER_SLOTS,
+    parse_slots,
+    split_slots,
+    validate_node_groups,
+)
+from stacker_blueprints.elasticache.redis import RedisReplicationGroup
+
+REDIS_VARIABLES = {
+    "VpcId": "vpc-11111111",
+    "Subnets": "subnet-11111111,subnet-22222222",
+    "AutoMinorVersionUpgrade": True,
+    "CacheNodeType": "cache.r6gd.xlarge",
+    "EngineVersion": "6.2",
+    "ParameterGroupFamily": "redis6.x",
+    "ClusterParameters": {"maxmemory-policy": "allkeys-lru"},
+    "InternalZoneId": "Z1234567890",
+    "InternalZoneName": "internal.",
+    "InternalHostname": "cache",
+}
+
+
+class TestSlots(unittest.TestCase):
+    def test_split_slots(self):
+        self.assertEqual(split_slots(1), ["0-16383"])
+        self.assertEqual(split_slots(3),
+                         ["0-5461", "5462-10922", "10923-16383"])
+
+    def test_parse_slots(self):
+        self.assertEqual(parse_slots("0-100,200-16383"),
+                         [(0, 100), (200, 16383)])
+        for slots in ("0-16384", "100-0", "0,100", "a-b"):
+            with self.assertRaises(ValueError):
+                parse_slots(slots)
+
+    def test_validate_node_groups(self):
+        node_groups = validate_node_groups([{}, {"ReplicaCount": 2}], 1)
+        self.assertEqual(
+            [(g["NodeGroupId"], g["Slots"], g["ReplicaCount"])
+             for g in node_groups],
+            [("0001", "0-8191", 1), ("0002", "8192-16383", 2)])
+
+    def test_invalid_node_groups(self):
+        last = CLUSTER_SLOTS - 1
+        invalid = [
+            [{"Slots": "0-100"}, {}],
+            [{"Slots": "0-8191"}, {"Slots": "8000-%d" % last}],
+            [{"Slots": "0-8191"}, {"Slots": "8192-16000"}],
+            [{"NodeGroupId": "1"}, {"NodeGroupId": "1"}],
+            [{"NodeGroupId": "shard"}],
+            [{"ReplicaCount": 6}],
+            [{"ReplicaCount": 2, "ReplicaAvailabilityZones": ["us-east-1a"]}],
+            [{"Replicas": 1}],
+        ]
+        for node_groups in invalid:
+            with self.assertRaises(ValueError):
+                validate_node_groups(node_groups, 1)
+
+
+class TestRedisReplicationGroup(BlueprintTestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+
+    def build(self, name="redis", **variables):
+        blueprint = RedisReplicationGroup(name, self.ctx)
+        blueprint.resolve_variables(
+            [Variable(k, v)
+             for k, v in dict(REDIS_VARIABLES, **variables).items()])
+        blueprint.create_template()
+        return blueprint
+
+    def test_cluster_mode(self):
+        blueprint = self.build(
+            "test_elasticache_redis_cluster_mode",
+            DataTieringEnabled=True,
+            NodeGroups=[
+                {"Slots": "0-4095", "PrimaryAvailabilityZone": "us-east-1a",
+                 "ReplicaAvailabilityZones": ["us-east-1b"]},
+                {"Slots": "4096-16383", "ReplicaCount": 2},
+            ],
+        )
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_num_node_groups(self):
+        template = self.build(NumNodeGroups=3,
+                              ReplicasPerNodeGroup=2).template.to_dict()
+        group = template["Resources"]["ReplicationGroup"]
+        self.assertEqual(group["Properties"]["NumNodeGroups"], 3)
+        self.assertEqual(group["Properties"]["ReplicasPerNodeGroup"], 2)
+        self.assertNotIn("NumCacheClusters", group["Properties"])
+        self.assertNotIn("NodeGroupConfiguration", group["Properties"])
+        self.assertEqual(group["UpdatePolicy"],
+                         {"UseOnlineResharding": "true"})
+        self.assertEqual(
+            template["Resources"]["ParameterGroup"]["Properties"][
+                "Properties"]["cluster-enabled"], "yes")
+        self.assertIn("ConfigurationAddress", template["Outputs"])
+        self.assertNotIn("PrimaryAddress", template["Outputs"])
+
+    def test_cluster_mode_disabled(self):
+        template = self.build().template.to_dict()
+        group = template["Resources"]["ReplicationGroup"]
+        self.assertEqual(group["Properties"]["NumCacheClusters"], 2)
+        self.assertNotIn("UpdatePolicy", group)
+        self.assertIn("PrimaryAddress", template["Outputs"])
+        self.assertNotIn("ConfigurationAddress", template["Outputs"])
+
+    def test_invalid_cluster_mode(self):
+        invalid = [
+            {"NumNodeGroups": 2, "ParameterGroupFamily": "redis2.8"},
+            {"NumNodeGroups": 2, "AutomaticFailoverEnabled": False},
+            {"NumNodeGroups": 2,
+             "PreferredCacheClusterAZs": ["us-east-1a", "us-east-1b"]},
+            {"NumNodeGroups": 2, "ReplicasPerNodeGroup": 6},
+            {"NumNodeGroups": 501},
+            {"NumNodeGroups": 3, "NodeGroups": [{}, {}]},
+            {"NumNodeGroups": 2,
+             "ClusterParameters": {"cluster-enabled": "no"}},
+            {"DataTieringEnabled": True, "CacheNodeType": "cache.r6g.large"},
+        ]
+        for variables in invalid:
+            with self.assertRaises(ValueError):
+                self.build(**variables)
@@ -0,0 +1,150 @@
+import unittest
+
+from stacker.config import Config
+from stacker.context import Context
+from stacker.variables import Variable
+
+from stacker_blueprints.elasticache.redis import RedisReplicationGroup
+from stacker_blueprints.parameter_presets import (
+    GIB,
+    get_family_version,
+    get_instance_memory,
+    get_parameters,
+)
+from stacker_blueprints.rds.aurora.base import AuroraPGCluster
+from stacker_blueprints.rds.postgres import MasterInstance
+
+
+def render(blueprint_class, **variables):
+    blueprint = blueprint_class("test", Context(config=Config({"namespace": "test"})))
+    blueprint.resolve_variables(
+        [Variable(k, v) for k, v in variables.items()])
+    blueprint.create_template()
+    return blueprint.template.to_dict()
+
+
+class TestParameterPresets(unittest.TestCase):
+    def test_get_family_version(self):
+        self.assertEqual(get_family_version("redis6.x", "redis"), (6,))
+        self.assertEqual(get_family_version("redis3.2", "redis"), (3, 2))
+        self.assertEqual(get_family_version("postgres9.6", "postgres"),
+                         (9, 6))
+        self.assertEqual(
+            get_family_version("aurora-postgresql11", "aurora-postgresql"),
+            (11,))
+        with self.assertRaises(ValueError):
+            get_family_version("memcached1.4", "redis")
+
+    def test_get_instance_memory(self):
+        self.assertEqual(get_instance_memory("db.r5.large"), 16 * GIB)
+        self.assertEqual(get_instance_memory("db.m6g.4xlarge"), 64 * GIB)
+        self.assertEqual(get_instance_memory("db.t3.medium"), 4 * GIB)
+        with self.assertRaises(ValueError):
+            get_instance_memory("db.serverless")
+
+    def test_redis_presets(self):
+        self.assertEqual(
+            get_parameters("redis", "redis3.2", "cache",
+                           {"reserved-memory-percent": "30"}),
+            {"maxmemory-policy": "allkeys-lru",
+             "reserved-memory-percent": "30"})
+        self.assertEqual(
+            get_parameters("redis", "redis6.x", "store")["activedefrag"],
+            "yes")
+
+    def test_postgres_presets(self):
+        parameters = get_parameters("postgres", "postgres12", "oltp",
+                                    instance_class="db.r5.large")
+        self.assertEqual(parameters["shared_buffers"], "524288")
+        self.assertEqual(parameters["effective_cache_size"], "1572864")
+        self.assertEqual(parameters["work_mem"], "32768")
+        self.assertEqual(parameters["maintenance_work_mem"], "1048576")
+        self.assertEqual(
+            get_parameters("postgres", "postgres9.5", "analytics",
+                           instance_class="db.t3.micro")["work_mem"],
+            "16384")
+        self.assertNotIn(
+            "idle_in_transaction_session_timeout",
+            get_parameters("postgres", "postgres9.5", "oltp",
+                           instance_class="db.m5.large"))
+
+    def test_aurora_postgres_presets(self):
+        parameters = get_parameters("aurora-postgresql",
+                                    "aurora-postgresql11", "analytics")
+        self.assertEqual(parameters["work_mem"],
+                         "GREATEST({DBInstanceClassMemory/65536},4096)")
+        self.assertNotIn("shared_buffers", parameters)
+
+    def test_no_preset(self):
+        self.assertEqual(get_parameters("MySQL", "mysql5.7", "",
+                                         {"a": "b"}), {"a": "b"})
+        self.assertEqual(get_parameters("redis", "unknown", "",
+                                        {"timeout": "0"}), {"timeout": "0"})
+
+    def test_invalid(self):
+        invalid = [
+            ("MySQL", "mysql5.7", "oltp", {}),
+            ("redis", "redis6.x", "oltp", {}),
+            ("redis", "postgres12", "cache", {}),
+            ("redis", "redis3.2", "", {"activedefrag": "yes"}),
+            ("postgres", "postgres9.5", "",
+             {"idle_in_transaction_session_timeout": "0"}),
+        ]
+        for engine, family, preset, parameters in invalid:
+            with self.assertRaises(ValueError):
+                get_parameters(engine, family, preset, parameters)
+
+
+class TestBlueprintPresets(unittest.TestCase):
+    def test_redis_replication_group(self):
+        template = render(
+            RedisReplicationGroup,
+            VpcId="vpc-11111111",
+            Subnets="subnet-11111111",
+            AutoMinorVersionUpgrade=True,
+            CacheNodeType="cache.r6g.large",
+            EngineVersion="6.2",
+            ParameterGroupFamily="redis6.x",
+            ParameterPreset="cache",
+            ClusterParameters={"maxmemory-policy": "volatile-lru"},
+        )
+        parameters = template["Resources"]["ParameterGroup"]["Properties"][
+            "Properties"]
+        self.assertEqual(parameters["maxmemory-policy"], "volatile-lru")
+        self.assertEqual(parameters["lazyfree-lazy-eviction"], "yes")
+
+    def test_postgres_instance(self):
+        template = render(
+            MasterInstance,
+            VpcId="vpc-11111111",
+            Subnets="subnet-11111111",
+            InstanceType="db.r5.xlarge",
+            DBFamily="postgres12",
+            ParameterPreset="oltp",
+            MasterUser="root",
+            MasterUserPassword="password",
+            EngineVersion="12.5",
+            DatabaseName="app",
+            EngineMajorVersion="12",
+        )
+        parameters = template["Resources"]["ParameterGroup"]["Properties"][
+            "Parameters"]
+        self.assertEqual(parameters["shared_buffers"], "1048576")
+
+    def test_aurora_cluster(self):
+        template = render(
+            AuroraPGCluster,
+            VpcId="vpc-11111111",
+            Subnets="subnet-11111111",
+            DBFamily="aurora-postgresql11",
+            ParameterPreset="oltp",
+            MasterUser="root",
+            MasterUserPassword="password",
+        )
+        resources = template["Resources"]
+        self.assertIn("work_mem", resources["ClusterParameterGroup"][
+            "Properties"]["Parameters"])
+        self.assertEqual(
+            resources["DBCluster"]["Properties"][
+                "DBClusterParameterGroupName"],
+            {"Ref": "ClusterParameterGroup"})
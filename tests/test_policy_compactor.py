@@ -0,0 +1,140 @@
+import json
+import unittest
+
+import awacs.ec2
+import awacs.s3
+import awacs.sqs
+from awacs.aws import Action, Allow, Condition, Deny, Policy, Statement
+from awacs.aws import StringEquals
+from troposphere import Ref
+
+from stacker_blueprints.policy_compactor import (
+    compact_policy,
+    compact_statements,
+    get_policy_savings,
+    to_json,
+)
+
+
+def as_dicts(statements):
+    return json.loads(to_json(statements))
+
+
+class TestPolicyCompactor(unittest.TestCase):
+    def test_dedupes_actions_and_resources(self):
+        statements = compact_statements([
+            Statement(
+                Effect=Allow,
+                Action=[awacs.s3.GetObject, Action("s3", "getobject")],
+                Resource=[Ref("Bucket"), Ref("Bucket"), "arn:aws:s3:::b"],
+            ),
+        ])
+        self.assertEqual(as_dicts(statements), [{
+            "Effect": "Allow",
+            "Action": ["s3:GetObject"],
+            "Resource": [{"Ref": "Bucket"}, "arn:aws:s3:::b"],
+        }])
+
+    def test_drops_actions_matched_by_wildcards(self):
+        statements = compact_statements([
+            Statement(
+                Effect=Allow,
+                Action=[awacs.ec2.DescribeSubnets, awacs.ec2.Action("Desc*"),
+                        awacs.ec2.CreateTags],
+                Resource=["arn:aws:ec2:::a", "*"],
+            ),
+        ])
+        self.assertEqual(as_dicts(statements), [{
+            "Effect": "Allow",
+            "Action": ["ec2:Desc*", "ec2:CreateTags"],
+            "Resource": ["*"],
+        }])
+
+    def test_merges_statements(self):
+        statements = compact_statements([
+            Statement(Effect=Allow, Action=[awacs.s3.GetObject],
+                      Resource=["arn:aws:s3:::a/*"]),
+            Statement(Effect=Allow, Action=[awacs.sqs.SendMessage],
+                      Resource=["*"]),
+            Statement(Effect=Allow, Action=[awacs.s3.PutObject],
+                      Resource=["arn:aws:s3:::a/*"]),
+            Statement(Effect=Allow, Action=[awacs.sqs.SendMessage],
+                      Resource=["arn:aws:s3:::b/*"]),
+            Statement(Effect=Allow, Action=[awacs.s3.PutObject,
+                                            awacs.s3.GetObject],
+                      Resource=["arn:aws:s3:::c/*"]),
+            Statement(Effect=Deny, Action=[awacs.s3.DeleteObject],
+                      Resource=["arn:aws:s3:::a/*"]),
+        ])
+        self.assertEqual(as_dicts(statements), [
+            {
+                "Effect": "Allow",
+                "Action": ["s3:GetObject", "s3:PutObject"],
+                "Resource": ["arn:aws:s3:::a/*", "arn:aws:s3:::c/*"],
+            },
+            {
+                "Effect": "Allow",
+                "Action": ["sqs:SendMessage"],
+                "Resource": ["*"],
+            },
+            {
+                "Effect": "Deny",
+                "Action": ["s3:DeleteObject"],
+                "Resource": ["arn:aws:s3:::a/*"],
+            },
+        ])
+
+    def test_does_not_merge_different_conditions_or_sids(self):
+        condition = Condition(StringEquals("aws:SourceVpc", "vpc-1"))
+        statements = compact_statements([
+            Statement(Effect=Allow, Action=[awacs.s3.GetObject],
+                      Resource=["*"]),
+            Statement(Effect=Allow, Action=[awacs.s3.PutObject],
+                      Resource=["*"], Condition=condition),
+            Statement(Sid="Put", Effect=Allow, Action=[awacs.s3.PutObject],
+                      Resource=["*"]),
+        ])
+        self.assertEqual(len(statements), 3)
+
+    def test_service_wildcards(self):
+        all_actions = [
+            value for value in vars(awacs.sqs).values()
+            if isinstance(value, awacs.sqs.Action)
+        ]
+        statements = [
+            Statement(Effect=Allow, Action=all_actions + [awacs.s3.GetObject],
+                      Resource=["*"]),
+        ]
+        self.assertEqual(
+            len(compact_statements(statements)[0].Action),
+            len(all_actions) + 1
+        )
+        self.assertEqual(
+            as_dicts(compact_statements(statements, service_wildcards=True)),
+            [{
+                "Effect": "Allow",
+                "Action": ["sqs:*", "s3:GetObject"],
+                "Resource": ["*"],
+            }]
+        )
+
+    def test_compact_policy_savings(self):
+        policy = Policy(
+            Version="2012-10-17",
+            Statement=[
+                Statement(Effect=Allow, Action=[awacs.s3.GetObject],
+                          Resource=["*"]),
+                Statement(Effect=Allow, Action=[awacs.s3.PutObject],
+                          Resource=["*"]),
+            ],
+        )
+        compacted = compact_policy(policy)
+        self.assertEqual(compacted.Version, "2012-10-17")
+        savings = get_policy_savings(policy, compacted)
+        self.assertEqual(savings.statements_before, 2)
+        self.assertEqual(savings.statements_after, 1)
+        self.assertEqual(
+            savings.saved_bytes,
+            len(to_json(policy)) - len(to_json(compacted))
+        )
+        self.assertGreater(savings.saved_bytes, 0)
@@ -0,0 +1,56 @@
+import unittest
+
+from stacker.context import Context
+from stacker.variables import Variable
+
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.render import render_blueprints
+
+
+class Sample(Blueprint):
+    VARIABLES = {
+        "Name": {
+            "type": str,
+        },
+    }
+
+    def create_template(self):
+        name = self.get_variables()["Name"]
+        if not name:
+            raise ValueError("Name is required.")
+        self.add_output("Name", name)
+
+
+class TestRenderBlueprints(unittest.TestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+
+    def blueprints(self, names):
+        blueprints = []
+        for i, name in enumerate(names):
+            bp = Sample("sample%d" % i, self.ctx)
+            bp.resolve_variables([Variable("Name", name)])
+            blueprints.append(bp)
+        return blueprints
+
+    def test_render_in_order(self):
+        names = ["one", "two", "three", "four", "five"]
+        expected = [
+            bp.to_json({"Name": name})
+            for bp, name in zip(self.blueprints(names), names)
+        ]
+        for processes in (1, 2):
+            results = render_blueprints(self.blueprints(names), processes)
+            self.assertEqual([r.rendered for r in results], expected)
+            self.assertEqual([r.name for r in results],
+                             ["sample%d" % i for i in range(len(names))])
+            for result in results:
+                self.assertEqual(len(result.version), 8)
+                self.assertGreaterEqual(result.seconds, 0)
+
+    def test_render_error(self):
+        for processes in (1, 2):
+            with self.assertRaises(RuntimeError) as cm:
+                render_blueprints(self.blueprints(["one", ""]), processes)
+            self.assertIn("sample1", str(cm.exception))
+            self.assertIn("Name is required.", str(cm.exception))
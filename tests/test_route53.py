@@ -1,14 +1,22 @@
+import os
+import shutil
+import tempfile
+
 from stacker.context import Context
 from stacker.config import Config
 from stacker.variables import Variable
 
 from stacker_blueprints.route53 import (
+  ALIAS_TARGET_RESOLVER,
   DNSRecords,
   get_record_set_md5,
+  read_record_sets_file,
 )
 
 from stacker.blueprints.testutil import BlueprintTestCase
 
+from troposphere import GetAtt
+
 
 class TestRoute53(BlueprintTestCase):
     def setUp(self):
@@ -206,6 +214,61 @@ class TestRoute53(BlueprintTestCase):
             record_sets[0].AliasTarget.HostedZoneId, "Z3AQBSTGFYJSTF"
         )
 
+    def test_alias_target_resolver(self):
+        names = {
+            "d123456789f.cloudfront.net.": "Z2FDTNDATAQYW2",
+            "dualstack.myelb-1234567890.us-east-1.elb.amazonaws.com.":
+                "Z35SXDOTRQ7X7K",
+            "MyELB-1234567890.EU-WEST-1.elb.amazonaws.com":
+                "Z32O12XQLNTSW2",
+            "mynlb-1234567890abcdef.elb.us-west-2.amazonaws.com.":
+                "Z18D5FSROUN65G",
+            "s3-website-us-east-1.amazonaws.com": "Z3AQBSTGFYJSTF",
+            "mybucket.s3-website.us-east-2.amazonaws.com.": "Z2O1EMRO9K5GLX",
+            "mybucket.s3-website-eu-central-1.amazonaws.com.":
+                "Z21DNDUVLTQW6Q",
+            "d-abcde12345.execute-api.us-east-1.amazonaws.com.":
+                "Z1UJRXOUMOOFQ8",
+            "a1234567890abcdef.awsglobalaccelerator.com.": "Z2BJ6XQ5FK7U4H",
+            "host.testdomain.com.": None,
+            "myelb.elb.amazonaws.com.testdomain.com.": None,
+        }
+        for name, zone_id in names.items():
+            self.assertEqual(ALIAS_TARGET_RESOLVER.resolve(name), zone_id,
+                             name)
+
+    def test_alias_target_resolver_unknown_endpoint(self):
+        for name in ("myelb-1234567890.mars-east-1.elb.amazonaws.com.",
+                     "mynlb-1234567890.elb.mars-east-1.amazonaws.com.",
+                     "mybucket.s3-website-mars-east-1.amazonaws.com.",
+                     "d-abcde12345.execute-api.mars-east-1.amazonaws.com.",
+                     GetAtt("LoadBalancer", "DNSName")):
+            with self.assertRaises(ValueError):
+                ALIAS_TARGET_RESOLVER.resolve(name)
+
+    def test_elb_alias_unknown_region(self):
+        blueprint = DNSRecords('test_route53_elb_alias_unknown_region',
+                               self.ctx)
+        blueprint.resolve_variables(
+            [
+                Variable(
+                    "RecordSets",
+                    [
+                        {
+                            "Name": "host.testdomain.com.",
+                            "Type": "A",
+                            "AliasTarget": {
+                                "DNSName": "myelb-1234567890-abcdef.mars-east-1.elb.amazonaws.com.",  # noqa
+                            },
+                        },
+                    ]
+                ),
+                Variable("HostedZoneId", "fake_zone_id"),
+            ]
+        )
+        with self.assertRaises(ValueError):
+            blueprint.create_template()
+
     def test_error_when_specify_both_hosted_zone_id_and_name(self):
         blueprint = DNSRecords('route53_both_hosted_zone_id_and_name_error',
                                self.ctx)
@@ -274,6 +337,185 @@ class TestRoute53(BlueprintTestCase):
         )
 
 
+    def bulk_blueprint(self, record_sets, name="route53_bulk", **variables):
+        blueprint = DNSRecords(name, self.ctx)
+        variables.setdefault("HostedZoneId", "fake_zone_id")
+        blueprint.resolve_variables(
+            [Variable("BulkRecordSets", record_sets)] +
+            [Variable(k, v) for k, v in variables.items()]
+        )
+        return blueprint
+
+    def bulk_record_set_names(self, blueprint):
+        return set(
+            rs.Name
+            for group in blueprint.template.resources.values()
+            for rs in group.RecordSets
+        )
+
+    def test_create_template_bulk_record_sets(self):
+        blueprint = self.bulk_blueprint(
+            [
+                {
+                    "Name": "host%d.testdomain.com." % i,
+                    "Type": "A",
+                    "TTL": "300",
+                    "ResourceRecords": ["10.0.0.%d" % i],
+                }
+                for i in range(6)
+            ] + [
+                {
+                    "Name": "cdn.testdomain.com.",
+                    "Type": "A",
+                    "AliasTarget": {
+                        "DNSName": "d123456789f.cloudfront.net.",
+                    },
+                },
+                {
+                    "Name": "disabled.testdomain.com.",
+                    "Type": "A",
+                    "TTL": "300",
+                    "ResourceRecords": ["10.0.1.1"],
+                    "Enabled": False,
+                },
+            ],
+            name="route53_bulk_record_sets",
+            BulkGroupCount=3,
+        )
+        blueprint.create_template()
+        self.assertRenderedBlueprint(blueprint)
+
+    def test_bulk_record_sets_shards_partition_records(self):
+        record_sets = [
+            {
+                "Name": "host%d.testdomain.com." % i,
+                "Type": "A",
+                "TTL": "300",
+                "ResourceRecords": ["10.0.%d.%d" % (i // 256, i % 256)],
+            }
+            for i in range(300)
+        ]
+        names = []
+        for index in range(3):
+            blueprint = self.bulk_blueprint(
+                [dict(rs) for rs in record_sets],
+                BulkShardCount=3,
+                BulkShardIndex=index,
+            )
+            blueprint.create_template()
+            names.append(self.bulk_record_set_names(blueprint))
+
+        self.assertEqual(sum(len(n) for n in names), len(record_sets))
+        self.assertEqual(set.union(*names),
+                         set(rs["Name"] for rs in record_sets))
+        for shard_names in names:
+            self.assertTrue(shard_names)
+
+    def test_bulk_record_sets_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        csv_path = os.path.join(tmp_dir, "records.csv")
+        with open(csv_path, "w") as fd:
+            fd.write(
+                "Name,Type,TTL,ResourceRecords,AliasTarget.DNSName\n"
+                "mx.testdomain.com.,MX,300,10 mx1.example.com|"
+                "20 mx2.example.com,\n"
+                "lb.testdomain.com.,A,,,"
+                "test-1234.us-east-1.elb.amazonaws.com.\n"
+            )
+        yaml_path = os.path.join(tmp_dir, "records.yaml")
+        with open(yaml_path, "w") as fd:
+            fd.write(
+                "Name: one.testdomain.com.\n"
+                "Type: A\n"
+                "TTL: 300\n"
+                "ResourceRecords: [10.0.0.1]\n"
+                "---\n"
+                "- Name: two.testdomain.com.\n"
+                "  Type: A\n"
+                "  TTL: 300\n"
+                "  ResourceRecords: [10.0.0.2]\n"
+            )
+
+        self.assertEqual(
+            list(read_record_sets_file(csv_path)),
+            [
+                {
+                    "Name": "mx.testdomain.com.",
+                    "Type": "MX",
+                    "TTL": "300",
+                    "ResourceRecords": ["10 mx1.example.com",
+                                        "20 mx2.example.com"],
+                },
+                {
+                    "Name": "lb.testdomain.com.",
+                    "Type": "A",
+                    "AliasTarget": {
+                        "DNSName": "test-1234.us-east-1.elb.amazonaws.com.",
+                    },
+                },
+            ]
+        )
+        self.assertEqual(
+            [rs["Name"] for rs in read_record_sets_file(yaml_path)],
+            ["one.testdomain.com.", "two.testdomain.com."]
+        )
+
+        blueprint = self.bulk_blueprint([], BulkRecordSetsFile=csv_path)
+        blueprint.create_template()
+        self.assertEqual(
+            self.bulk_record_set_names(blueprint),
+            set(["mx.testdomain.com.", "lb.testdomain.com."])
+        )
+
+    def test_bulk_record_sets_validation_errors(self):
+        blueprint = self.bulk_blueprint([
+            {"Name": "ok.testdomain.com.", "Type": "A", "TTL": "300",
+             "ResourceRecords": ["10.0.0.1"]},
+            {"Name": "nottl.testdomain.com.", "Type": "A",
+             "ResourceRecords": ["10.0.0.1"]},
+            {"Name": "both.testdomain.com.", "Type": "A", "TTL": "300",
+             "ResourceRecords": ["10.0.0.1"],
+             "AliasTarget": {"DNSName": "d1.cloudfront.net."}},
+            {"Type": "A"},
+            {"Name": "typo.testdomain.com.", "Type": "A", "TTl": "300",
+             "ResourceRecords": ["10.0.0.1"]},
+        ])
+        with self.assertRaises(ValueError) as cm:
+            blueprint.create_template()
+        message = str(cm.exception)
+        self.assertNotIn("record set 0", message)
+        for i in range(1, 5):
+            self.assertIn("record set %d" % i, message)
+
+    def test_bulk_record_sets_group_limit(self):
+        blueprint = self.bulk_blueprint(
+            [
+                {
+                    "Name": "host%d.testdomain.com." % i,
+                    "Type": "A",
+                    "TTL": "300",
+                    "ResourceRecords": ["10.0.0.1"] * 10,
+                }
+                for i in range(60)
+            ],
+            BulkGroupCount=1,
+        )
+        with self.assertRaises(ValueError):
+            blueprint.create_template()
+
+    def test_bulk_record_sets_shards_need_hosted_zone_id(self):
+        blueprint = self.bulk_blueprint(
+            [],
+            BulkRecordSetsFile="records.csv",
+            BulkShardCount=2,
+            HostedZoneId="",
+            HostedZoneName="testdomain.com",
+        )
+        with self.assertRaises(ValueError):
+            blueprint.create_template()
+
+
 if __name__ == '__main__':
     import unittest
 
@@ -63,3 +63,23 @@ class TestBlueprint(BlueprintTestCase):
         blueprint.resolve_variables(v)
         blueprint.create_template()
         self.assertRenderedBlueprint(blueprint)
+
+    def test_s3_static_website_shard_limit(self):
+        """Website buckets add a policy and two more outputs each."""
+        ctx = Context(config=Config({'namespace': 'test'}))
+        website = {'WebsiteConfiguration': {'IndexDocument': 'index.html'}}
+        buckets = dict(('Site%d' % i, website) for i in range(15))
+
+        blueprint = Buckets('s3_static_website', ctx)
+        blueprint.resolve_variables([Variable('Buckets', buckets)])
+        with self.assertRaisesRegexp(ValueError, "ShardCount"):
+            blueprint.create_template()
+
+        buckets = dict(('Site%d' % i, website) for i in range(12))
+        blueprint = Buckets('s3_static_website', ctx)
+        blueprint.resolve_variables([
+            Variable('Buckets', buckets),
+            Variable('ReadRoles', ['Role1']),
+        ])
+        blueprint.create_template()
+        self.assertEqual(len(blueprint.template.outputs), 60)
@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import unittest
+
+from awacs.aws import Allow, Policy, Statement
+from awacs.s3 import GetObject
+from stacker.context import Context
+from troposphere import GetAtt, Output, Ref, Tags, Template, iam, s3, sns
+
+from benchmarks.cases import get_cases
+from stacker_blueprints.serialization import (
+    MINIFY_ENV,
+    dumps_template,
+    minify_from_environment,
+    write_template,
+)
+from stacker_blueprints.sns import Topics
+
+
+def to_minified_json(template):
+    return json.dumps(template.to_dict(), sort_keys=True,
+                      separators=(",", ":"))
+
+
+def build_template():
+    t = Template()
+    t.add_description("A sample template.")
+    t.add_mapping("Regions", {"us-east-1": {"Name": "virginia"}})
+    bucket = t.add_resource(s3.Bucket(
+        "Bucket",
+        Tags=Tags(Name="bucket"),
+        DependsOn="Topic",
+    ))
+    t.add_resource(sns.Topic("Topic"))
+    t.add_resource(iam.Role(
+        "Role",
+        AssumeRolePolicyDocument=Policy(Statement=[
+            Statement(Effect=Allow, Action=[GetObject], Resource=["*"]),
+        ]),
+    ))
+    t.add_output(Output("BucketArn", Value=GetAtt(bucket, "Arn")))
+    t.add_output(Output("BucketName", Value=Ref(bucket)))
+    return t
+
+
+class TestSerialization(unittest.TestCase):
+    def test_dumps_template(self):
+        t = build_template()
+        self.assertEqual(dumps_template(t), to_minified_json(t))
+
+    def test_dumps_benchmark_cases(self):
+        for case in get_cases(["realistic"]):
+            blueprint = case.build()
+            blueprint.create_template()
+            self.assertEqual(dumps_template(blueprint.template),
+                             to_minified_json(blueprint.template),
+                             case.name)
+
+    def test_validates_objects(self):
+        t = Template()
+        t.add_resource(iam.Role("Role"))
+        with self.assertRaises(ValueError):
+            dumps_template(t)
+
+    def test_write_template(self):
+        t = build_template()
+        fp = io.BytesIO()
+        written = write_template(t, fp, buffer_size=16)
+        self.assertEqual(fp.getvalue(), to_minified_json(t))
+        self.assertEqual(written, len(fp.getvalue()))
+
+    def test_minify_from_environment(self):
+        self.assertFalse(minify_from_environment({}))
+        self.assertFalse(minify_from_environment({MINIFY_ENV: "false"}))
+        self.assertTrue(minify_from_environment({MINIFY_ENV: "1"}))
+
+
+class TestBlueprintSerialization(unittest.TestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+        self.variables = {"Topics": {"Example": {}}}
+
+    def test_render_minified(self):
+        pretty = Topics("topics", self.ctx).to_json(self.variables)
+        os.environ[MINIFY_ENV] = "1"
+        self.addCleanup(os.environ.pop, MINIFY_ENV)
+        minified = Topics("topics", self.ctx).to_json(self.variables)
+        self.assertNotIn(" ", minified)
+        self.assertEqual(json.loads(minified), json.loads(pretty))
+
+    def test_write_template(self):
+        blueprint = Topics("topics", self.ctx)
+        rendered = blueprint.to_json(self.variables)
+        blueprint.reset_template()
+        fp = io.BytesIO()
+        blueprint.write_template(fp)
+        self.assertEqual(json.loads(fp.getvalue()), json.loads(rendered))
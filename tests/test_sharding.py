@@ -0,0 +1,145 @@
+import unittest
+
+from stacker.blueprints.testutil import BlueprintTestCase
+from stacker.context import Context
+from stacker.variables import Variable
+from troposphere import GetAtt, ec2
+
+from stacker_blueprints.s3 import Buckets
+from stacker_blueprints.security_rules import Rules
+from stacker_blueprints.sharding import (
+    find_references,
+    get_shard,
+    group_dependencies,
+)
+
+
+def ingress_rule(**attrs):
+    rule = {
+        "CidrIp": "10.0.0.0/8",
+        "FromPort": 22,
+        "ToPort": 22,
+        "IpProtocol": "tcp",
+        "GroupId": "sg-12345678",
+    }
+    rule.update(attrs)
+    return rule
+
+
+class TestShardingFunctions(unittest.TestCase):
+    def test_get_shard(self):
+        shards = [get_shard("Item%d" % i, 4) for i in range(100)]
+        self.assertEqual(set(shards), set(range(4)))
+        self.assertEqual(shards, [get_shard("Item%d" % i, 4)
+                                  for i in range(100)])
+
+    def test_find_references(self):
+        references = find_references({
+            "GroupId": {"Ref": "Group"},
+            "SourceSecurityGroupId": {"Fn::GetAtt": ["Other", "GroupId"]},
+            "Description": {"Fn::Sub": "${Sub} ${Sub2.Arn} ${AWS::Region} "
+                                       "${!Literal}"},
+            "DependsOn": ["First", "Second"],
+        })
+        self.assertEqual(references,
+                         set(["Group", "Other", "Sub", "Sub2", "AWS::Region",
+                              "First", "Second"]))
+
+    def test_group_dependencies(self):
+        groups = group_dependencies(
+            ["A", "B", "C", "D", "E"],
+            {"B": set(["C"]), "C": set(["A", "Unknown"]), "E": set(["E"])},
+        )
+        self.assertEqual(groups,
+                         {"A": "A", "B": "A", "C": "A", "D": "D", "E": "E"})
+
+
+class TestShardedBlueprint(BlueprintTestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+
+    def render_rules(self, rules, **shard_variables):
+        blueprint = Rules("rules", self.ctx)
+        variables = [Variable("IngressRules", rules)]
+        variables.extend(
+            Variable(name, value) for name, value in shard_variables.items()
+        )
+        blueprint.resolve_variables(variables)
+        blueprint.create_template()
+        return blueprint.template
+
+    def test_shards_partition_items(self):
+        rules = dict(("Rule%d" % i, ingress_rule()) for i in range(50))
+        rendered = []
+        for index in range(3):
+            template = self.render_rules(rules, ShardCount=3,
+                                         ShardIndex=index)
+            rendered.append(set(template.resources))
+        self.assertEqual(set.union(*rendered), set(rules))
+        self.assertEqual(sum(len(titles) for titles in rendered), 50)
+        self.assertTrue(all(rendered))
+
+    def test_dependent_items_share_a_shard(self):
+        rules = [
+            ec2.SecurityGroupIngress("Rule%d" % i, **ingress_rule())
+            for i in range(20)
+        ]
+        rules[0].DependsOn = "Rule1"
+        rules[1].GroupId = GetAtt("Rule2", "GroupId")
+        for index in range(4):
+            blueprint = Rules("rules", self.ctx)
+            blueprint.resolve_variables([
+                Variable("ShardCount", 4),
+                Variable("ShardIndex", index),
+            ])
+            titles = set(
+                rule.title for rule in
+                blueprint.get_shard_items(rules, lambda rule: rule.title)
+            )
+            dependent = titles & set(["Rule0", "Rule1", "Rule2"])
+            self.assertIn(len(dependent), (0, 3))
+
+    def test_single_shard_renders_everything(self):
+        rules = dict(("Rule%d" % i, ingress_rule()) for i in range(5))
+        self.assertEqual(set(self.render_rules(rules).resources), set(rules))
+
+    def test_invalid_shard_index(self):
+        with self.assertRaises(ValueError):
+            self.render_rules({}, ShardCount=2, ShardIndex=2)
+
+    def test_too_many_items(self):
+        rules = dict(("Rule%d" % i, ingress_rule()) for i in range(201))
+        with self.assertRaises(ValueError) as cm:
+            self.render_rules(rules)
+        self.assertIn("at least 2 shards", str(cm.exception))
+        self.render_rules(rules, ShardCount=4)
+
+    def test_counts_per_item(self):
+        blueprint = Rules("rules", self.ctx)
+        blueprint.resolve_variables([])
+        items = range(60)
+        self.assertEqual(
+            len(blueprint.get_shard_items(
+                items, str, resources_per_item=lambda item: 1 + item % 5,
+                fixed_resources=20)),
+            60)
+        with self.assertRaises(ValueError) as cm:
+            blueprint.get_shard_items(
+                items, str, resources_per_item=lambda item: 1 + item % 5,
+                fixed_resources=21)
+        self.assertIn("at least 2 shards", str(cm.exception))
+
+    def test_export_outputs(self):
+        blueprint = Buckets("buckets", self.ctx)
+        blueprint.resolve_variables([
+            Variable("Buckets", {"Simple": {}, "Other": {}}),
+            Variable("ShardCount", 2),
+            Variable("ShardIndex", get_shard("Simple", 2)),
+            Variable("ShardExportPrefix", "buckets"),
+        ])
+        blueprint.create_template()
+        outputs = blueprint.template.outputs
+        self.assertIn("SimpleBucketId", outputs)
+        for name, output in outputs.items():
+            self.assertEqual(output.to_dict()["Export"],
+                             {"Name": "buckets-%s" % name})
@@ -0,0 +1,62 @@
+import unittest
+
+from stacker_blueprints.subnet_layout import (
+    carve_subnets,
+    format_cidr,
+    parse_cidr,
+)
+
+
+def get_range(cidr):
+    network, prefix = parse_cidr(cidr)
+    return network, network + (1 << (32 - prefix))
+
+
+class TestSubnetLayout(unittest.TestCase):
+    def test_carve_subnets(self):
+        tiers = carve_subnets(
+            "10.0.0.0/16", [{"Name": "public"}, {"Name": "private",
+                                                  "Size": 2}], 2)
+        self.assertEqual([(t.name, t.public) for t in tiers],
+                         [("public", True), ("private", False)])
+        self.assertEqual(tiers[0].cidr_blocks,
+                         ["10.0.128.0/19", "10.0.160.0/19"])
+        self.assertEqual(tiers[1].cidr_blocks,
+                         ["10.0.0.0/18", "10.0.64.0/18"])
+
+    def test_subnets_do_not_overlap(self):
+        vpc = get_range("10.32.0.0/16")
+        tiers = carve_subnets("10.32.0.0/16", [
+            {"Name": "public", "Size": 1},
+            {"Name": "private", "Size": 5},
+            {"Name": "data", "Size": 3},
+            {"Name": "dmz", "Size": 0.5, "Public": True},
+        ], 6)
+        ranges = sorted(get_range(cidr) for tier in tiers
+                        for cidr in tier.cidr_blocks)
+        self.assertEqual(len(ranges), 24)
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertLessEqual(end, next_start)
+        self.assertGreaterEqual(ranges[0][0], vpc[0])
+        self.assertLessEqual(ranges[-1][1], vpc[1])
+        self.assertTrue(tiers[3].public)
+        self.assertFalse(tiers[2].public)
+
+    def test_cidr_round_trip(self):
+        self.assertEqual(format_cidr(*parse_cidr("172.16.4.0/22")),
+                         "172.16.4.0/22")
+
+    def test_invalid_layouts(self):
+        for cidr, tiers, az_count in [
+                ("10.0.0.1/16", [{"Name": "public"}], 2),
+                ("10.0.0.0/8", [{"Name": "public"}], 2),
+                ("10.0.0.0/16", [], 2),
+                ("10.0.0.0/16", [{"Name": "public"}], 0),
+                ("10.0.0.0/16", [{"Name": "public"}, {"Name": "Public"}], 2),
+                ("10.0.0.0/16", [{"Name": "public-a"}], 2),
+                ("10.0.0.0/16", [{"Name": "public", "Size": 0}], 2),
+                ("10.0.0.0/16", [{"Name": "public", "Cidr": "x"}], 2),
+                ("10.0.0.0/26", [{"Name": "public"}], 6),
+        ]:
+            with self.assertRaises(ValueError):
+                carve_subnets(cidr, tiers, az_count)
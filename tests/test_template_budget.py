@@ -0,0 +1,101 @@
+import json
+import os
+import unittest
+
+import mock
+from stacker.context import Context
+
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.template_budget import (
+    FAIL_ENV,
+    MAX_BYTES_ENV,
+    WARN_ENV,
+    BudgetThresholds,
+    get_template_budget,
+)
+
+TEMPLATE = {
+    "Parameters": {"Name": {"Type": "String"}},
+    "Resources": {
+        "Small": {"Type": "AWS::SNS::Topic"},
+        "Large": {"Type": "AWS::SNS::Topic",
+                  "Properties": {"TopicName": "x" * 100}},
+        "Medium": {"Type": "AWS::SNS::Topic",
+                   "Properties": {"TopicName": "x"}},
+    },
+    "Outputs": {"Name": {"Value": {"Ref": "Large"}}},
+}
+
+
+class Topics(Blueprint):
+    VARIABLES = {
+        "Count": {
+            "type": int,
+        },
+    }
+
+    def create_template(self):
+        for i in range(self.get_variables()["Count"]):
+            self.add_output("Topic%d" % i, "x")
+
+
+class TestTemplateBudget(unittest.TestCase):
+    def test_get_template_budget(self):
+        rendered = json.dumps(TEMPLATE, indent=4)
+        budget = get_template_budget("topics", rendered, largest=2)
+        self.assertEqual(budget.pretty_bytes, len(rendered))
+        self.assertEqual(budget.minified_bytes,
+                         len(json.dumps(TEMPLATE, separators=(",", ":"))))
+        self.assertEqual(
+            (budget.resources, budget.outputs, budget.parameters,
+             budget.mappings),
+            (3, 1, 1, 0))
+        self.assertEqual([title for title, _ in budget.largest_resources],
+                         ["Large", "Medium"])
+        self.assertIn("Large", budget.format())
+
+    def test_from_environment(self):
+        self.assertIsNone(BudgetThresholds.from_environment({}))
+        thresholds = BudgetThresholds.from_environment(
+            {WARN_ENV: "80", MAX_BYTES_ENV: "51200"}
+        )
+        self.assertEqual(thresholds.warn, 0.8)
+        self.assertIsNone(thresholds.fail)
+        self.assertEqual(thresholds.max_bytes, 51200)
+        with self.assertRaises(ValueError):
+            BudgetThresholds.from_environment({FAIL_ENV: "most"})
+
+    def test_check(self):
+        budget = get_template_budget("topics", json.dumps(TEMPLATE))
+        with mock.patch("stacker_blueprints.template_budget.logger") as log:
+            BudgetThresholds(warn=0.01, fail=0.5).check(budget)
+        warnings = [c[0][1:] for c in log.warning.call_args_list]
+        self.assertEqual(warnings, [
+            ("topics", 3, 200, "resources", 1.5),
+            ("topics", 1, 60, "outputs", 100.0 / 60),
+            ("topics", 1, 60, "parameters", 100.0 / 60),
+        ])
+
+        with self.assertRaises(ValueError) as cm:
+            BudgetThresholds(fail=0.0001).check(budget)
+        self.assertIn("topics", str(cm.exception))
+        self.assertIn("template bytes", str(cm.exception))
+
+        with self.assertRaises(ValueError):
+            BudgetThresholds(fail=1, max_bytes=100).check(budget)
+
+
+class TestBlueprintBudget(unittest.TestCase):
+    def setUp(self):
+        self.ctx = Context({"namespace": "test"})
+
+    def test_render_fails_over_budget(self):
+        os.environ[FAIL_ENV] = "50"
+        self.addCleanup(os.environ.pop, FAIL_ENV)
+        Topics("topics", self.ctx).to_json({"Count": 30})
+        with self.assertRaises(ValueError) as cm:
+            Topics("topics", self.ctx).to_json({"Count": 31})
+        self.assertIn("31 of 60 outputs", str(cm.exception))
+
+    def test_disabled_by_default(self):
+        Topics("topics", self.ctx).to_json({"Count": 60})
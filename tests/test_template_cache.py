@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from troposphere import Ref
+
+from stacker_blueprints.base import Blueprint
+from stacker_blueprints.template_cache import (
+    CACHE_DIR_ENV,
+    MAX_BYTES_ENV,
+    MAX_ENTRIES_ENV,
+    TemplateCache,
+    get_cache_key,
+)
+
+
+class TestGetCacheKey(unittest.TestCase):
+    def test_stable(self):
+        self.assertEqual(
+            get_cache_key(Blueprint, {"a": 1, "b": [1, 2], "c": {"d": "e"}}),
+            get_cache_key(Blueprint, {"c": {"d": "e"}, "b": [1, 2], "a": 1}),
+        )
+
+    def test_depends_on_class_and_data(self):
+        key = get_cache_key(Blueprint, {"a": 1})
+        self.assertNotEqual(key, get_cache_key(Blueprint, {"a": 2}))
+        self.assertNotEqual(key, get_cache_key(TemplateCache, {"a": 1}))
+
+    def test_troposphere_objects(self):
+        self.assertEqual(
+            get_cache_key(Blueprint, {"a": Ref("Thing")}),
+            get_cache_key(Blueprint, {"a": Ref("Thing")}),
+        )
+        self.assertNotEqual(
+            get_cache_key(Blueprint, {"a": Ref("Thing")}),
+            get_cache_key(Blueprint, {"a": Ref("Other")}),
+        )
+
+    def test_unserializable_data(self):
+        self.assertIsNone(get_cache_key(Blueprint, {"a": object()}))
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def set_used(self, cache, key, mtime):
+        os.utime(cache.entry_path(key), (mtime, mtime))
+
+    def test_get_set(self):
+        cache = TemplateCache(os.path.join(self.path, "cache"))
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", "{}")
+        self.assertEqual(cache.get("key"), "{}")
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = TemplateCache(self.path, max_entries=2)
+        cache.set("a", "{}")
+        cache.set("b", "{}")
+        self.set_used(cache, "a", 2000)
+        self.set_used(cache, "b", 1000)
+        cache.get("b")
+        cache.set("c", "{}")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "{}")
+        self.assertEqual(cache.get("c"), "{}")
+
+    def test_evicts_over_max_bytes(self):
+        cache = TemplateCache(self.path, max_bytes=10)
+        cache.set("a", "x" * 6)
+        self.set_used(cache, "a", 1000)
+        cache.set("b", "x" * 6)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "x" * 6)
+
+    def test_from_environment(self):
+        self.assertIsNone(TemplateCache.from_environment({}))
+        cache = TemplateCache.from_environment({
+            CACHE_DIR_ENV: self.path,
+            MAX_ENTRIES_ENV: "10",
+            MAX_BYTES_ENV: "1024",
+        })
+        self.assertEqual(cache.path, self.path)
+        self.assertEqual(cache.max_entries, 10)
+        self.assertEqual(cache.max_bytes, 1024)
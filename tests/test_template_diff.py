@@ -0,0 +1,176 @@
+import copy
+import json
+import unittest
+
+from stacker_blueprints.route53 import get_record_set_md5
+from stacker_blueprints.template_diff import (
+    ADD,
+    MODIFY,
+    REMOVE,
+    REPLACE,
+    diff_templates,
+)
+
+RECORD_SET_ID = get_record_set_md5("www.example.com.", "A")
+
+TEMPLATE = {
+    "Parameters": {"VpcId": {"Type": "String"}},
+    "Resources": {
+        "PrivateSubnet0": {
+            "Type": "AWS::EC2::Subnet",
+            "Properties": {
+                "CidrBlock": "10.0.0.0/24",
+                "VpcId": {"Ref": "VpcId"},
+                "Tags": [{"Key": "Name", "Value": "private"}],
+            },
+        },
+        "PrivateRouteTableAssociation0": {
+            "Type": "AWS::EC2::SubnetRouteTableAssociation",
+            "Properties": {
+                "SubnetId": {"Ref": "PrivateSubnet0"},
+                "RouteTableId": "rtb-12345678",
+            },
+        },
+        "NatGateway0": {
+            "Type": "AWS::EC2::NatGateway",
+            "Properties": {
+                "AllocationId": "eipalloc-12345678",
+                "SubnetId": {"Ref": "PrivateSubnet0"},
+            },
+        },
+        "Logs": {
+            "Type": "AWS::Logs::LogGroup",
+            "Properties": {
+                "RetentionInDays": 7,
+                "Tags": [{"Key": "Subnet",
+                          "Value": {"Fn::Sub": "${PrivateSubnet0}"}}],
+            },
+        },
+        RECORD_SET_ID: {
+            "Type": "AWS::Route53::RecordSet",
+            "Properties": {
+                "HostedZoneId": "Z1234567890",
+                "Name": "www.example.com.",
+                "Type": "A",
+                "ResourceRecords": ["10.0.0.1"],
+            },
+        },
+        "BulkRecordSetGroup0": {
+            "Type": "AWS::Route53::RecordSetGroup",
+            "Properties": {
+                "HostedZoneId": "Z1234567890",
+                "RecordSets": [
+                    {"Name": "a.example.com.", "Type": "A",
+                     "ResourceRecords": ["10.0.0.2"]},
+                    {"Name": "b.example.com.", "Type": "A",
+                     "ResourceRecords": ["10.0.0.3"]},
+                ],
+            },
+        },
+    },
+    "Outputs": {"SubnetId": {"Value": {"Ref": "PrivateSubnet0"}}},
+}
+
+
+class TestTemplateDiff(unittest.TestCase):
+    def setUp(self):
+        self.new = copy.deepcopy(TEMPLATE)
+        self.resources = self.new["Resources"]
+
+    def diff(self):
+        return diff_templates(json.dumps(TEMPLATE), self.new)
+
+    def get_changes(self):
+        return dict((change.logical_id, change)
+                    for change in self.diff().resources)
+
+    def test_no_changes(self):
+        diff = self.diff()
+        self.assertFalse(diff)
+        self.assertEqual(diff.format(), "")
+
+    def test_add_and_remove(self):
+        self.resources["Bucket"] = {"Type": "AWS::S3::Bucket"}
+        del self.resources["Logs"]
+        changes = self.get_changes()
+        self.assertEqual(changes["Bucket"].action, ADD)
+        self.assertEqual(changes["Logs"].action, REMOVE)
+        self.assertEqual(changes["Logs"].resource_type,
+                         "AWS::Logs::LogGroup")
+
+    def test_modify(self):
+        self.resources["PrivateSubnet0"]["Properties"]["Tags"] = []
+        self.resources["Logs"]["DeletionPolicy"] = "Retain"
+        self.resources[RECORD_SET_ID]["Properties"]["Type"] = "CNAME"
+        changes = self.get_changes()
+        self.assertEqual(sorted(changes),
+                         sorted(["PrivateSubnet0", "Logs", RECORD_SET_ID]))
+        self.assertEqual(changes["PrivateSubnet0"].action, MODIFY)
+        self.assertEqual(changes["PrivateSubnet0"].properties, ["Tags"])
+        self.assertEqual(changes["Logs"].properties, ["DeletionPolicy"])
+        self.assertEqual(changes[RECORD_SET_ID].action, MODIFY)
+
+    def test_replace(self):
+        self.resources[RECORD_SET_ID]["Properties"]["HostedZoneId"] = "Z2"
+        self.resources["Logs"]["Type"] = "AWS::SNS::Topic"
+        changes = self.get_changes()
+        self.assertEqual(changes[RECORD_SET_ID].action, REPLACE)
+        self.assertEqual(changes[RECORD_SET_ID].replacement_properties,
+                         ["HostedZoneId"])
+        self.assertEqual(changes["Logs"].replacement_properties, ["Type"])
+
+    def test_replacement_cascades(self):
+        self.resources["PrivateSubnet0"]["Properties"]["CidrBlock"] = \
+            "10.0.1.0/24"
+        diff = self.diff()
+        changes = dict((c.logical_id, c) for c in diff.resources)
+        self.assertEqual(changes["PrivateSubnet0"].action, REPLACE)
+        self.assertEqual(changes["PrivateRouteTableAssociation0"].action,
+                         REPLACE)
+        self.assertEqual(
+            changes["PrivateRouteTableAssociation0"].replacement_properties,
+            ["SubnetId"])
+        self.assertEqual(changes["NatGateway0"].action, REPLACE)
+        self.assertEqual(changes["Logs"].action, MODIFY)
+        self.assertEqual(changes["Logs"].properties, ["Tags"])
+        self.assertNotIn(RECORD_SET_ID, changes)
+        self.assertEqual(diff.outputs, [])
+        self.assertIn("! PrivateSubnet0 (AWS::EC2::Subnet) replaced by: "
+                      "CidrBlock", diff.format())
+
+    def test_record_set_group(self):
+        record_sets = self.resources["BulkRecordSetGroup0"]["Properties"][
+            "RecordSets"]
+        record_sets[1]["ResourceRecords"] = ["10.0.0.4"]
+        record_sets.append({"Name": "c.example.com.", "Type": "A",
+                            "ResourceRecords": ["10.0.0.5"]})
+        change = self.get_changes()["BulkRecordSetGroup0"]
+        self.assertEqual(change.action, MODIFY)
+        self.assertEqual(change.properties,
+                         ["RecordSets.b.example.com. A",
+                          "RecordSets.c.example.com. A"])
+
+    def test_weighted_record_sets(self):
+        weighted = [
+            {"Name": "api.example.com.", "Type": "A", "SetIdentifier": name,
+             "Weight": 50, "ResourceRecords": [address]}
+            for name, address in (("blue", "10.0.0.6"), ("green", "10.0.0.7"))
+        ]
+        self.resources["BulkRecordSetGroup0"]["Properties"][
+            "RecordSets"].extend(weighted)
+        old = copy.deepcopy(self.new)
+        self.new["Resources"]["BulkRecordSetGroup0"]["Properties"][
+            "RecordSets"][2]["Weight"] = 100
+        change = diff_templates(old, self.new).resources[0]
+        self.assertEqual(change.action, MODIFY)
+        self.assertEqual(change.properties,
+                         ["RecordSets.api.example.com. A blue"])
+
+    def test_outputs_and_parameters(self):
+        self.new["Outputs"]["SubnetId"]["Export"] = {"Name": "subnet"}
+        self.new["Outputs"]["Other"] = {"Value": "x"}
+        del self.new["Parameters"]["VpcId"]
+        diff = self.diff()
+        self.assertEqual(diff.outputs, [("Other", ADD), ("SubnetId", MODIFY)])
+        self.assertEqual(diff.parameters, [("VpcId", REMOVE)])
+        self.assertIn("- Parameter VpcId", diff.format())
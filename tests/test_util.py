@@ -0,0 +1,19 @@
+import sys
+import unittest
+
+from stacker_blueprints.util import batched, lazy_import
+
+
+class TestUtil(unittest.TestCase):
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched([], 2)), [])
+
+    def test_lazy_import(self):
+        sys.modules.pop("awacs.workspaces", None)
+        workspaces = lazy_import("awacs.workspaces")
+        self.assertNotIn("awacs.workspaces", sys.modules)
+        self.assertEqual(workspaces.prefix, "workspaces")
+        self.assertIn("awacs.workspaces", sys.modules)
+        self.assertIs(workspaces.Action,
+                      sys.modules["awacs.workspaces"].Action)
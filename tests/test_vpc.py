@@ -1,7 +1,7 @@
 from stacker.context import Context
 from stacker.config import Config
 from stacker.variables import Variable
-from stacker_blueprints.vpc import VPC2
+from stacker_blueprints.vpc import VPC, VPC2
 from stacker.blueprints.testutil import BlueprintTestCase
 
 from troposphere.route53 import HostedZone
@@ -58,3 +58,160 @@ class TestVPC2(BlueprintTestCase):
         self.assertEquals(zone.VPCs[0].VPCId.data["Ref"], VPC_NAME)
         dhcp = bp.template.resources["DHCPOptions"]
         self.assertEquals(dhcp.DomainName, "internal.")
+
+    def test_vpc2_with_endpoints(self):
+        bp = self.create_blueprint("test_vpc2_with_endpoints")
+
+        variables = {
+            "GatewayEndpoints": ["s3"],
+            "InterfaceEndpoints": ["sts"],
+            "EndpointRouteTableIds": ["rtb-1234", "rtb-5678"],
+            "EndpointSubnetIds": ["subnet-1234", "subnet-5678"],
+        }
+
+        bp.resolve_variables(self.generate_variables(variables))
+        bp.create_template()
+        self.assertRenderedBlueprint(bp)
+
+    def test_vpc2_endpoints_need_subnets(self):
+        bp = self.create_blueprint("test_vpc2_endpoints_need_subnets")
+        bp.resolve_variables(
+            self.generate_variables({"InterfaceEndpoints": ["sts"]})
+        )
+        with self.assertRaises(ValueError):
+            bp.create_template()
+
+
+class TestVPC(BlueprintTestCase):
+    def setUp(self):
+        self.ctx = Context(config=Config({'namespace': 'test'}))
+        self.common_variables = {
+            "AZCount": 2,
+            "PublicSubnets": ["10.128.0.0/24", "10.128.1.0/24"],
+            "PrivateSubnets": ["10.128.8.0/22", "10.128.12.0/22"],
+        }
+
+    def create_blueprint(self, name, variables):
+        bp = VPC(name, self.ctx)
+        self.common_variables.update(variables)
+        bp.resolve_variables(
+            [Variable(k, v) for k, v in self.common_variables.items()]
+        )
+        return bp
+
+    def test_vpc_with_endpoints(self):
+        bp = self.create_blueprint("test_vpc_with_endpoints", {
+            "GatewayEndpoints": ["s3", "dynamodb"],
+            "InterfaceEndpoints": ["ecr.api", "ecr.dkr", "logs", "sqs",
+                                   "kms", "sts"],
+        })
+        bp.create_template()
+        self.assertRenderedBlueprint(bp)
+        endpoint = bp.template.resources["S3GatewayEndpoint"]
+        self.assertEqual(
+            [ref.data["Ref"] for ref in endpoint.RouteTableIds],
+            ["PrivateRouteTable0", "PrivateRouteTable1"]
+        )
+        self.assertIn("EcrDkrInterfaceEndpointId", bp.template.outputs)
+
+    def test_vpc_without_endpoints(self):
+        bp = self.create_blueprint("test_vpc_without_endpoints", {})
+        bp.create_template()
+        for resource in bp.template.resources.values():
+            self.assertNotEqual(resource.resource_type,
+                                "AWS::EC2::VPCEndpoint")
+
+    def test_invalid_gateway_endpoint(self):
+        bp = self.create_blueprint("test_invalid_gateway_endpoint", {
+            "GatewayEndpoints": ["sqs"],
+        })
+        with self.assertRaises(ValueError):
+            bp.create_template()
+
+    def test_duplicate_endpoint(self):
+        bp = self.create_blueprint("test_duplicate_endpoint", {
+            "InterfaceEndpoints": ["sqs", "sqs"],
+        })
+        with self.assertRaises(ValueError):
+            bp.create_template()
+
+    def test_vpc_with_subnet_tiers(self):
+        bp = self.create_blueprint("test_vpc_with_subnet_tiers", {
+            "CidrBlock": "10.0.0.0/16",
+            "AZCount": 3,
+            "SubnetTiers": [
+                {"Name": "public"},
+                {"Name": "private", "Size": 4},
+                {"Name": "data", "Size": 2},
+            ],
+            "EnableIpv6": True,
+            "GatewayEndpoints": ["s3"],
+        })
+        bp.create_template()
+        self.assertRenderedBlueprint(bp)
+        resources = bp.template.resources
+        self.assertEqual(resources["DataSubnet2"].CidrBlock, "10.0.128.0/20")
+        self.assertIn("DataSubnets", bp.template.outputs)
+        self.assertIn("EgressOnlyInternetGatewayId",
+                      resources["DataIpv6Route0"].properties)
+        self.assertIn("GatewayId", resources["PublicIpv6Route0"].properties)
+        self.assertEqual(
+            [ref.data["Ref"] for ref in
+             resources["S3GatewayEndpoint"].RouteTableIds],
+            ["PrivateRouteTable0", "DataRouteTable0", "PrivateRouteTable1",
+             "DataRouteTable1", "PrivateRouteTable2", "DataRouteTable2"]
+        )
+
+    def test_subnet_count_must_match_az_count(self):
+        bp = self.create_blueprint("test_subnet_count", {"AZCount": 3})
+        with self.assertRaises(ValueError):
+            bp.create_template()
+
+    def test_subnet_tiers_need_public_tier(self):
+        bp = self.create_blueprint("test_subnet_tiers_need_public_tier", {
+            "CidrBlock": "10.0.0.0/16",
+            "SubnetTiers": [{"Name": "private"}, {"Name": "data"}],
+        })
+        with self.assertRaises(ValueError):
+            bp.create_template()
+
+    def test_vpc_single_nat(self):
+        bp = self.create_blueprint("test_vpc_single_nat", {
+            "AZCount": 2,
+            "NatMode": "single",
+        })
+        bp.create_template()
+        resources = bp.template.resources
+        self.assertNotIn("NatGateway1", resources)
+        self.assertNotIn("NATExternalIp1", resources)
+        for i in range(2):
+            self.assertEqual(
+                resources["PrivateRoute%d" % i].NatGatewayId.data,
+                {"Ref": "NatGateway0"})
+        self.assertEqual(bp.template.outputs["NatMode"].Value, "single")
+
+    def test_vpc_nat_instances(self):
+        bp = self.create_blueprint("test_vpc_nat_instances", {
+            "NatMode": "instances",
+            "NatInstanceTypes": ["c5n.large", "m5.large"],
+            "NatEnhancedNetworking": True,
+        })
+        bp.create_template()
+        self.assertRenderedBlueprint(bp)
+        resources = bp.template.resources
+        self.assertEqual(resources["NatInstance1"].InstanceType, "m5.large")
+        self.assertTrue(resources["NatInstance1"].EbsOptimized)
+        self.assertEqual(resources["PrivateRoute1"].InstanceId.data,
+                         {"Ref": "NatInstance1"})
+        self.assertIn("NATSG", resources)
+
+    def test_invalid_nat_configurations(self):
+        for variables in [
+                {"NatMode": "shared"},
+                {"NatMode": "instances", "NatInstanceTypes": ["t3.micro"]},
+                {"NatMode": "instances", "NatInstanceTypes": [],
+                 "NatEnhancedNetworking": True},
+        ]:
+            bp = self.create_blueprint("test_invalid_nat", variables)
+            with self.assertRaises(ValueError):
+                bp.create_template()